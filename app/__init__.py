@@ -4,6 +4,10 @@ from flask import Flask, render_template, request, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from .config import config
+from .utils.cache import response_cache
+from .utils.rate_limit import rate_limiter
+from .utils.metrics import request_metrics
+from .utils.nplusone import nplusone_detector
 
 # Inicialização das extensões
 db = SQLAlchemy()
@@ -25,6 +29,10 @@ def create_app(config_name=None):
     # Inicializar extensões
     db.init_app(app)
     migrate.init_app(app, db)
+    response_cache.init_app(app)
+    rate_limiter.init_app(app)
+    request_metrics.init_app(app)
+    nplusone_detector.init_app(app)
     
     # Configurar logging
     configure_logging(app)
@@ -130,6 +138,12 @@ def register_context_processors(app):
             'current_user': session.get('user_logged', False),
             'user_name': session.get('user_name', 'Usuário')
         }
+    
+    @app.context_processor
+    def inject_paginacao():
+        """Injetar o gerador de links das páginas por cursor"""
+        from app.utils.paginacao import url_cursor
+        return {'url_cursor': url_cursor}
 
 
 def register_request_hooks(app):
@@ -8,6 +8,9 @@ from .venda import Venda
 from .item_venda import ItemVenda
 from .pagamento import Pagamento
 from .pagamento_multiplo import PagamentoMultiplo, PagamentoMultiploDetalhe
+from .resumo_diario import ResumoDiario
+from .inadimplencia import InadimplenciaCliente, InadimplenciaSnapshot
+from .projecoes import LinhaVenda, LinhaCliente
 
 # Lista de todos os modelos para facilitar importação
 __all__ = [
@@ -16,7 +19,12 @@ __all__ = [
     'ItemVenda',
     'Pagamento',
     'PagamentoMultiplo',
-    'PagamentoMultiploDetalhe'
+    'PagamentoMultiploDetalhe',
+    'ResumoDiario',
+    'InadimplenciaCliente',
+    'InadimplenciaSnapshot',
+    'LinhaVenda',
+    'LinhaCliente'
 ]
 
 # Função para criar todas as tabelas
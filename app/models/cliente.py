@@ -2,11 +2,12 @@
 Modelo Cliente - Gerenciamento de clientes do açougue
 """
 
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy import func
 from app import db
-from app.utils.constants import LIMITE_CREDITO_PADRAO
+from app.utils.constants import LIMITE_CREDITO_PADRAO, DIAS_INADIMPLENCIA
+from app.utils.helpers import somente_digitos
 
 
 class Cliente(db.Model):
@@ -19,14 +20,36 @@ class Cliente(db.Model):
     nome = db.Column(db.String(100), nullable=False, index=True)
     cpf = db.Column(db.String(14), unique=True, nullable=True, index=True)
     telefone = db.Column(db.String(15), nullable=True)
+    
+    # Somente dígitos, para busca indexada (mantidos em normalizar_documentos)
+    cpf_digitos = db.Column(db.String(11), nullable=True, index=True)
+    telefone_digitos = db.Column(db.String(15), nullable=True, index=True)
+    
     endereco = db.Column(db.Text, nullable=True)
     
     # Configurações de crédito
     limite_credito = db.Column(
         db.Numeric(10, 2), 
         nullable=False, 
-        default=LIMITE_CREDITO_PADRAO
+        default=LIMITE_CREDITO_PADRAO,
+        index=True
+    )
+    
+    # Saldo consolidado das vendas em aberto (mantido a cada flush que
+    # altera vendas ou pagamentos - ver recalcular_saldos)
+    saldo_aberto = db.Column(
+        db.Numeric(10, 2), 
+        nullable=False, 
+        default=0,
+        index=True
+    )
+    saldo_vencido = db.Column(
+        db.Numeric(10, 2), 
+        nullable=False, 
+        default=0
     )
+    data_vencimento_mais_antiga = db.Column(db.Date, nullable=True, index=True)
+    data_calculo_saldo = db.Column(db.Date, nullable=True)
     
     # Controle
     ativo = db.Column(db.Boolean, nullable=False, default=True, index=True)
@@ -40,7 +63,8 @@ class Cliente(db.Model):
         db.DateTime, 
         nullable=False, 
         default=datetime.utcnow,
-        onupdate=datetime.utcnow
+        onupdate=datetime.utcnow,
+        index=True
     )
     observacoes = db.Column(db.Text, nullable=True)
     
@@ -60,9 +84,9 @@ class Cliente(db.Model):
     
     @property
     def vendas_em_aberto(self):
-        """Vendas em aberto do cliente"""
+        """Vendas em aberto do cliente (inclusive as já marcadas como vencidas)"""
         from app.models.venda import Venda
-        return self.vendas.filter(Venda.status == 'aberta')
+        return self.vendas.filter(Venda.a_receber())
     
     @property
     def vendas_vencidas(self):
@@ -74,28 +98,54 @@ class Cliente(db.Model):
         data_limite = date.today() - timedelta(days=DIAS_INADIMPLENCIA)
         
         return self.vendas.filter(
-            Venda.status == 'aberta',
+            Venda.a_receber(),
             Venda.data_vencimento < data_limite
         )
     
     @property
     def valor_total_em_aberto(self):
         """Valor total das vendas em aberto"""
-        total = self.vendas_em_aberto.with_entities(
-            func.sum(db.text('vendas.total'))
-        ).scalar()
-        
-        return Decimal(str(total or 0))
+        return Decimal(str(self.saldo_aberto or 0))
     
     @property
     def valor_total_vencido(self):
         """Valor total das vendas vencidas"""
+        # O saldo vencido depende da data de hoje: só vale se calculado hoje
+        if self.data_calculo_saldo == date.today():
+            return Decimal(str(self.saldo_vencido or 0))
+        
+        if not self.esta_inadimplente:
+            return Decimal('0')
+        
         total = self.vendas_vencidas.with_entities(
-            func.sum(db.text('vendas.total'))
+            func.sum(db.text('vendas.valor_restante'))
         ).scalar()
         
         return Decimal(str(total or 0))
     
+    @staticmethod
+    def expressao_saldo_vencido():
+        """
+        Saldo vencido em SQL, com a mesma regra de valor_total_vencido: o
+        consolidado se calculado hoje, senão a soma das vendas vencidas
+        """
+        from app.models.venda import Venda
+        
+        hoje = date.today()
+        data_limite = hoje - timedelta(days=DIAS_INADIMPLENCIA)
+        vencido = db.select(
+            func.coalesce(func.sum(Venda.valor_restante), 0)
+        ).where(
+            Venda.cliente_id == Cliente.id,
+            Venda.a_receber(),
+            Venda.data_vencimento < data_limite
+        ).correlate(Cliente).scalar_subquery()
+        
+        return db.case(
+            (Cliente.data_calculo_saldo == hoje, Cliente.saldo_vencido),
+            else_=vencido
+        )
+    
     @property
     def credito_disponivel(self):
         """Crédito disponível para o cliente"""
@@ -105,7 +155,11 @@ class Cliente(db.Model):
     @property
     def esta_inadimplente(self):
         """Verifica se o cliente está inadimplente"""
-        return self.vendas_vencidas.count() > 0
+        if not self.data_vencimento_mais_antiga:
+            return False
+        
+        data_limite = date.today() - timedelta(days=DIAS_INADIMPLENCIA)
+        return self.data_vencimento_mais_antiga < data_limite
     
     @property
     def pode_comprar(self):
@@ -144,28 +198,55 @@ class Cliente(db.Model):
         valor_total_com_nova = self.valor_total_em_aberto + Decimal(str(valor_nova_compra))
         return valor_total_com_nova <= self.limite_credito
     
-    def to_dict(self, include_vendas=False):
-        """Converter para dicionário"""
-        data = {
-            'id': self.id,
-            'nome': self.nome,
-            'cpf': self.cpf,
-            'telefone': self.telefone,
-            'endereco': self.endereco,
-            'limite_credito': float(self.limite_credito),
-            'ativo': self.ativo,
-            'data_cadastro': self.data_cadastro.isoformat() if self.data_cadastro else None,
-            'observacoes': self.observacoes,
-            'valor_total_em_aberto': float(self.valor_total_em_aberto),
-            'credito_disponivel': float(self.credito_disponivel),
-            'esta_inadimplente': self.esta_inadimplente,
-            'pode_comprar': self.pode_comprar
-        }
-        
-        if include_vendas:
-            data['vendas'] = [venda.to_dict() for venda in self.historico_vendas(10)]
-        
-        return data
+    def to_dict(self, include_vendas=False, fields=None):
+        """
+        Converter para dicionário
+        
+        Args:
+            include_vendas: Incluir as últimas 10 vendas
+            fields: Campos desejados (substitui include_vendas);
+                ver app.models.serializadores.serializador_cliente
+        """
+        from app.models.serializadores import serializador_cliente
+        
+        if fields is None:
+            fields = serializador_cliente.padrao + (('vendas',) if include_vendas else ())
+        return serializador_cliente.serializar(self, fields)
+    
+    @staticmethod
+    def condicao_busca(termo):
+        """
+        Condição SQL para buscar clientes por nome, CPF ou telefone
+        
+        Termos só com dígitos e formatação (ex.: '123.456', '(11) 9988')
+        buscam por prefixo nas colunas de dígitos, atendidos pelos índices.
+        Os demais buscam no nome.
+        
+        Args:
+            termo: Texto digitado
+            
+        Returns:
+            Expressão para usar em filter(), ou None se o termo for vazio
+        """
+        termo = (termo or '').strip()
+        if not termo:
+            return None
+        
+        digitos = somente_digitos(termo)
+        if Cliente.busca_por_digitos(termo):
+            # Faixa [digitos, digitos + ':') equivale a LIKE 'digitos%' e usa o índice
+            # (':' é o caractere seguinte a '9')
+            return db.or_(
+                db.and_(Cliente.cpf_digitos >= digitos, Cliente.cpf_digitos < digitos + ':'),
+                db.and_(Cliente.telefone_digitos >= digitos, Cliente.telefone_digitos < digitos + ':')
+            )
+        
+        return Cliente.nome.ilike(f'%{termo}%')
+    
+    @staticmethod
+    def busca_por_digitos(termo):
+        """Se o termo é CPF/telefone (só dígitos e formatação) e não um nome"""
+        return bool(somente_digitos(termo)) and not any(c.isalpha() for c in termo)
     
     @staticmethod
     def buscar(termo, apenas_ativos=True):
@@ -175,38 +256,175 @@ class Cliente(db.Model):
         if apenas_ativos:
             query = query.filter(Cliente.ativo == True)
         
-        if termo:
-            # Remover formatação para busca
-            termo_limpo = ''.join(filter(str.isalnum, termo))
+        condicao = Cliente.condicao_busca(termo)
+        if condicao is not None:
+            query = query.filter(condicao)
+        
+        return query.order_by(Cliente.nome)
+    
+    @staticmethod
+    def resumos_credito(*condicoes, ordem=None, limite=None):
+        """
+        Dados de crédito de vários clientes em uma única consulta
+        
+        Lê só as colunas necessárias, incluindo o saldo consolidado, sem
+        carregar entidades. Crédito disponível, inadimplência e "pode
+        comprar" seguem as mesmas regras das propriedades do modelo.
+        
+        Args:
+            *condicoes: Filtros (ex.: Cliente.id.in_(ids))
+            ordem: Expressão de ordenação
+            limite: Quantidade máxima de clientes
+            
+        Returns:
+            Lista de dicionários no formato do autocomplete, na ordem da consulta
+        """
+        consulta = db.select(
+            Cliente.id, Cliente.nome, Cliente.cpf, Cliente.telefone, Cliente.ativo,
+            Cliente.limite_credito, Cliente.saldo_aberto, Cliente.data_vencimento_mais_antiga
+        ).where(*condicoes)
+        
+        if ordem is not None:
+            consulta = consulta.order_by(ordem)
+        if limite:
+            consulta = consulta.limit(limite)
+        
+        data_limite = date.today() - timedelta(days=DIAS_INADIMPLENCIA)
+        
+        resumos = []
+        for linha in db.session.execute(consulta):
+            valor_aberto = Decimal(str(linha.saldo_aberto or 0))
+            credito_disponivel = linha.limite_credito - valor_aberto
+            inadimplente = bool(linha.data_vencimento_mais_antiga and
+                                linha.data_vencimento_mais_antiga < data_limite)
             
-            query = query.filter(
-                db.or_(
-                    Cliente.nome.ilike(f'%{termo}%'),
-                    func.replace(func.replace(func.replace(
-                        Cliente.cpf, '.', ''), '-', ''), ' ', ''
-                    ).ilike(f'%{termo_limpo}%'),
-                    func.replace(func.replace(func.replace(func.replace(
-                        Cliente.telefone, '(', ''), ')', ''), '-', ''), ' ', ''
-                    ).ilike(f'%{termo_limpo}%')
-                )
+            resumos.append({
+                'id': linha.id,
+                'nome': linha.nome,
+                'cpf': linha.cpf,
+                'telefone': linha.telefone,
+                'limite_credito': float(linha.limite_credito),
+                'valor_aberto': float(valor_aberto),
+                'credito_disponivel': float(credito_disponivel),
+                'pode_comprar': bool(linha.ativo and credito_disponivel > 0 and not inadimplente),
+                'esta_inadimplente': inadimplente,
+                'ativo': linha.ativo
+            })
+        
+        return resumos
+    
+    @staticmethod
+    def normalizar_documentos_existentes():
+        """
+        Preencher cpf_digitos e telefone_digitos de todos os clientes
+        
+        Returns:
+            Quantidade de clientes atualizados
+        """
+        linhas = db.session.execute(
+            db.select(Cliente.id, Cliente.cpf, Cliente.telefone,
+                      Cliente.cpf_digitos, Cliente.telefone_digitos)
+        ).all()
+        
+        alteracoes = [
+            {'b_id': linha.id, 'b_cpf': cpf, 'b_telefone': telefone}
+            for linha in linhas
+            for cpf, telefone in [(somente_digitos(linha.cpf), somente_digitos(linha.telefone))]
+            if (cpf, telefone) != (linha.cpf_digitos, linha.telefone_digitos)
+        ]
+        
+        if alteracoes:
+            tabela = Cliente.__table__
+            db.session.execute(
+                tabela.update().where(
+                    tabela.c.id == db.bindparam('b_id')
+                ).values(
+                    cpf_digitos=db.bindparam('b_cpf'),
+                    telefone_digitos=db.bindparam('b_telefone')
+                ),
+                alteracoes
             )
         
-        return query.order_by(Cliente.nome)
+        return len(alteracoes)
     
     @staticmethod
     def clientes_inadimplentes():
-        """Listar clientes inadimplentes"""
+        """Listar clientes inadimplentes (pela tabela de inadimplência processada)"""
+        from app.models.inadimplencia import InadimplenciaCliente
+        
+        return Cliente.query.filter(
+            Cliente.ativo == True,
+            Cliente.id.in_(InadimplenciaCliente.ids_inadimplentes())
+        )
+    
+    @staticmethod
+    def recalcular_saldos(clientes_ids=None, connection=None):
+        """
+        Recalcular o saldo consolidado dos clientes a partir das vendas
+        
+        O saldo é o valor_restante das vendas a receber (Venda.a_receber),
+        a mesma regra de InadimplenciaCliente.recalcular.
+        
+        Args:
+            clientes_ids: IDs dos clientes a recalcular (todos se None)
+            connection: Conexão a usar (padrão: a da sessão atual)
+            
+        Returns:
+            Dicionário {cliente_id: (saldo_aberto, saldo_vencido, data_mais_antiga)}
+        """
         from app.models.venda import Venda
-        from app.utils.constants import DIAS_INADIMPLENCIA
-        from datetime import date, timedelta
         
-        data_limite = date.today() - timedelta(days=DIAS_INADIMPLENCIA)
+        if connection is None:
+            connection = db.session.connection()
         
-        return Cliente.query.join(Venda).filter(
-            Cliente.ativo == True,
-            Venda.status == 'aberta',
-            Venda.data_vencimento < data_limite
-        ).distinct()
+        hoje = date.today()
+        data_limite = hoje - timedelta(days=DIAS_INADIMPLENCIA)
+        
+        # Uma única consulta agrupada para todos os clientes afetados
+        consulta = db.select(
+            Venda.cliente_id,
+            func.coalesce(func.sum(Venda.valor_restante), 0),
+            func.coalesce(func.sum(db.case(
+                (Venda.data_vencimento < data_limite, Venda.valor_restante),
+                else_=0
+            )), 0),
+            func.min(Venda.data_vencimento)
+        ).where(
+            Venda.a_receber()
+        ).group_by(Venda.cliente_id)
+        
+        if clientes_ids is not None:
+            clientes_ids = list(clientes_ids)
+            if not clientes_ids:
+                return {}
+            consulta = consulta.where(Venda.cliente_id.in_(clientes_ids))
+        else:
+            clientes_ids = connection.execute(db.select(Cliente.id)).scalars().all()
+        
+        saldos = {cliente_id: (Decimal('0'), Decimal('0'), None) for cliente_id in clientes_ids}
+        for cliente_id, aberto, vencido, mais_antiga in connection.execute(consulta):
+            saldos[cliente_id] = (Decimal(str(aberto)), Decimal(str(vencido)), mais_antiga)
+        
+        if not saldos:
+            return saldos
+        
+        tabela = Cliente.__table__
+        connection.execute(
+            tabela.update().where(
+                tabela.c.id == db.bindparam('b_id')
+            ).values(
+                saldo_aberto=db.bindparam('b_aberto'),
+                saldo_vencido=db.bindparam('b_vencido'),
+                data_vencimento_mais_antiga=db.bindparam('b_mais_antiga'),
+                data_calculo_saldo=hoje
+            ),
+            [
+                {'b_id': cliente_id, 'b_aberto': aberto, 'b_vencido': vencido, 'b_mais_antiga': mais_antiga}
+                for cliente_id, (aberto, vencido, mais_antiga) in saldos.items()
+            ]
+        )
+        
+        return saldos
     
     @staticmethod
     def clientes_acima_limite():
@@ -214,9 +432,15 @@ class Cliente(db.Model):
         # Esta query será implementada no service
         return Cliente.query.filter(Cliente.ativo == True)
     
+    def normalizar_documentos(self):
+        """Atualizar as colunas de dígitos a partir de cpf e telefone"""
+        self.cpf_digitos = somente_digitos(self.cpf)
+        self.telefone_digitos = somente_digitos(self.telefone)
+    
     def before_update(self):
         """Hook executado antes de atualizar"""
         self.data_atualizacao = datetime.utcnow()
+        self.normalizar_documentos()
     
     def validate(self):
         """Validar dados do cliente"""
@@ -240,9 +464,77 @@ class Cliente(db.Model):
 
 
 # Eventos SQLAlchemy
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+@event.listens_for(Cliente, 'before_insert')
+def cliente_before_insert(mapper, connection, target):
+    """Executado antes de inserir cliente"""
+    target.normalizar_documentos()
 
 @event.listens_for(Cliente, 'before_update')
 def cliente_before_update(mapper, connection, target):
     """Executado antes de atualizar cliente"""
-    target.before_update()
\ No newline at end of file
+    target.before_update()
+
+
+def _clientes_afetados(session):
+    """IDs dos clientes cujo saldo pode mudar com o flush atual"""
+    from app.models.venda import Venda
+    from app.models.pagamento import Pagamento
+    
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Venda):
+            ids.add(obj.cliente_id)
+            historico = inspect(obj).attrs.cliente_id.history
+            ids.update(historico.deleted or ())
+        elif isinstance(obj, Pagamento) and obj.venda is not None:
+            ids.add(obj.venda.cliente_id)
+    
+    ids.discard(None)
+    return ids
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_clientes_afetados(session, flush_context):
+    """Guardar os clientes a recalcular depois que o flush terminar"""
+    ids = _clientes_afetados(session)
+    if ids:
+        session.info.setdefault('clientes_saldo_pendente', set()).update(ids)
+
+
+def sincronizar_saldos(session, clientes_ids):
+    """
+    Recalcular o saldo dos clientes e refletir o resultado nas instâncias
+    já carregadas na sessão, sem marcá-las como alteradas
+    
+    Args:
+        session: Sessão SQLAlchemy em uso
+        clientes_ids: IDs dos clientes a recalcular
+        
+    Returns:
+        Dicionário retornado por Cliente.recalcular_saldos
+    """
+    saldos = Cliente.recalcular_saldos(clientes_ids, connection=session.connection())
+    
+    hoje = date.today()
+    for cliente_id, (aberto, vencido, mais_antiga) in saldos.items():
+        cliente = session.identity_map.get(inspect(Cliente).identity_key_from_primary_key((cliente_id,)))
+        if cliente is None:
+            continue
+        set_committed_value(cliente, 'saldo_aberto', aberto)
+        set_committed_value(cliente, 'saldo_vencido', vencido)
+        set_committed_value(cliente, 'data_vencimento_mais_antiga', mais_antiga)
+        set_committed_value(cliente, 'data_calculo_saldo', hoje)
+    
+    return saldos
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def atualizar_saldos_clientes(session, flush_context):
+    """Atualizar o saldo dos clientes afetados na mesma transação"""
+    ids = session.info.pop('clientes_saldo_pendente', None)
+    if ids:
+        sincronizar_saldos(session, ids)
@@ -0,0 +1,213 @@
+"""
+Modelos InadimplenciaCliente e InadimplenciaSnapshot - Situação de
+inadimplência consolidada por cliente
+"""
+
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from sqlalchemy import func
+from app import db
+from app.utils.constants import DIAS_INADIMPLENCIA
+
+
+class InadimplenciaCliente(db.Model):
+    """
+    Vendas vencidas de cada cliente na data de referência do último
+    processamento (só existem linhas para clientes com alguma venda vencida)
+    """
+    
+    __tablename__ = 'inadimplencia_clientes'
+    
+    cliente_id = db.Column(
+        db.Integer,
+        db.ForeignKey('clientes.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    
+    # Vendas em aberto com vencimento anterior à data de referência
+    vendas_vencidas = db.Column(db.Integer, nullable=False, default=0)
+    valor_vencido = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    # Vendas vencidas há mais de DIAS_INADIMPLENCIA dias
+    vendas_inadimplentes = db.Column(db.Integer, nullable=False, default=0)
+    valor_inadimplente = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    vencimento_mais_antigo = db.Column(db.Date, nullable=False)
+    dias_atraso = db.Column(db.Integer, nullable=False, default=0)
+    inadimplente = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    
+    # Controle (hora local, exibida nas telas)
+    data_referencia = db.Column(db.Date, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    
+    def __repr__(self):
+        return f'<InadimplenciaCliente {self.cliente_id} - {self.dias_atraso} dias - R$ {self.valor_vencido}>'
+    
+    def to_dict(self):
+        """Converter para dicionário"""
+        data = {}
+        
+        for coluna in self.__table__.columns:
+            valor = getattr(self, coluna.name)
+            if isinstance(valor, Decimal):
+                valor = float(valor)
+            elif isinstance(valor, (date, datetime)):
+                valor = valor.isoformat()
+            data[coluna.name] = valor
+        
+        return data
+    
+    @staticmethod
+    def ids_inadimplentes():
+        """Subconsulta com os IDs dos clientes inadimplentes (para IN)"""
+        return db.select(InadimplenciaCliente.cliente_id).where(
+            InadimplenciaCliente.inadimplente == True
+        )
+    
+    @staticmethod
+    def recalcular(clientes_ids=None, data_referencia=None, connection=None):
+        """
+        Reconstruir a situação de inadimplência a partir das vendas
+        
+        Sem clientes_ids a tabela inteira é refeita e o processamento fica
+        registrado em InadimplenciaSnapshot. Com clientes_ids só as linhas
+        desses clientes são refeitas, na data de referência do último
+        processamento completo, para que continuem comparáveis às demais.
+        
+        Args:
+            clientes_ids: IDs dos clientes a reconstruir (todos se None)
+            data_referencia: Data em que os atrasos são contados (padrão:
+                hoje no processamento completo, a do último processamento
+                no parcial)
+            connection: Conexão a usar (padrão: a da sessão atual)
+        
+        Returns:
+            Número de clientes com vendas vencidas gravados
+        """
+        from app.models.venda import Venda
+        
+        if connection is None:
+            connection = db.session.connection()
+        
+        if clientes_ids is not None:
+            clientes_ids = list(clientes_ids)
+            if not clientes_ids:
+                return 0
+        
+        if data_referencia is None:
+            if clientes_ids is not None:
+                data_referencia = InadimplenciaSnapshot.data_referencia_atual(connection)
+            data_referencia = data_referencia or date.today()
+        
+        data_limite = data_referencia - timedelta(days=DIAS_INADIMPLENCIA)
+        
+        # Uma única consulta agrupada por cliente sobre as vendas vencidas
+        consulta = db.select(
+            Venda.cliente_id,
+            func.count(Venda.id).label('vendas_vencidas'),
+            func.coalesce(func.sum(Venda.valor_restante), 0).label('valor_vencido'),
+            func.coalesce(func.sum(db.case((Venda.data_vencimento < data_limite, 1), else_=0)), 0).label('vendas_inadimplentes'),
+            func.coalesce(func.sum(db.case((Venda.data_vencimento < data_limite, Venda.valor_restante), else_=0)), 0).label('valor_inadimplente'),
+            func.min(Venda.data_vencimento).label('vencimento_mais_antigo')
+        ).where(
+            Venda.a_receber(),
+            Venda.data_vencimento < data_referencia
+        ).group_by(Venda.cliente_id)
+        
+        if clientes_ids is not None:
+            consulta = consulta.where(Venda.cliente_id.in_(clientes_ids))
+        
+        agora = datetime.now()
+        linhas = []
+        for linha in connection.execute(consulta).mappings():
+            linhas.append({
+                **linha,
+                'dias_atraso': (data_referencia - linha['vencimento_mais_antigo']).days,
+                'inadimplente': linha['vencimento_mais_antigo'] < data_limite,
+                'data_referencia': data_referencia,
+                'data_atualizacao': agora
+            })
+        
+        # Substituir as linhas (clientes sem vendas vencidas deixam de existir)
+        tabela = InadimplenciaCliente.__table__
+        exclusao = tabela.delete()
+        if clientes_ids is not None:
+            exclusao = exclusao.where(tabela.c.cliente_id.in_(clientes_ids))
+        connection.execute(exclusao)
+        if linhas:
+            connection.execute(tabela.insert(), linhas)
+        
+        if clientes_ids is None:
+            connection.execute(InadimplenciaSnapshot.__table__.insert().values(
+                data_referencia=data_referencia,
+                gerado_em=agora,
+                clientes_vencidos=len(linhas),
+                clientes_inadimplentes=sum(1 for l in linhas if l['inadimplente']),
+                valor_vencido=sum((Decimal(str(l['valor_vencido'])) for l in linhas), Decimal('0')),
+                valor_inadimplente=sum((Decimal(str(l['valor_inadimplente'])) for l in linhas), Decimal('0'))
+            ))
+        
+        return len(linhas)
+
+
+class InadimplenciaSnapshot(db.Model):
+    """Registro de cada processamento completo da inadimplência"""
+    
+    __tablename__ = 'inadimplencia_snapshot'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    data_referencia = db.Column(db.Date, nullable=False)
+    gerado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    
+    # Totais no momento do processamento (pagamentos posteriores atualizam
+    # só as linhas dos clientes)
+    clientes_vencidos = db.Column(db.Integer, nullable=False, default=0)
+    clientes_inadimplentes = db.Column(db.Integer, nullable=False, default=0)
+    valor_vencido = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    valor_inadimplente = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<InadimplenciaSnapshot {self.data_referencia} - {self.clientes_inadimplentes} inadimplentes>'
+    
+    @property
+    def desatualizado(self):
+        """Verifica se o processamento é de um dia anterior a hoje"""
+        return self.data_referencia < date.today()
+    
+    @staticmethod
+    def ultimo():
+        """Último processamento completo (None se nunca processado)"""
+        return InadimplenciaSnapshot.query.order_by(InadimplenciaSnapshot.id.desc()).first()
+    
+    @staticmethod
+    def data_referencia_atual(connection=None):
+        """Data de referência do último processamento completo (ou None)"""
+        if connection is None:
+            connection = db.session.connection()
+        
+        tabela = InadimplenciaSnapshot.__table__
+        return connection.execute(
+            db.select(tabela.c.data_referencia).order_by(tabela.c.id.desc()).limit(1)
+        ).scalar()
+
+
+# Eventos SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.cliente import _clientes_afetados
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_inadimplencia_pendente(session, flush_context):
+    """Guardar os clientes a reprocessar depois que o flush terminar"""
+    ids = _clientes_afetados(session)
+    if ids:
+        session.info.setdefault('inadimplencia_pendente', set()).update(ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def atualizar_inadimplencia_clientes(session, flush_context):
+    """Reprocessar a inadimplência dos clientes afetados na mesma transação"""
+    ids = session.info.pop('inadimplencia_pendente', None)
+    if ids:
+        InadimplenciaCliente.recalcular(clientes_ids=ids, connection=session.connection())
@@ -6,6 +6,7 @@ from datetime import datetime, date
 from decimal import Decimal
 from app import db
 from app.utils.constants import VALOR_MINIMO_VENDA
+from app.utils.money import Money, ZERO
 
 
 class ItemVenda(db.Model):
@@ -48,9 +49,6 @@ class ItemVenda(db.Model):
         default=datetime.utcnow
     )
     
-    # Relacionamentos
-    venda = db.relationship('Venda', back_populates='itens')
-    
     def __repr__(self):
         return f'<ItemVenda {self.descricao} - Qtd: {self.quantidade} - Valor: R$ {self.valor_unitario}>'
     
@@ -91,7 +89,8 @@ class ItemVenda(db.Model):
     def calcular_subtotal(self):
         """Calcular e atualizar subtotal do item"""
         if self.quantidade and self.valor_unitario:
-            self.subtotal = self.quantidade * self.valor_unitario
+            # Arredondado ao centavo, como fica gravado em Numeric(10, 2)
+            self.subtotal = (Money.de(self.valor_unitario) * self.quantidade).decimal
         else:
             self.subtotal = Decimal('0.00')
         
@@ -144,8 +143,8 @@ class ItemVenda(db.Model):
             erros.append("Valor unitário muito alto (máximo R$ 99.999,99)")
         
         # Validar subtotal calculado
-        subtotal_calculado = self.quantidade * self.valor_unitario if self.quantidade and self.valor_unitario else 0
-        if abs(float(self.subtotal) - float(subtotal_calculado)) > 0.01:
+        subtotal_calculado = Money.de(self.valor_unitario) * self.quantidade if self.quantidade and self.valor_unitario else ZERO
+        if abs(Money.de(self.subtotal) - subtotal_calculado).centavos > 1:
             erros.append("Subtotal incorreto")
         
         return erros
@@ -327,17 +326,16 @@ def calcular_total_itens(itens: list) -> Decimal:
     Returns:
         Total calculado
     """
-    total = Decimal('0.00')
+    total = ZERO
     
     for item in itens:
         if isinstance(item, ItemVenda):
-            total += item.subtotal
+            total += Money.de(item.subtotal)
         elif isinstance(item, dict):
             quantidade = Decimal(str(item.get('quantidade', 0)))
-            valor_unitario = Decimal(str(item.get('valor_unitario', 0)))
-            total += quantidade * valor_unitario
+            total += Money.de(item.get('valor_unitario', 0)) * quantidade
     
-    return total
+    return total.decimal
 
 
 def validar_lista_itens(itens: list) -> tuple:
@@ -351,7 +349,7 @@ def validar_lista_itens(itens: list) -> tuple:
         Tuple[valido, erros, total]
     """
     erros = []
-    total = Decimal('0.00')
+    total = ZERO
     
     if not itens:
         erros.append("Lista de itens está vazia")
@@ -375,7 +373,7 @@ def validar_lista_itens(itens: list) -> tuple:
                     erros.append(f"Item {i+1}: Valor unitário deve ser maior que zero")
                 
                 if not erros:
-                    total += Decimal(str(quantidade)) * Decimal(str(valor_unitario))
+                    total += Money.de(valor_unitario) * Decimal(str(quantidade))
                     
             elif isinstance(item, ItemVenda):
                 # Validar ItemVenda
@@ -383,7 +381,7 @@ def validar_lista_itens(itens: list) -> tuple:
                 if item_erros:
                     erros.extend([f"Item {i+1}: {erro}" for erro in item_erros])
                 else:
-                    total += item.subtotal
+                    total += Money.de(item.subtotal)
             else:
                 erros.append(f"Item {i+1}: Tipo inválido")
                 
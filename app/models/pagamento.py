@@ -6,12 +6,17 @@ from datetime import datetime, date
 from decimal import Decimal
 from app import db
 from app.utils.constants import FORMAS_PAGAMENTO
+from app.utils.money import Money, ZERO
 
 
 class Pagamento(db.Model):
     """Modelo para pagamentos de vendas individuais"""
     
     __tablename__ = 'pagamentos'
+    __table_args__ = (
+        # Ordem do histórico de pagamentos (paginação por cursor)
+        db.Index('idx_pagamentos_data_criacao', 'data_pagamento', 'data_criacao'),
+    )
     
     # Campos principais
     id = db.Column(db.Integer, primary_key=True)
@@ -97,8 +102,8 @@ class Pagamento(db.Model):
     def calcular_troco(self):
         """Calcular troco para pagamentos em dinheiro"""
         if self.eh_dinheiro and self.valor_recebido:
-            troco = Decimal(str(self.valor_recebido)) - Decimal(str(self.valor))
-            self.troco = max(troco, Decimal('0.00'))
+            troco = Money.de(self.valor_recebido) - Money.de(self.valor)
+            self.troco = max(troco, ZERO).decimal
         else:
             self.troco = Decimal('0.00')
         
@@ -129,31 +134,16 @@ class Pagamento(db.Model):
         
         return dados
     
-    def to_dict(self):
-        """Converter para dicionário"""
-        data = {
-            'id': self.id,
-            'venda_id': self.venda_id,
-            'valor': float(self.valor),
-            'valor_formatado': self.valor_formatado,
-            'forma_pagamento': self.forma_pagamento,
-            'forma_pagamento_display': self.forma_pagamento_display,
-            'data_pagamento': self.data_pagamento.isoformat() if self.data_pagamento else None,
-            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
-            'observacoes': self.observacoes,
-            'eh_dinheiro': self.eh_dinheiro
-        }
+    def to_dict(self, fields=None):
+        """
+        Converter para dicionário
         
-        # Adicionar campos específicos do dinheiro
-        if self.eh_dinheiro:
-            data.update({
-                'valor_recebido': float(self.valor_recebido) if self.valor_recebido else None,
-                'troco': float(self.troco) if self.troco else None,
-                'valor_recebido_formatado': self.valor_recebido_formatado,
-                'troco_formatado': self.troco_formatado
-            })
-        
-        return data
+        Args:
+            fields: Campos desejados (padrão: todos; os de dinheiro só em
+                pagamentos em dinheiro)
+        """
+        from app.models.serializadores import serializador_pagamento
+        return serializador_pagamento.serializar(self, fields)
     
     @staticmethod
     def buscar_por_periodo(data_inicio, data_fim, forma_pagamento=None):
@@ -230,9 +220,3 @@ def pagamento_before_insert(mapper, connection, target):
 def pagamento_before_update(mapper, connection, target):
     """Executado antes de atualizar pagamento"""
     target.before_update()
-
-@event.listens_for(Pagamento, 'after_insert')
-def pagamento_after_insert(mapper, connection, target):
-    """Executado após inserir pagamento - atualizar status da venda"""
-    if target.venda:
-        target.venda.atualizar_status()
\ No newline at end of file
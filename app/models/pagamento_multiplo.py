@@ -6,6 +6,7 @@ from datetime import datetime, date
 from decimal import Decimal
 from app import db
 from app.utils.constants import FORMAS_PAGAMENTO, STATUS_VENDA
+from app.utils.money import Money, ZERO
 
 
 class PagamentoMultiplo(db.Model):
@@ -114,8 +115,8 @@ class PagamentoMultiplo(db.Model):
     def calcular_troco(self):
         """Calcular troco para pagamentos em dinheiro"""
         if self.eh_dinheiro and self.valor_recebido:
-            troco = Decimal(str(self.valor_recebido)) - Decimal(str(self.valor_pago))
-            self.troco = max(troco, Decimal('0.00'))
+            troco = Money.de(self.valor_recebido) - Money.de(self.valor_pago)
+            self.troco = max(troco, ZERO).decimal
         else:
             self.troco = Decimal('0.00')
         
@@ -123,10 +124,7 @@ class PagamentoMultiplo(db.Model):
     
     def calcular_valores(self):
         """Calcular valor restante baseado no total e valor pago"""
-        self.valor_restante = self.valor_total_notas - self.valor_pago
-        
-        if self.valor_restante < 0:
-            self.valor_restante = Decimal('0.00')
+        self.valor_restante = max(Money.de(self.valor_total_notas) - Money.de(self.valor_pago), ZERO).decimal
     
     def adicionar_venda(self, venda, valor_pago_venda=None):
         """Adicionar venda ao pagamento múltiplo"""
@@ -136,60 +134,17 @@ class PagamentoMultiplo(db.Model):
         detalhe = PagamentoMultiploDetalhe(
             venda_id=venda.id,
             valor_original=venda.total,
-            valor_pago=Decimal(str(valor_pago_venda))
+            valor_pago=Money.de(valor_pago_venda).decimal
         )
         
         self.detalhes.append(detalhe)
         return detalhe
     
     def processar_pagamento(self):
-        """Processar o pagamento múltiplo"""
-        from app.models.venda import Venda
-        from app.models.item_venda import ItemVenda
-        
-        # Processar cada venda
-        for detalhe in self.detalhes:
-            venda = detalhe.venda
-            if not venda:
-                continue
-            
-            # Criar pagamento individual para a venda
-            pagamento = venda.registrar_pagamento(
-                valor=detalhe.valor_pago,
-                forma_pagamento=self.forma_pagamento,
-                valor_recebido=None,  # Não se aplica em pagamento múltiplo
-                observacoes=f"Pagamento múltiplo #{self.id}"
-            )
-        
-        # Criar nota de restante se necessário
-        if self.tem_restante:
-            venda_restante = Venda(
-                cliente_id=self.cliente_id,
-                data_venda=self.data_pagamento,
-                eh_restante=True,
-                pagamento_multiplo_id=self.id,
-                observacoes=f"Restante do pagamento múltiplo #{self.id}"
-            )
-            
-            # Gerar data de vencimento
-            venda_restante.gerar_data_vencimento()
-            
-            # Adicionar item de restante
-            item_restante = ItemVenda.criar_item_restante(
-                valor_restante=self.valor_restante,
-                notas_ids=self.notas_ids,
-                data_pagamento=self.data_pagamento
-            )
-            
-            venda_restante.itens.append(item_restante)
-            venda_restante.calcular_totais()
-            
-            # Salvar venda de restante
-            db.session.add(venda_restante)
-            
-            return venda_restante
+        """Processar o pagamento múltiplo (pagamentos, status das notas e nota de restante)"""
+        from app.services import pagamento_service
         
-        return None
+        return pagamento_service.aplicar_pagamento_multiplo(self)
     
     def gerar_comprovante_dados(self):
         """Gerar dados para impressão do comprovante"""
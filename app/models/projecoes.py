@@ -0,0 +1,201 @@
+"""
+Projeções de leitura para listagens
+
+Linhas compactas (com __slots__) montadas a partir de consultas só de
+colunas, com o cliente já juntado e os valores consolidados da venda.
+As regras de exibição (vencida, dias de atraso, cor do status,
+inadimplência) são as mesmas propriedades dos modelos, reaproveitadas.
+"""
+
+from app import db
+from app.models.cliente import Cliente
+from app.models.venda import Venda
+from app.models.pagamento_multiplo import PagamentoMultiplo, PagamentoMultiploDetalhe
+
+
+class ClienteResumo:
+    """Cliente de uma linha de venda: só o que a listagem exibe"""
+
+    __slots__ = ('id', 'nome', 'telefone', 'ativo', 'data_vencimento_mais_antiga')
+
+    esta_inadimplente = property(Cliente.esta_inadimplente.fget)
+
+    def __init__(self, id, nome, telefone, ativo, data_vencimento_mais_antiga):
+        self.id = id
+        self.nome = nome
+        self.telefone = telefone
+        self.ativo = ativo
+        self.data_vencimento_mais_antiga = data_vencimento_mais_antiga
+
+
+class LinhaVenda:
+    """Venda da listagem, com o cliente e os valores pagos já consolidados"""
+
+    __slots__ = (
+        'id', 'cliente_id', 'data_venda', 'data_vencimento', 'data_pagamento', 'data_criacao',
+        'subtotal', 'total', 'valor_pago', 'valor_restante', 'status', 'eh_restante',
+        'pagamento_multiplo_id', 'observacoes', 'cliente'
+    )
+
+    esta_paga = property(Venda.esta_paga.fget)
+    esta_vencida = property(Venda.esta_vencida.fget)
+    dias_atraso = property(Venda.dias_atraso.fget)
+    status_display = property(Venda.status_display.fget)
+    status_color = property(Venda.status_color.fget)
+
+    @staticmethod
+    def colunas():
+        """Colunas lidas por linha (vendas juntadas com clientes)"""
+        return (
+            Venda.id, Venda.cliente_id, Venda.data_venda, Venda.data_vencimento,
+            Venda.data_pagamento, Venda.data_criacao, Venda.subtotal, Venda.total,
+            Venda.valor_pago, Venda.valor_restante, Venda.status, Venda.eh_restante,
+            Venda.pagamento_multiplo_id, Venda.observacoes,
+            Cliente.nome.label('cliente_nome'), Cliente.telefone.label('cliente_telefone'),
+            Cliente.ativo.label('cliente_ativo'),
+            Cliente.data_vencimento_mais_antiga.label('cliente_vencimento_mais_antigo')
+        )
+
+    @classmethod
+    def consulta(cls, query=None):
+        """
+        Query de colunas das vendas, juntadas com os clientes
+
+        Args:
+            query: Query de Venda já filtrada, sem join com clientes
+                (padrão: todas as vendas)
+
+        Returns:
+            Query que devolve as colunas de colunas(); montar com da_linha
+        """
+        query = query if query is not None else Venda.query
+        return query.join(Cliente, Cliente.id == Venda.cliente_id).with_entities(*cls.colunas())
+
+    @classmethod
+    def da_linha(cls, linha) -> 'LinhaVenda':
+        """Montar a linha a partir de um resultado de consulta()"""
+        venda = cls.__new__(cls)
+        venda.id = linha.id
+        venda.cliente_id = linha.cliente_id
+        venda.data_venda = linha.data_venda
+        venda.data_vencimento = linha.data_vencimento
+        venda.data_pagamento = linha.data_pagamento
+        venda.data_criacao = linha.data_criacao
+        venda.subtotal = linha.subtotal
+        venda.total = linha.total
+        venda.valor_pago = linha.valor_pago
+        venda.valor_restante = linha.valor_restante
+        venda.status = linha.status
+        venda.eh_restante = linha.eh_restante
+        venda.pagamento_multiplo_id = linha.pagamento_multiplo_id
+        venda.observacoes = linha.observacoes
+        venda.cliente = ClienteResumo(
+            linha.cliente_id, linha.cliente_nome, linha.cliente_telefone,
+            linha.cliente_ativo, linha.cliente_vencimento_mais_antigo
+        )
+        return venda
+
+    def to_dict(self, descricao_restante=None):
+        """Converter para dicionário (mesmo formato de Venda.to_dict sem itens)"""
+        data = {
+            'id': self.id,
+            'cliente_id': self.cliente_id,
+            'cliente_nome': self.cliente.nome,
+            'data_venda': self.data_venda.isoformat() if self.data_venda else None,
+            'data_vencimento': self.data_vencimento.isoformat() if self.data_vencimento else None,
+            'data_pagamento': self.data_pagamento.isoformat() if self.data_pagamento else None,
+            'subtotal': float(self.subtotal),
+            'total': float(self.total),
+            'valor_pago': float(self.valor_pago),
+            'valor_restante': float(self.valor_restante),
+            'status': self.status,
+            'status_display': self.status_display,
+            'status_color': self.status_color,
+            'esta_paga': self.esta_paga,
+            'esta_vencida': self.esta_vencida,
+            'dias_atraso': self.dias_atraso,
+            'eh_restante': self.eh_restante,
+            'observacoes': self.observacoes
+        }
+
+        if self.eh_restante:
+            data['descricao_restante'] = descricao_restante
+
+        return data
+
+    @staticmethod
+    def descricoes_restante(linhas):
+        """
+        Descrição das notas de restante de várias linhas (duas consultas)
+
+        Returns:
+            Dicionário {venda_id: descrição} no formato de Venda.descricao_restante
+        """
+        origens = {linha.id: linha.pagamento_multiplo_id for linha in linhas
+                   if linha.eh_restante and linha.pagamento_multiplo_id}
+        if not origens:
+            return {}
+
+        ids = set(origens.values())
+        pagamentos = {
+            p.id: p for p in db.session.execute(
+                db.select(PagamentoMultiplo.id, PagamentoMultiplo.data_pagamento,
+                          PagamentoMultiplo.valor_total_notas, PagamentoMultiplo.valor_pago)
+                .where(PagamentoMultiplo.id.in_(ids))
+            )
+        }
+        notas = {}
+        for pagamento_id, venda_id in db.session.execute(
+            db.select(PagamentoMultiploDetalhe.pagamento_multiplo_id, PagamentoMultiploDetalhe.venda_id)
+            .where(PagamentoMultiploDetalhe.pagamento_multiplo_id.in_(ids))
+            .order_by(PagamentoMultiploDetalhe.id)
+        ):
+            notas.setdefault(pagamento_id, []).append(str(venda_id))
+
+        descricoes = {}
+        for venda_id, pagamento_id in origens.items():
+            pagamento = pagamentos.get(pagamento_id)
+            if pagamento is not None:
+                descricoes[venda_id] = {
+                    'notas_ids': notas.get(pagamento_id, []),
+                    'data_pagamento': pagamento.data_pagamento,
+                    'valor_total_notas': pagamento.valor_total_notas,
+                    'valor_pago': pagamento.valor_pago
+                }
+        return descricoes
+
+
+class LinhaCliente:
+    """Cliente da listagem, com o saldo consolidado"""
+
+    __slots__ = (
+        'id', 'nome', 'cpf', 'telefone', 'endereco', 'ativo',
+        'limite_credito', 'saldo_aberto', 'data_vencimento_mais_antiga'
+    )
+
+    valor_total_em_aberto = property(Cliente.valor_total_em_aberto.fget)
+    esta_inadimplente = property(Cliente.esta_inadimplente.fget)
+
+    @staticmethod
+    def colunas():
+        """Colunas lidas por linha"""
+        return (
+            Cliente.id, Cliente.nome, Cliente.cpf, Cliente.telefone, Cliente.endereco,
+            Cliente.ativo, Cliente.limite_credito, Cliente.saldo_aberto,
+            Cliente.data_vencimento_mais_antiga
+        )
+
+    @classmethod
+    def consulta(cls, query=None):
+        """Query de colunas dos clientes (a partir de uma query de Cliente já filtrada)"""
+        query = query if query is not None else Cliente.query
+        return query.with_entities(*cls.colunas())
+
+    @classmethod
+    def da_linha(cls, linha) -> 'LinhaCliente':
+        """Montar a linha a partir de um resultado de consulta()"""
+        cliente = cls.__new__(cls)
+        for campo in cls.__slots__:
+            setattr(cliente, campo, getattr(linha, campo))
+        return cliente
+
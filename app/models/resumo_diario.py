@@ -0,0 +1,398 @@
+"""
+Modelo ResumoDiario - Totais diários de vendas e recebimentos
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func
+from app import db
+from app.utils.constants import STATUS_VENDA, FORMAS_PAGAMENTO
+
+
+class ResumoDiario(db.Model):
+    """Totais consolidados por dia (vendas por status e pagamentos por forma)"""
+    
+    __tablename__ = 'resumo_diario'
+    
+    data = db.Column(db.Date, primary_key=True)
+    
+    # Vendas realizadas no dia, pelo status atual de cada venda
+    vendas_qtd = db.Column(db.Integer, nullable=False, default=0)
+    vendas_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    vendas_abertas_qtd = db.Column(db.Integer, nullable=False, default=0)
+    vendas_abertas_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    vendas_pagas_qtd = db.Column(db.Integer, nullable=False, default=0)
+    vendas_pagas_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    vendas_vencidas_qtd = db.Column(db.Integer, nullable=False, default=0)
+    vendas_vencidas_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    # Pagamentos recebidos no dia, por forma de pagamento
+    pagamentos_qtd = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    pagamentos_dinheiro_qtd = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_dinheiro_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    pagamentos_cartao_qtd = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_cartao_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    pagamentos_pix_qtd = db.Column(db.Integer, nullable=False, default=0)
+    pagamentos_pix_valor = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    # Controle
+    data_atualizacao = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+    
+    # Colunas por status/forma (sufixo usado nos nomes acima)
+    SUFIXOS_STATUS = {
+        STATUS_VENDA['ABERTA']: 'abertas',
+        STATUS_VENDA['PAGA']: 'pagas',
+        STATUS_VENDA['VENCIDA']: 'vencidas'
+    }
+    SUFIXOS_FORMA = {
+        FORMAS_PAGAMENTO['DINHEIRO']: 'dinheiro',
+        FORMAS_PAGAMENTO['CARTAO']: 'cartao',
+        FORMAS_PAGAMENTO['PIX']: 'pix'
+    }
+    
+    def __repr__(self):
+        return f'<ResumoDiario {self.data} - Vendas R$ {self.vendas_valor} - Recebido R$ {self.pagamentos_valor}>'
+    
+    def to_dict(self):
+        """Converter para dicionário"""
+        data = {'data': self.data.isoformat()}
+        
+        for coluna in self.__table__.columns:
+            if coluna.name in ('data', 'data_atualizacao'):
+                continue
+            valor = getattr(self, coluna.name)
+            data[coluna.name] = float(valor) if isinstance(valor, Decimal) else valor
+        
+        return data
+    
+    @staticmethod
+    def buscar_periodo(data_inicio, data_fim):
+        """Resumos de um período, em ordem de data"""
+        return ResumoDiario.query.filter(
+            ResumoDiario.data >= data_inicio,
+            ResumoDiario.data <= data_fim
+        ).order_by(ResumoDiario.data)
+    
+    @staticmethod
+    def totais_periodo(data_inicio, data_fim):
+        """
+        Somar os resumos de um período
+        
+        Returns:
+            Dicionário {coluna: total} com todas as colunas de contagem e valor
+        """
+        colunas = [
+            c for c in ResumoDiario.__table__.columns
+            if c.name not in ('data', 'data_atualizacao')
+        ]
+        
+        linha = db.session.query(
+            *[func.coalesce(func.sum(c), 0).label(c.name) for c in colunas]
+        ).filter(
+            ResumoDiario.data >= data_inicio,
+            ResumoDiario.data <= data_fim
+        ).one()
+        
+        return dict(linha._mapping)
+    
+    @staticmethod
+    def somar_variacoes(variacoes, connection=None):
+        """
+        Somar variações aos resumos dos dias, sem reler vendas e pagamentos
+        
+        Cada dia é gravado por um INSERT ... ON DUPLICATE KEY UPDATE (ON
+        CONFLICT no SQLite) que soma a variação ao valor já gravado, então
+        transações concorrentes no mesmo dia se acumulam em vez de uma
+        sobrescrever o resumo da outra.
+        
+        Args:
+            variacoes: Dicionário {data: {coluna: variação}}, como montado por
+                variacao_venda e variacao_pagamento
+            connection: Conexão a usar (padrão: a da sessão atual)
+        
+        Returns:
+            Número de dias alterados
+        """
+        variacoes = {
+            dia: valores for dia, valores in variacoes.items()
+            if dia is not None and any(valores.values())
+        }
+        if not variacoes:
+            return 0
+        
+        if connection is None:
+            connection = db.session.connection()
+        
+        agora = datetime.utcnow()
+        linhas = []
+        for dia, valores in variacoes.items():
+            linha = ResumoDiario._linha_vazia(dia, agora)
+            linha.update(valores)
+            linhas.append(linha)
+        
+        tabela = ResumoDiario.__table__
+        colunas = [nome for nome in linhas[0] if nome not in ('data', 'data_atualizacao')]
+        dialeto = connection.dialect.name
+        
+        if dialeto == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(tabela)
+            stmt = stmt.on_duplicate_key_update(
+                data_atualizacao=stmt.inserted.data_atualizacao,
+                **{nome: tabela.c[nome] + stmt.inserted[nome] for nome in colunas}
+            )
+            connection.execute(stmt, linhas)
+        elif dialeto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(tabela)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabela.c.data],
+                set_={
+                    'data_atualizacao': stmt.excluded.data_atualizacao,
+                    **{nome: tabela.c[nome] + stmt.excluded[nome] for nome in colunas}
+                }
+            )
+            connection.execute(stmt, linhas)
+        else:
+            # Outros bancos: somar no dia existente, inserir os dias novos
+            for linha in linhas:
+                alterados = connection.execute(
+                    tabela.update().where(tabela.c.data == linha['data']).values(
+                        data_atualizacao=agora,
+                        **{nome: tabela.c[nome] + linha[nome] for nome in colunas}
+                    )
+                ).rowcount
+                if not alterados:
+                    connection.execute(tabela.insert(), linha)
+        
+        return len(linhas)
+    
+    @staticmethod
+    def variacao_venda(variacoes, dia, status, total, sinal=1):
+        """
+        Acumular em variacoes a contribuição de uma venda
+        
+        Args:
+            variacoes: Dicionário {data: {coluna: variação}} a atualizar
+            dia: Data da venda
+            status: Status da venda
+            total: Total da venda
+            sinal: 1 para somar a venda, -1 para retirá-la
+        """
+        if dia is None:
+            return
+        
+        linha = variacoes.setdefault(dia, {})
+        valor = Decimal(str(total or 0)) * sinal
+        colunas = [('vendas_qtd', sinal), ('vendas_valor', valor)]
+        sufixo = ResumoDiario.SUFIXOS_STATUS.get(status)
+        if sufixo:
+            colunas += [(f'vendas_{sufixo}_qtd', sinal), (f'vendas_{sufixo}_valor', valor)]
+        for coluna, variacao in colunas:
+            linha[coluna] = linha.get(coluna, 0) + variacao
+    
+    @staticmethod
+    def variacao_pagamento(variacoes, dia, forma_pagamento, valor, sinal=1):
+        """
+        Acumular em variacoes a contribuição de um pagamento
+        
+        Args:
+            variacoes: Dicionário {data: {coluna: variação}} a atualizar
+            dia: Data do pagamento
+            forma_pagamento: Forma de pagamento
+            valor: Valor pago
+            sinal: 1 para somar o pagamento, -1 para retirá-lo
+        """
+        if dia is None:
+            return
+        
+        linha = variacoes.setdefault(dia, {})
+        valor = Decimal(str(valor or 0)) * sinal
+        colunas = [('pagamentos_qtd', sinal), ('pagamentos_valor', valor)]
+        sufixo = ResumoDiario.SUFIXOS_FORMA.get(forma_pagamento)
+        if sufixo:
+            colunas += [(f'pagamentos_{sufixo}_qtd', sinal), (f'pagamentos_{sufixo}_valor', valor)]
+        for coluna, variacao in colunas:
+            linha[coluna] = linha.get(coluna, 0) + variacao
+    
+    @staticmethod
+    def recalcular(datas=None, data_inicio=None, data_fim=None, connection=None):
+        """
+        Reconstruir os resumos a partir de vendas e pagamentos (reparo: as
+        gravações do dia a dia aplicam variações com somar_variacoes)
+        
+        Args:
+            datas: Conjunto de datas específicas a reconstruir
+            data_inicio: Início do período a reconstruir (se datas não informado)
+            data_fim: Fim do período a reconstruir (se datas não informado)
+            connection: Conexão a usar (padrão: a da sessão atual)
+        
+        Returns:
+            Número de dias com movimento gravados
+        """
+        from app.models.venda import Venda
+        from app.models.pagamento import Pagamento
+        
+        if connection is None:
+            connection = db.session.connection()
+        
+        def filtro(coluna):
+            condicoes = []
+            if datas is not None:
+                condicoes.append(coluna.in_(list(datas)))
+            else:
+                if data_inicio:
+                    condicoes.append(coluna >= data_inicio)
+                if data_fim:
+                    condicoes.append(coluna <= data_fim)
+            return condicoes
+        
+        if datas is not None and not datas:
+            return 0
+        
+        def contar(condicao):
+            return func.coalesce(func.sum(db.case((condicao, 1), else_=0)), 0)
+        
+        def somar(condicao, coluna):
+            return func.coalesce(func.sum(db.case((condicao, coluna), else_=0)), 0)
+        
+        # Uma consulta agrupada por dia para vendas e outra para pagamentos
+        colunas_vendas = [
+            Venda.data_venda.label('data'),
+            func.count(Venda.id).label('vendas_qtd'),
+            func.coalesce(func.sum(Venda.total), 0).label('vendas_valor')
+        ]
+        for status, sufixo in ResumoDiario.SUFIXOS_STATUS.items():
+            colunas_vendas.append(contar(Venda.status == status).label(f'vendas_{sufixo}_qtd'))
+            colunas_vendas.append(somar(Venda.status == status, Venda.total).label(f'vendas_{sufixo}_valor'))
+        
+        colunas_pagamentos = [
+            Pagamento.data_pagamento.label('data'),
+            func.count(Pagamento.id).label('pagamentos_qtd'),
+            func.coalesce(func.sum(Pagamento.valor), 0).label('pagamentos_valor')
+        ]
+        for forma, sufixo in ResumoDiario.SUFIXOS_FORMA.items():
+            colunas_pagamentos.append(contar(Pagamento.forma_pagamento == forma).label(f'pagamentos_{sufixo}_qtd'))
+            colunas_pagamentos.append(somar(Pagamento.forma_pagamento == forma, Pagamento.valor).label(f'pagamentos_{sufixo}_valor'))
+        
+        resumos = {}
+        agora = datetime.utcnow()
+        
+        consultas = (
+            db.select(*colunas_vendas).where(*filtro(Venda.data_venda)).group_by(Venda.data_venda),
+            db.select(*colunas_pagamentos).where(*filtro(Pagamento.data_pagamento)).group_by(Pagamento.data_pagamento)
+        )
+        for consulta in consultas:
+            for linha in connection.execute(consulta).mappings():
+                resumo = resumos.setdefault(linha['data'], ResumoDiario._linha_vazia(linha['data'], agora))
+                resumo.update({k: v for k, v in linha.items() if k != 'data'})
+        
+        # Substituir os dias do período (dias sem movimento deixam de existir)
+        tabela = ResumoDiario.__table__
+        connection.execute(tabela.delete().where(*filtro(tabela.c.data)))
+        if resumos:
+            connection.execute(tabela.insert(), list(resumos.values()))
+        
+        return len(resumos)
+    
+    @staticmethod
+    def _linha_vazia(dia, agora):
+        """Linha zerada para um dia"""
+        linha = {
+            c.name: 0 for c in ResumoDiario.__table__.columns
+            if c.name not in ('data', 'data_atualizacao')
+        }
+        linha['data'] = dia
+        linha['data_atualizacao'] = agora
+        return linha
+
+
+# Eventos SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.venda import Venda
+from app.models.pagamento import Pagamento
+
+# Campos que definem a contribuição de cada registro para o resumo
+CAMPOS_RESUMO = {
+    Venda: ('data_venda', 'status', 'total'),
+    Pagamento: ('data_pagamento', 'forma_pagamento', 'valor')
+}
+
+
+def _manter_valor_anterior(target, value, oldvalue, initiator):
+    """Sem efeito: registrado só para carregar o valor anterior (active_history)"""
+
+
+# O valor anterior entra no histórico mesmo que o atributo esteja expirado,
+# para que a alteração possa ser retirada do resumo
+for _modelo, _campos in CAMPOS_RESUMO.items():
+    for _campo in _campos:
+        event.listen(getattr(_modelo, _campo), 'set', _manter_valor_anterior, active_history=True)
+
+
+def _valores_resumo(obj, anteriores=False):
+    """Valores dos campos do resumo de um registro (os de antes do flush se anteriores)"""
+    estado = inspect(obj)
+    valores = []
+    for campo in CAMPOS_RESUMO[type(obj)]:
+        historico = estado.attrs[campo].history
+        if anteriores and historico.deleted:
+            valores.append(historico.deleted[0])
+        else:
+            valores.append(getattr(obj, campo))
+    return valores
+
+
+def _variacoes_flush(session):
+    """Variações dos resumos diários causadas pelo flush atual"""
+    variacoes = {}
+    
+    def aplicar(obj, sinal, anteriores=False):
+        variacao = ResumoDiario.variacao_venda if isinstance(obj, Venda) else ResumoDiario.variacao_pagamento
+        variacao(variacoes, *_valores_resumo(obj, anteriores), sinal=sinal)
+    
+    for obj in session.new:
+        if type(obj) in CAMPOS_RESUMO:
+            aplicar(obj, 1)
+    
+    for obj in session.deleted:
+        if type(obj) in CAMPOS_RESUMO:
+            aplicar(obj, -1, anteriores=True)
+    
+    for obj in session.dirty:
+        if type(obj) not in CAMPOS_RESUMO:
+            continue
+        estado = inspect(obj)
+        if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RESUMO[type(obj)]):
+            aplicar(obj, -1, anteriores=True)
+            aplicar(obj, 1)
+    
+    return variacoes
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_variacoes_resumo(session, flush_context):
+    """Guardar as variações a somar depois que o flush terminar"""
+    variacoes = _variacoes_flush(session)
+    if not variacoes:
+        return
+    
+    pendentes = session.info.setdefault('resumo_variacoes_pendentes', {})
+    for dia, valores in variacoes.items():
+        linha = pendentes.setdefault(dia, {})
+        for coluna, variacao in valores.items():
+            linha[coluna] = linha.get(coluna, 0) + variacao
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def atualizar_resumo_diario(session, flush_context):
+    """Somar as variações aos resumos dos dias na mesma transação"""
+    variacoes = session.info.pop('resumo_variacoes_pendentes', None)
+    if variacoes:
+        ResumoDiario.somar_variacoes(variacoes, connection=session.connection())
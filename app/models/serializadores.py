@@ -0,0 +1,242 @@
+"""
+Serializadores de Cliente, Venda e Pagamento
+
+Usados pelos to_dict() dos modelos e pelas APIs com ?fields=. Os campos
+derivados que dependem de outras tabelas (itens, pagamentos, contagens de
+vendas, notas de restante) são carregados em lote para a lista inteira.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app import db
+from app.models.cliente import Cliente
+from app.models.venda import Venda
+from app.models.item_venda import ItemVenda
+from app.models.pagamento import Pagamento
+from app.utils.constants import DIAS_INADIMPLENCIA, STATUS_VENDA
+from app.utils.serializacao import Campo, OMITIR, Serializador
+
+
+def _data_iso(valor):
+    return valor.isoformat() if valor else None
+
+
+def _carregado(obj, atributo):
+    """Relacionamento já carregado no objeto (sem disparar lazy load)"""
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__.get(atributo)
+    return getattr(obj, atributo, None)
+
+
+# Pagamento
+
+serializador_pagamento = Serializador({
+    'id': lambda p: p.id,
+    'venda_id': lambda p: p.venda_id,
+    'valor': lambda p: float(p.valor),
+    'valor_formatado': lambda p: p.valor_formatado,
+    'forma_pagamento': lambda p: p.forma_pagamento,
+    'forma_pagamento_display': lambda p: p.forma_pagamento_display,
+    'data_pagamento': lambda p: _data_iso(p.data_pagamento),
+    'data_criacao': lambda p: _data_iso(p.data_criacao),
+    'observacoes': lambda p: p.observacoes,
+    'eh_dinheiro': lambda p: p.eh_dinheiro,
+    # Campos do dinheiro: ausentes nos demais meios de pagamento
+    'valor_recebido': lambda p: (float(p.valor_recebido) if p.valor_recebido else None) if p.eh_dinheiro else OMITIR,
+    'troco': lambda p: (float(p.troco) if p.troco else None) if p.eh_dinheiro else OMITIR,
+    'valor_recebido_formatado': lambda p: p.valor_recebido_formatado if p.eh_dinheiro else OMITIR,
+    'troco_formatado': lambda p: p.troco_formatado if p.eh_dinheiro else OMITIR
+})
+
+
+# Venda
+
+def _nomes_clientes(vendas):
+    """Nome do cliente de cada venda (uma consulta só para os não carregados)"""
+    nomes = {}
+    faltantes = set()
+    for venda in vendas:
+        cliente = _carregado(venda, 'cliente')
+        if cliente is not None:
+            nomes[venda.cliente_id] = cliente.nome
+        else:
+            faltantes.add(venda.cliente_id)
+
+    if faltantes:
+        nomes.update(db.session.execute(
+            db.select(Cliente.id, Cliente.nome).where(Cliente.id.in_(faltantes))
+        ).all())
+    return nomes
+
+
+def _itens(vendas):
+    """Itens de todas as vendas, por venda"""
+    itens = {}
+    for item in ItemVenda.query.filter(
+        ItemVenda.venda_id.in_([venda.id for venda in vendas])
+    ).order_by(ItemVenda.venda_id, ItemVenda.id):
+        itens.setdefault(item.venda_id, []).append(item.to_dict())
+    return itens
+
+
+def _pagamentos(vendas):
+    """Pagamentos de todas as vendas, por venda (mais recentes primeiro)"""
+    pagamentos = Pagamento.query.filter(
+        Pagamento.venda_id.in_([venda.id for venda in vendas])
+    ).order_by(Pagamento.venda_id, Pagamento.data_pagamento.desc(), Pagamento.id.desc()).all()
+
+    por_venda = {}
+    for pagamento, dados in zip(pagamentos, serializador_pagamento.serializar_lista(pagamentos)):
+        por_venda.setdefault(pagamento.venda_id, []).append(dados)
+    return por_venda
+
+
+def _descricoes_restante(vendas):
+    from app.models.projecoes import LinhaVenda
+    return LinhaVenda.descricoes_restante(vendas)
+
+
+def _resumos_itens(vendas):
+    return Venda.carregar_resumos(vendas, limite_itens=2)
+
+
+serializador_venda = Serializador({
+    'id': lambda v: v.id,
+    'cliente_id': lambda v: v.cliente_id,
+    'cliente_nome': Campo(lambda v, nomes: nomes.get(v.cliente_id), _nomes_clientes),
+    'data_venda': lambda v: _data_iso(v.data_venda),
+    'data_vencimento': lambda v: _data_iso(v.data_vencimento),
+    'data_pagamento': lambda v: _data_iso(v.data_pagamento),
+    'subtotal': lambda v: float(v.subtotal),
+    'total': lambda v: float(v.total),
+    'valor_pago': lambda v: float(v.valor_pago),
+    'valor_restante': lambda v: float(v.valor_restante),
+    'status': lambda v: v.status,
+    'status_display': lambda v: v.status_display,
+    'status_color': lambda v: v.status_color,
+    'esta_paga': lambda v: v.esta_paga,
+    'esta_vencida': lambda v: v.esta_vencida,
+    'dias_atraso': lambda v: v.dias_atraso,
+    'eh_restante': lambda v: v.eh_restante,
+    'observacoes': lambda v: v.observacoes,
+    'itens': Campo(lambda v, itens: itens.get(v.id, []), _itens),
+    'pagamentos': Campo(lambda v, pagamentos: pagamentos.get(v.id, []), _pagamentos),
+    # Só nas notas de restante
+    'descricao_restante': Campo(
+        lambda v, descricoes: descricoes.get(v.id) if v.eh_restante else OMITIR,
+        _descricoes_restante
+    ),
+    'itens_count': Campo(lambda v, resumos: resumos[v.id]['itens_count'], _resumos_itens),
+    'descricao_resumo': Campo(lambda v, resumos: ', '.join(resumos[v.id]['itens_descricoes']), _resumos_itens)
+}, padrao=(
+    'id', 'cliente_id', 'cliente_nome', 'data_venda', 'data_vencimento', 'data_pagamento',
+    'subtotal', 'total', 'valor_pago', 'valor_restante', 'status', 'status_display',
+    'status_color', 'esta_paga', 'esta_vencida', 'dias_atraso', 'eh_restante', 'observacoes',
+    'descricao_restante'
+))
+
+
+def campos_venda(include_itens=True, include_pagamentos=False):
+    """Campos de Venda.to_dict() para as opções include_*, na ordem de sempre"""
+    campos = serializador_venda.padrao[:-1]
+    if include_itens:
+        campos += ('itens',)
+    if include_pagamentos:
+        campos += ('pagamentos',)
+    return campos + ('descricao_restante',)
+
+
+# Vendas da ficha do cliente: sem itens, com o resumo deles
+CAMPOS_VENDAS_CLIENTE = serializador_venda.padrao + ('itens_count', 'descricao_resumo')
+
+
+# Cliente
+
+def _contagens_vendas(clientes):
+    """(total, em aberto, vencidas) das vendas de cada cliente, em uma consulta"""
+    data_limite = date.today() - timedelta(days=DIAS_INADIMPLENCIA)
+    aberta = Venda.status == STATUS_VENDA['ABERTA']
+
+    def contar(condicao):
+        return db.func.coalesce(db.func.sum(db.case((condicao, 1), else_=0)), 0)
+
+    linhas = db.session.execute(
+        db.select(
+            Venda.cliente_id,
+            db.func.count(Venda.id),
+            contar(aberta),
+            contar(db.and_(aberta, Venda.data_vencimento < data_limite))
+        ).where(
+            Venda.cliente_id.in_([cliente.id for cliente in clientes])
+        ).group_by(Venda.cliente_id)
+    )
+    return {cliente_id: (int(total), int(abertas), int(vencidas))
+            for cliente_id, total, abertas, vencidas in linhas}
+
+
+def _valores_vencidos(clientes):
+    """Valor vencido de cada cliente (soma só os que não têm saldo do dia)"""
+    hoje = date.today()
+    valores = {}
+    pendentes = []
+    for cliente in clientes:
+        if cliente.data_calculo_saldo == hoje:
+            valores[cliente.id] = Decimal(str(cliente.saldo_vencido or 0))
+        elif not cliente.esta_inadimplente:
+            valores[cliente.id] = Decimal('0')
+        else:
+            pendentes.append(cliente.id)
+
+    if pendentes:
+        data_limite = hoje - timedelta(days=DIAS_INADIMPLENCIA)
+        somas = dict(db.session.execute(
+            db.select(Venda.cliente_id, db.func.sum(Venda.total)).where(
+                Venda.cliente_id.in_(pendentes),
+                Venda.status == STATUS_VENDA['ABERTA'],
+                Venda.data_vencimento < data_limite
+            ).group_by(Venda.cliente_id)
+        ).all())
+        for cliente_id in pendentes:
+            valores[cliente_id] = Decimal(str(somas.get(cliente_id) or 0))
+    return valores
+
+
+def _historicos(clientes):
+    """Últimas 10 vendas de cada cliente (uma consulta por cliente)"""
+    vendas = {cliente.id: cliente.historico_vendas(10) for cliente in clientes}
+    todas = [venda for lista in vendas.values() for venda in lista]
+    dados = iter(serializador_venda.serializar_lista(todas, campos_venda()))
+    return {cliente_id: [next(dados) for _ in lista] for cliente_id, lista in vendas.items()}
+
+
+serializador_cliente = Serializador({
+    'id': lambda c: c.id,
+    'nome': lambda c: c.nome,
+    'cpf': lambda c: c.cpf,
+    'telefone': lambda c: c.telefone,
+    'endereco': lambda c: c.endereco,
+    'limite_credito': lambda c: float(c.limite_credito),
+    'ativo': lambda c: c.ativo,
+    'data_cadastro': lambda c: _data_iso(c.data_cadastro),
+    'observacoes': lambda c: c.observacoes,
+    'valor_total_em_aberto': lambda c: float(c.valor_total_em_aberto),
+    'valor_total_vencido': Campo(lambda c, valores: float(valores[c.id]), _valores_vencidos),
+    'credito_disponivel': lambda c: float(c.credito_disponivel),
+    'esta_inadimplente': lambda c: c.esta_inadimplente,
+    'pode_comprar': lambda c: c.pode_comprar,
+    'total_vendas': Campo(lambda c, contagens: contagens.get(c.id, (0, 0, 0))[0], _contagens_vendas),
+    'vendas_em_aberto': Campo(lambda c, contagens: contagens.get(c.id, (0, 0, 0))[1], _contagens_vendas),
+    'vendas_vencidas': Campo(lambda c, contagens: contagens.get(c.id, (0, 0, 0))[2], _contagens_vendas),
+    'vendas': Campo(lambda c, historicos: historicos[c.id], _historicos)
+}, padrao=(
+    'id', 'nome', 'cpf', 'telefone', 'endereco', 'limite_credito', 'ativo', 'data_cadastro',
+    'observacoes', 'valor_total_em_aberto', 'credito_disponivel', 'esta_inadimplente', 'pode_comprar'
+))
+
+# Resumo financeiro das APIs de cliente
+CAMPOS_RESUMO_CLIENTE = (
+    'id', 'nome', 'cpf', 'telefone', 'endereco', 'limite_credito', 'ativo',
+    'valor_total_em_aberto', 'valor_total_vencido', 'credito_disponivel', 'pode_comprar',
+    'esta_inadimplente', 'total_vendas', 'vendas_em_aberto', 'vendas_vencidas'
+)
@@ -9,6 +9,7 @@ from app import db
 from app.utils.constants import (
     STATUS_VENDA, DIAS_VENCIMENTO_PADRAO, VALOR_MINIMO_VENDA
 )
+from app.utils.money import Money
 
 
 class Venda(db.Model):
@@ -48,6 +49,19 @@ class Venda(db.Model):
         index=True
     )
     
+    # Valores consolidados dos pagamentos (mantidos na mesma transação
+    # de cada Pagamento inserido ou removido - ver sincronizar_valores_pagos)
+    valor_pago = db.Column(
+        db.Numeric(10, 2), 
+        nullable=False, 
+        default=0
+    )
+    valor_restante = db.Column(
+        db.Numeric(10, 2), 
+        nullable=False, 
+        default=0
+    )
+    
     # Status e controle
     status = db.Column(
         db.String(20), 
@@ -74,7 +88,8 @@ class Venda(db.Model):
     data_criacao = db.Column(
         db.DateTime, 
         nullable=False, 
-        default=datetime.utcnow
+        default=datetime.utcnow,
+        index=True
     )
     data_atualizacao = db.Column(
         db.DateTime, 
@@ -114,20 +129,6 @@ class Venda(db.Model):
     def __str__(self):
         return f"Venda #{self.id} - {self.total}"
     
-    @property
-    def valor_pago(self):
-        """Valor total já pago desta venda"""
-        total = self.pagamentos.with_entities(
-            func.sum(db.text('pagamentos.valor'))
-        ).scalar()
-        
-        return Decimal(str(total or 0))
-    
-    @property
-    def valor_restante(self):
-        """Valor restante a ser pago"""
-        return self.total - self.valor_pago
-    
     @property
     def esta_paga(self):
         """Verifica se a venda está completamente paga"""
@@ -187,12 +188,13 @@ class Venda(db.Model):
     
     def calcular_totais(self):
         """Recalcular subtotal e total baseado nos itens"""
-        subtotal = self.itens.with_entities(
+        subtotal = Money.de(self.itens.with_entities(
             func.sum(db.text('itens_venda.subtotal'))
-        ).scalar() or 0
+        ).scalar())
         
-        self.subtotal = Decimal(str(subtotal))
-        self.total = self.subtotal  # Sem desconto por enquanto
+        self.subtotal = subtotal.decimal
+        self.total = subtotal.decimal  # Sem desconto por enquanto
+        self.valor_restante = (subtotal - Money.de(self.valor_pago)).decimal
     
     def adicionar_item(self, descricao, quantidade, valor_unitario):
         """Adicionar item à venda"""
@@ -215,26 +217,28 @@ class Venda(db.Model):
         from app.models.pagamento import Pagamento
         
         # Validar valor
-        valor_decimal = Decimal(str(valor))
-        if valor_decimal <= 0:
+        valor = Money.de(valor)
+        restante = Money.de(self.valor_restante)
+        if valor <= 0:
             raise ValueError("Valor do pagamento deve ser positivo")
         
-        if valor_decimal > self.valor_restante:
+        if valor > restante:
             raise ValueError("Valor do pagamento maior que o valor restante")
         
         # Criar pagamento
         pagamento = Pagamento(
-            valor=valor_decimal,
+            valor=valor.decimal,
             forma_pagamento=forma_pagamento,
-            valor_recebido=Decimal(str(valor_recebido)) if valor_recebido else None,
+            valor_recebido=Money.de(valor_recebido).decimal if valor_recebido else None,
             data_pagamento=date.today(),
             observacoes=observacoes
         )
         
         self.pagamentos.append(pagamento)
         
-        # Atualizar status se necessário
-        if self.esta_paga:
+        # Atualizar status se necessário (valor_pago/valor_restante são
+        # consolidados no flush, junto com o INSERT do pagamento)
+        if restante - valor <= 0:
             self.status = STATUS_VENDA['PAGA']
             self.data_pagamento = date.today()
         
@@ -258,39 +262,21 @@ class Venda(db.Model):
         
         self.data_vencimento = self.data_venda + timedelta(days=dias)
     
-    def to_dict(self, include_itens=True, include_pagamentos=False):
-        """Converter para dicionário"""
-        data = {
-            'id': self.id,
-            'cliente_id': self.cliente_id,
-            'cliente_nome': self.cliente.nome if self.cliente else None,
-            'data_venda': self.data_venda.isoformat() if self.data_venda else None,
-            'data_vencimento': self.data_vencimento.isoformat() if self.data_vencimento else None,
-            'data_pagamento': self.data_pagamento.isoformat() if self.data_pagamento else None,
-            'subtotal': float(self.subtotal),
-            'total': float(self.total),
-            'valor_pago': float(self.valor_pago),
-            'valor_restante': float(self.valor_restante),
-            'status': self.status,
-            'status_display': self.status_display,
-            'status_color': self.status_color,
-            'esta_paga': self.esta_paga,
-            'esta_vencida': self.esta_vencida,
-            'dias_atraso': self.dias_atraso,
-            'eh_restante': self.eh_restante,
-            'observacoes': self.observacoes
-        }
-        
-        if include_itens:
-            data['itens'] = [item.to_dict() for item in self.itens]
-        
-        if include_pagamentos:
-            data['pagamentos'] = [pag.to_dict() for pag in self.pagamentos]
-        
-        if self.eh_restante:
-            data['descricao_restante'] = self.descricao_restante
-        
-        return data
+    def to_dict(self, include_itens=True, include_pagamentos=False, fields=None):
+        """
+        Converter para dicionário
+        
+        Args:
+            include_itens: Incluir os itens da venda
+            include_pagamentos: Incluir os pagamentos da venda
+            fields: Campos desejados (substitui as opções include_*);
+                ver app.models.serializadores.serializador_venda
+        """
+        from app.models.serializadores import serializador_venda, campos_venda
+        
+        if fields is None:
+            fields = campos_venda(include_itens, include_pagamentos)
+        return serializador_venda.serializar(self, fields)
     
     @staticmethod
     def buscar_por_periodo(data_inicio, data_fim, cliente_id=None, status=None):
@@ -308,6 +294,16 @@ class Venda(db.Model):
         
         return query.order_by(Venda.data_venda.desc())
     
+    @staticmethod
+    def a_receber():
+        """
+        Condição das vendas ainda devidas: não pagas (abertas ou já marcadas
+        como vencidas) e com valor_restante, que é o valor devido
+
+        Regra única do saldo dos clientes e da inadimplência.
+        """
+        return db.and_(Venda.status != STATUS_VENDA['PAGA'], Venda.valor_restante > 0)
+    
     @staticmethod
     def vendas_vencidas(dias_atraso=None):
         """Listar vendas vencidas"""
@@ -345,6 +341,109 @@ class Venda(db.Model):
         
         return Decimal(str(total or 0))
     
+    @staticmethod
+    def carregar_resumos(vendas, limite_itens=3):
+        """
+        Carregar em lote os valores e o resumo de itens de várias vendas
+        
+        Evita consultar pagamentos e itens venda a venda: os valores pagos
+        já estão consolidados na própria venda e os itens de todas as
+        vendas são lidos em uma única consulta.
+        
+        Args:
+            vendas: Lista de objetos Venda ou de IDs de vendas
+            limite_itens: Quantidade de descrições mantidas no resumo
+            
+        Returns:
+            Dicionário {venda_id: resumo} na ordem recebida, onde resumo
+            contém valor_pago, valor_restante, itens_count e itens_descricoes
+        """
+        from app.models.item_venda import ItemVenda
+        
+        vendas = list(vendas)
+        ids = [v if isinstance(v, int) else v.id for v in vendas]
+        if not ids:
+            return {}
+        
+        # Completar objetos para os IDs recebidos (uma consulta)
+        faltantes = [v for v in vendas if isinstance(v, int)]
+        carregadas = {v.id: v for v in vendas if not isinstance(v, int)}
+        if faltantes:
+            carregadas.update(
+                (v.id, v) for v in Venda.query.filter(Venda.id.in_(faltantes))
+            )
+        
+        resumos = {}
+        for venda_id in ids:
+            venda = carregadas.get(venda_id)
+            if venda is None:
+                continue
+            resumos[venda_id] = {
+                'valor_pago': Decimal(str(venda.valor_pago or 0)),
+                'valor_restante': Decimal(str(venda.valor_restante or 0)),
+                'itens_count': 0,
+                'itens_descricoes': []
+            }
+        
+        # Contagem e primeiras descrições de todas as vendas (uma consulta)
+        itens = db.session.query(
+            ItemVenda.venda_id, ItemVenda.descricao
+        ).filter(
+            ItemVenda.venda_id.in_(list(resumos))
+        ).order_by(ItemVenda.venda_id, ItemVenda.id)
+        
+        for venda_id, descricao in itens:
+            resumo = resumos[venda_id]
+            resumo['itens_count'] += 1
+            if len(resumo['itens_descricoes']) < limite_itens:
+                resumo['itens_descricoes'].append(descricao)
+        
+        return resumos
+    
+    @staticmethod
+    def recalcular_valores_pagos(vendas_ids=None):
+        """
+        Reparar valor_pago/valor_restante a partir da tabela de pagamentos
+        
+        Args:
+            vendas_ids: IDs das vendas a verificar (todas se None)
+            
+        Returns:
+            Número de vendas corrigidas
+        """
+        from app.models.pagamento import Pagamento
+        from app.models.pagamento_multiplo import PagamentoMultiplo, PagamentoMultiploDetalhe
+        
+        pagos = db.select(
+            func.coalesce(func.sum(Pagamento.valor), 0)
+        ).where(
+            Pagamento.venda_id == Venda.id
+        ).scalar_subquery()
+        
+        # Notas encerradas por pagamento múltiplo com restante não têm saldo:
+        # a diferença foi transferida para a nota de restante
+        transferida = db.exists().where(
+            PagamentoMultiploDetalhe.venda_id == Venda.id,
+            PagamentoMultiplo.id == PagamentoMultiploDetalhe.pagamento_multiplo_id,
+            PagamentoMultiplo.valor_restante > 0
+        )
+        restante = db.case((transferida, 0), else_=Venda.total - pagos)
+        
+        stmt = db.update(Venda).where(
+            db.or_(
+                Venda.valor_pago != pagos,
+                Venda.valor_restante != restante
+            )
+        ).values(
+            valor_pago=pagos,
+            valor_restante=restante
+        ).execution_options(synchronize_session=False)
+        
+        if vendas_ids is not None:
+            stmt = stmt.where(Venda.id.in_(vendas_ids))
+        
+        return db.session.execute(stmt).rowcount
+    
     def validate(self):
         """Validar dados da venda"""
         errors = []
@@ -374,7 +473,8 @@ class Venda(db.Model):
 
 
 # Eventos SQLAlchemy
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 
 @event.listens_for(Venda, 'before_update')
 def venda_before_update(mapper, connection, target):
@@ -386,4 +486,64 @@ def venda_before_insert(mapper, connection, target):
     """Executado antes de inserir venda"""
     # Gerar data de vencimento se não informada
     if not target.data_vencimento:
-        target.gerar_data_vencimento()
\ No newline at end of file
+        target.gerar_data_vencimento()
+
+
+def _venda_do_pagamento(session, pagamento):
+    """Obter a venda de um pagamento sem disparar autoflush"""
+    if pagamento.venda is not None:
+        return pagamento.venda
+    
+    if pagamento.venda_id is None:
+        return None
+    
+    return session.get(Venda, pagamento.venda_id)
+
+
+@event.listens_for(Session, 'before_flush')
+def sincronizar_valores_pagos(session, flush_context, instances):
+    """Atualizar valor_pago/valor_restante das vendas afetadas pelo flush"""
+    from app.models.pagamento import Pagamento
+    
+    vendas_afetadas = set()
+    
+    with session.no_autoflush:
+        # Pagamentos novos somam, removidos subtraem, editados aplicam a diferença
+        movimentos = [(obj, 1) for obj in session.new if isinstance(obj, Pagamento)]
+        movimentos += [(obj, -1) for obj in session.deleted if isinstance(obj, Pagamento)]
+        
+        for pagamento, sinal in movimentos:
+            venda = _venda_do_pagamento(session, pagamento)
+            if venda is None or venda in session.deleted:
+                continue
+            
+            valor = Money.de(pagamento.valor) * sinal
+            venda.valor_pago = (Money.de(venda.valor_pago) + valor).decimal
+            vendas_afetadas.add(venda)
+        
+        for pagamento in session.dirty:
+            if not isinstance(pagamento, Pagamento):
+                continue
+            
+            historico = inspect(pagamento).attrs.valor.history
+            if not historico.deleted:
+                continue
+            
+            venda = _venda_do_pagamento(session, pagamento)
+            if venda is None:
+                continue
+            
+            diferenca = Money.de(pagamento.valor) - Money.de(historico.deleted[0])
+            venda.valor_pago = (Money.de(venda.valor_pago) + diferenca).decimal
+            vendas_afetadas.add(venda)
+    
+    # Vendas novas ou com total alterado também precisam do restante atualizado
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Venda) and (
+            obj not in session.dirty or
+            inspect(obj).attrs.total.history.has_changes()
+        ):
+            vendas_afetadas.add(obj)
+    
+    for venda in vendas_afetadas:
+        venda.valor_restante = (Money.de(venda.total) - Money.de(venda.valor_pago)).decimal
@@ -5,13 +5,37 @@ Contém toda a lógica de negócio do sistema
 
 from .venda_service import VendaService
 from .pagamento_service import PagamentoService
+from .dashboard_service import DashboardMetricsService
+from .serie_temporal_service import SerieTemporalService
+from .indice_clientes_service import IndiceClientesService
+from .busca_vendas_service import BuscaVendasService
+from .cliente_service import ClienteService
+from .export_service import ExportService
+from .relatorio_service import RelatorioService
+from .inadimplencia_service import InadimplenciaService
 
 # Lista de todos os services para facilitar importação
 __all__ = [
     'VendaService',
-    'PagamentoService'
+    'PagamentoService',
+    'DashboardMetricsService',
+    'SerieTemporalService',
+    'IndiceClientesService',
+    'BuscaVendasService',
+    'ClienteService',
+    'ExportService',
+    'RelatorioService',
+    'InadimplenciaService'
 ]
 
 # Instâncias globais dos services (singleton pattern)
 venda_service = VendaService()
-pagamento_service = PagamentoService()
\ No newline at end of file
+pagamento_service = PagamentoService()
+dashboard_service = DashboardMetricsService()
+serie_temporal_service = SerieTemporalService()
+indice_clientes_service = IndiceClientesService()
+busca_vendas_service = BuscaVendasService()
+cliente_service = ClienteService()
+export_service = ExportService()
+relatorio_service = RelatorioService()
+inadimplencia_service = InadimplenciaService()
\ No newline at end of file
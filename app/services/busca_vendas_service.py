@@ -0,0 +1,254 @@
+"""
+BuscaVendasService - Busca textual em vendas (itens, observações e cliente)
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from app import db
+from app.models import Cliente, Venda, ItemVenda, LinhaVenda
+from app.utils.constants import ITEMS_PER_PAGE
+from app.utils.paginacao import paginar_por_cursor
+
+
+class BuscaVendasService:
+    """
+    Índice textual das vendas
+    
+    Cada venda tem um documento em busca_vendas com o nome do cliente, as
+    observações e as descrições dos itens. No MySQL a tabela tem índice
+    FULLTEXT; no SQLite é uma tabela virtual FTS5. Nos dois casos ela é
+    criada sob demanda (também consta em config/database.sql). Os
+    documentos são refeitos a cada flush que altera vendas, itens ou nomes
+    de clientes.
+    """
+    
+    TABELA = 'busca_vendas'
+    
+    def __init__(self):
+        self.db = db
+        self._indices_criados = set()
+    
+    def buscar(self, termo: str, cursor: str = None, per_page: int = ITEMS_PER_PAGE):
+        """
+        Vendas que contêm todas as palavras do termo, por relevância
+        
+        Args:
+            termo: Texto digitado (a última palavra casa como prefixo)
+            cursor: Cursor da página (None para a primeira)
+            per_page: Itens por página
+        
+        Returns:
+            PaginaCursor de LinhaVenda (com o cliente já juntado)
+        """
+        resultados = self.consulta_resultados(termo)
+        
+        if resultados is None:
+            return paginar_por_cursor(
+                LinhaVenda.consulta(Venda.query.filter(db.false())), [(Venda.id, True)],
+                per_page=per_page,
+                montar=LinhaVenda.da_linha
+            )
+        
+        query = Venda.query.join(resultados, resultados.c.venda_id == Venda.id)
+        return paginar_por_cursor(
+            LinhaVenda.consulta(query), [(resultados.c.relevancia, True), (Venda.id, True)],
+            cursor=cursor,
+            per_page=per_page,
+            contar_total=True,
+            tags_total=('vendas', 'clientes'),
+            montar=LinhaVenda.da_linha
+        )
+    
+    def consulta_resultados(self, termo: str):
+        """
+        Subconsulta (venda_id, relevancia) das vendas que casam com o termo
+        
+        Returns:
+            Subconsulta, ou None se o termo não tiver palavras pesquisáveis
+        """
+        palavras = re.findall(r'\w+', termo or '')
+        if not palavras:
+            return None
+        
+        connection = self.db.session.connection()
+        self.garantir_indice(connection)
+        
+        if connection.dialect.name == 'mysql':
+            expressao = ' '.join(f'+{p}' for p in palavras[:-1]) + f' +{palavras[-1]}*'
+            consulta = db.text(
+                f"SELECT venda_id, MATCH(texto) AGAINST (:expressao IN BOOLEAN MODE) AS relevancia "
+                f"FROM {self.TABELA} WHERE MATCH(texto) AGAINST (:expressao IN BOOLEAN MODE)"
+            )
+        else:
+            # FTS5: palavras entre aspas (sem operadores), última como prefixo
+            expressao = ' '.join(f'"{p}"' for p in palavras[:-1]) + f' "{palavras[-1]}"*'
+            consulta = db.text(
+                f"SELECT rowid AS venda_id, -bm25({self.TABELA}) AS relevancia "
+                f"FROM {self.TABELA} WHERE {self.TABELA} MATCH :expressao"
+            )
+        
+        return consulta.bindparams(expressao=expressao.strip()).columns(
+            db.column('venda_id', db.Integer),
+            db.column('relevancia', db.Float)
+        ).subquery('resultados_busca')
+    
+    def garantir_indice(self, connection):
+        """Criar a tabela do índice se ainda não existir (FULLTEXT no MySQL, FTS5 no SQLite)"""
+        url = str(connection.engine.url)
+        if url in self._indices_criados:
+            return
+        
+        if connection.dialect.name == 'mysql':
+            # Sem chave estrangeira: os documentos de vendas excluídas são
+            # removidos pelo próprio índice e a tabela não impede o reset-db
+            connection.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {self.TABELA} ("
+                f"venda_id INT PRIMARY KEY, "
+                f"texto TEXT NOT NULL, "
+                f"FULLTEXT INDEX ft_{self.TABELA}_texto (texto)"
+                f") ENGINE=InnoDB"
+            )
+        elif connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABELA} "
+                f"USING fts5(texto, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        self._indices_criados.add(url)
+    
+    def esquecer_indices(self):
+        """Verificar a tabela de novo no próximo uso (banco recriado com a mesma URL)"""
+        self._indices_criados.clear()
+    
+    def atualizar(self, vendas_ids: Iterable[int], connection=None) -> int:
+        """
+        Refazer os documentos de busca das vendas
+        
+        Args:
+            vendas_ids: IDs das vendas (vendas inexistentes são removidas do índice)
+            connection: Conexão a usar (padrão: a da sessão atual)
+        
+        Returns:
+            Quantidade de documentos gravados
+        """
+        vendas_ids = list(set(vendas_ids))
+        if not vendas_ids:
+            return 0
+        
+        if connection is None:
+            connection = self.db.session.connection()
+        self.garantir_indice(connection)
+        
+        documentos = {}
+        for venda_id, nome, observacoes in connection.execute(
+            db.select(Venda.id, Cliente.nome, Venda.observacoes)
+            .join(Cliente, Cliente.id == Venda.cliente_id)
+            .where(Venda.id.in_(vendas_ids))
+        ):
+            documentos[venda_id] = [nome or '', observacoes or '']
+        
+        for venda_id, descricao in connection.execute(
+            db.select(ItemVenda.venda_id, ItemVenda.descricao)
+            .where(ItemVenda.venda_id.in_(list(documentos)))
+            .order_by(ItemVenda.venda_id, ItemVenda.id)
+        ):
+            documentos[venda_id].append(descricao or '')
+        
+        self._gravar(connection, vendas_ids, documentos)
+        return len(documentos)
+    
+    def reconstruir(self, connection=None, lote: int = 1000) -> int:
+        """Refazer o índice de todas as vendas, em lotes"""
+        if connection is None:
+            connection = self.db.session.connection()
+        self.garantir_indice(connection)
+        
+        connection.execute(db.text(f"DELETE FROM {self.TABELA}"))
+        
+        total = 0
+        ultimo_id = 0
+        while True:
+            ids = connection.execute(
+                db.select(Venda.id).where(Venda.id > ultimo_id).order_by(Venda.id).limit(lote)
+            ).scalars().all()
+            if not ids:
+                return total
+            total += self.atualizar(ids, connection=connection)
+            ultimo_id = ids[-1]
+    
+    def _gravar(self, connection, vendas_ids: List[int], documentos: Dict[int, List[str]]):
+        """Substituir os documentos das vendas"""
+        coluna_id = 'rowid' if connection.dialect.name == 'sqlite' else 'venda_id'
+        
+        connection.execute(
+            db.text(f"DELETE FROM {self.TABELA} WHERE {coluna_id} IN :ids").bindparams(
+                db.bindparam('ids', expanding=True)
+            ),
+            {'ids': vendas_ids}
+        )
+        if documentos:
+            connection.execute(
+                db.text(f"INSERT INTO {self.TABELA} ({coluna_id}, texto) VALUES (:venda_id, :texto)"),
+                [
+                    {'venda_id': venda_id, 'texto': '\n'.join(partes)}
+                    for venda_id, partes in documentos.items()
+                ]
+            )
+
+
+# Manter os documentos em dia com as gravações
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+def _vendas_afetadas(session) -> Tuple[set, set]:
+    """IDs das vendas e dos clientes renomeados cujo documento muda com o flush atual"""
+    vendas_ids = set()
+    clientes_ids = set()
+    
+    def alterou(obj, *campos):
+        estado = inspect(obj)
+        return any(estado.attrs[campo].history.has_changes() for campo in campos)
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Venda):
+            # Pagamentos também sujam a venda; só texto ou cliente mudam o documento
+            if obj in session.new or obj in session.deleted or alterou(obj, 'observacoes', 'cliente_id'):
+                vendas_ids.add(obj.id)
+        elif isinstance(obj, ItemVenda):
+            vendas_ids.add(obj.venda_id)
+            vendas_ids.update(inspect(obj).attrs.venda_id.history.deleted or ())
+        elif isinstance(obj, Cliente) and obj not in session.new and alterou(obj, 'nome'):
+            clientes_ids.add(obj.id)
+    
+    vendas_ids.discard(None)
+    return vendas_ids, clientes_ids
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_vendas_busca(session, flush_context):
+    """Guardar as vendas a reindexar depois que o flush terminar"""
+    vendas_ids, clientes_ids = _vendas_afetadas(session)
+    if vendas_ids or clientes_ids:
+        pendentes = session.info.setdefault('busca_vendas_pendentes', (set(), set()))
+        pendentes[0].update(vendas_ids)
+        pendentes[1].update(clientes_ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def atualizar_busca_vendas(session, flush_context):
+    """Reindexar as vendas afetadas na mesma transação"""
+    pendentes = session.info.pop('busca_vendas_pendentes', None)
+    if not pendentes:
+        return
+    
+    from app.services import busca_vendas_service
+    
+    vendas_ids, clientes_ids = pendentes
+    connection = session.connection()
+    if clientes_ids:
+        vendas_ids |= set(connection.execute(
+            db.select(Venda.id).where(Venda.cliente_id.in_(list(clientes_ids)))
+        ).scalars())
+    
+    busca_vendas_service.atualizar(vendas_ids, connection=connection)
@@ -0,0 +1,382 @@
+"""
+ClienteService - Importação de clientes em lote (CSV/XLSX)
+"""
+
+import codecs
+import csv
+import os
+import shutil
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app import db
+from app.models import Cliente
+from app.services.indice_clientes_service import normalizar_nome
+from app.utils import moeda
+from app.utils.cache import registrar_tags
+from app.utils.constants import (
+    IMPORTACAO_FORMATOS, IMPORTACAO_TAMANHO_LOTE, IMPORTACAO_LOTES_POR_PROCESSO,
+    LIMITE_CREDITO_PADRAO, MAX_NAME_LENGTH
+)
+from app.utils.helpers import validate_cpf, format_cpf, format_phone
+from app.utils.money import Money
+
+
+# Cabeçalhos aceitos para cada campo (comparados sem acentos, maiúsculas ou pontuação)
+COLUNAS_IMPORTACAO = {
+    'nome': ('nome', 'cliente', 'nome completo', 'nome do cliente'),
+    'cpf': ('cpf', 'documento'),
+    'telefone': ('telefone', 'fone', 'celular', 'whatsapp'),
+    'endereco': ('endereco', 'rua'),
+    'limite_credito': ('limite credito', 'limite de credito', 'limite'),
+    'observacoes': ('observacoes', 'observacao', 'obs')
+}
+
+# Erros guardados para exibição (os demais só são contados)
+MAX_ERROS_LISTADOS = 1000
+
+
+class ResultadoImportacao:
+    """Andamento e resultado de uma importação"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.importadas = 0
+        self.duplicadas = 0
+        self.total_erros = 0
+        self.erros: List[Tuple[int, str]] = []
+
+    def registrar_erro(self, linha: int, mensagem: str):
+        """Registrar erro de uma linha da planilha"""
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_LISTADOS:
+            self.erros.append((linha, mensagem))
+
+    def to_dict(self) -> Dict:
+        return {
+            'lidas': self.lidas,
+            'importadas': self.importadas,
+            'duplicadas': self.duplicadas,
+            'total_erros': self.total_erros,
+            'erros': [{'linha': linha, 'mensagem': mensagem} for linha, mensagem in self.erros]
+        }
+
+
+def validar_lote(lote: List[Tuple[int, Dict]]) -> List[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Validar e normalizar um lote de linhas da planilha
+
+    Função de módulo (sem acesso ao banco) para poder rodar em outro processo.
+
+    Args:
+        lote: Pares (número da linha, campos lidos)
+
+    Returns:
+        Triplas (número da linha, dados do cliente ou None, mensagem de erro ou None)
+    """
+    return [_validar_linha(numero, campos) for numero, campos in lote]
+
+
+def _validar_linha(numero: int, campos: Dict) -> Tuple[int, Optional[Dict], Optional[str]]:
+    erros = []
+
+    nome = ' '.join(_texto(campos.get('nome')).split())
+    if len(nome) < 2:
+        erros.append("Nome deve ter pelo menos 2 caracteres")
+    elif len(nome) > MAX_NAME_LENGTH:
+        erros.append(f"Nome muito longo (máximo {MAX_NAME_LENGTH} caracteres)")
+
+    cpf = _digitos(campos.get('cpf'), tamanho=11)
+    if cpf and not validate_cpf(cpf):
+        erros.append("CPF inválido")
+
+    telefone = _digitos(campos.get('telefone'))
+    if telefone and len(telefone) in (12, 13) and telefone.startswith('55'):
+        telefone = telefone[2:]  # Código do país
+    if telefone and len(telefone) not in (10, 11):
+        erros.append("Telefone inválido")
+
+    limite = _texto(campos.get('limite_credito'))
+    if limite:
+        limite = moeda.ler(campos.get('limite_credito'), padrao=None)
+        if limite is None or not limite.is_finite() or limite < 0:
+            erros.append("Limite de crédito inválido")
+    else:
+        limite = LIMITE_CREDITO_PADRAO
+
+    if erros:
+        return numero, None, '; '.join(erros)
+
+    return numero, {
+        'nome': nome,
+        'cpf': format_cpf(cpf) if cpf else None,
+        'cpf_digitos': cpf,
+        'telefone': format_phone(telefone) if telefone else None,
+        'telefone_digitos': telefone,
+        'endereco': _texto(campos.get('endereco')) or None,
+        'limite_credito': Money.de(limite).decimal,
+        'observacoes': _texto(campos.get('observacoes')) or None
+    }, None
+
+
+def _texto(valor) -> str:
+    """Célula como texto (números inteiros do Excel sem o '.0')"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _digitos(valor, tamanho: Optional[int] = None) -> Optional[str]:
+    """Dígitos de CPF/telefone; números vindos do Excel recuperam os zeros à esquerda"""
+    digitos = ''.join(c for c in _texto(valor) if c.isdigit())
+    if digitos and tamanho and isinstance(valor, (int, float)):
+        digitos = digitos.zfill(tamanho)
+    return digitos or None
+
+
+class ClienteService:
+    """Service para operações com clientes"""
+
+    def __init__(self):
+        self.db = db
+
+    def importar_clientes(self, arquivo, nome_arquivo: str,
+                          progresso: Optional[Callable[[ResultadoImportacao], None]] = None,
+                          processos: Optional[int] = 1) -> Tuple[bool, str, ResultadoImportacao]:
+        """
+        Importar clientes de uma planilha CSV ou XLSX
+
+        A planilha é lida em fluxo e tratada em lotes de IMPORTACAO_TAMANHO_LOTE
+        linhas: validação (opcionalmente em processos separados),
+        uma consulta indexada por lote para achar CPFs já cadastrados e um
+        INSERT em lote, confirmado lote a lote. Linhas inválidas ou com CPF
+        repetido não interrompem a importação; ficam listadas no resultado.
+
+        Args:
+            arquivo: Arquivo binário (upload ou arquivo aberto com 'rb')
+            nome_arquivo: Nome do arquivo (define o formato pela extensão)
+            progresso: Função chamada com o resultado parcial após cada lote
+            processos: Processos de validação (0 ou 1 valida no próprio
+                processo, None escolhe automaticamente). O pool só compensa
+                em planilhas grandes; a tela de importação valida no próprio
+                processo
+
+        Returns:
+            Tuple[sucesso, mensagem, resultado]
+        """
+        resultado = ResultadoImportacao()
+        formato = os.path.splitext(nome_arquivo or '')[1].lower().lstrip('.')
+        if formato not in IMPORTACAO_FORMATOS:
+            formatos = ', '.join(sorted(IMPORTACAO_FORMATOS)).upper()
+            return False, f"Formato de arquivo não suportado. Use {formatos}.", resultado
+
+        if not arquivo.seekable():
+            # A leitura volta ao início depois de detectar a codificação
+            copia = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            shutil.copyfileobj(arquivo, copia)
+            copia.seek(0)
+            arquivo = copia
+
+        cpfs_vistos: Dict[str, int] = {}
+        try:
+            linhas = self.ler_planilha(arquivo, formato)
+            lotes = _em_lotes(linhas, IMPORTACAO_TAMANHO_LOTE)
+            for validadas in self._validar_lotes(lotes, processos):
+                self._gravar_lote(validadas, resultado, cpfs_vistos)
+                if progresso:
+                    progresso(resultado)
+            resultado.erros.sort()
+        except ValueError as e:
+            self.db.session.rollback()
+            return False, str(e), resultado
+        except Exception as e:
+            self.db.session.rollback()
+            return False, f"Erro ao importar clientes: {str(e)}", resultado
+        finally:
+            if resultado.importadas:
+                # Gravações em lote não passam pelo ORM: refazer o índice de nomes
+                from app.services import indice_clientes_service
+                indice_clientes_service.limpar()
+
+        mensagem = f"{resultado.importadas} cliente(s) importado(s) de {resultado.lidas} linha(s)."
+        if resultado.total_erros:
+            mensagem += f" {resultado.total_erros} linha(s) não importada(s)."
+        return True, mensagem, resultado
+
+    def ler_planilha(self, arquivo, formato: str) -> Iterator[Tuple[int, Dict]]:
+        """
+        Linhas da planilha, uma a uma, como (número da linha, campos)
+
+        Raises:
+            ValueError: Se a planilha não tiver a coluna de nome
+        """
+        if formato == 'xlsx':
+            return self._ler_xlsx(arquivo)
+        return self._ler_csv(arquivo)
+
+    def _ler_csv(self, arquivo) -> Iterator[Tuple[int, Dict]]:
+        # Planilhas salvas pelo Excel em português costumam vir em cp1252 e com ';'
+        amostra = arquivo.read(64 * 1024)
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+            codificacao = 'utf-8-sig'
+        except UnicodeDecodeError:
+            codificacao = 'cp1252'
+
+        primeira_linha = amostra.split(b'\n', 1)[0].decode(codificacao, errors='replace')
+        delimitador = max((';', ',', '\t'), key=primeira_linha.count)
+
+        arquivo.seek(0)
+        leitor = csv.reader(
+            (linha.decode(codificacao, errors='replace') for linha in arquivo),
+            delimiter=delimitador
+        )
+        yield from _registros((leitor.line_num, linha) for linha in leitor)
+
+    def _ler_xlsx(self, arquivo) -> Iterator[Tuple[int, Dict]]:
+        from openpyxl import load_workbook
+
+        # Modo somente leitura: as linhas são lidas do arquivo sob demanda
+        planilha = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            yield from _registros(enumerate(planilha.active.iter_rows(values_only=True), start=1))
+        finally:
+            planilha.close()
+
+    def _validar_lotes(self, lotes: Iterator[List], processos: Optional[int]) -> Iterator[List]:
+        """Lotes validados, na ordem da planilha"""
+        primeiro = next(lotes, None)
+        if primeiro is None:
+            return
+        segundo = next(lotes, None)
+        lotes = chain([primeiro] + ([segundo] if segundo is not None else []), lotes)
+
+        processos = _processos_validacao(processos) if segundo is not None else 0
+        if processos <= 1:
+            yield from map(validar_lote, lotes)
+            return
+
+        # Poucos lotes em andamento por vez: a planilha continua sendo lida em fluxo
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            pendentes = deque()
+            for lote in lotes:
+                pendentes.append(executor.submit(validar_lote, lote))
+                if len(pendentes) >= processos * IMPORTACAO_LOTES_POR_PROCESSO:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+
+    def _gravar_lote(self, validadas: List[Tuple[int, Optional[Dict], Optional[str]]],
+                     resultado: ResultadoImportacao, cpfs_vistos: Dict[str, int]):
+        """Descartar duplicados e inserir os clientes válidos de um lote"""
+        session = self.db.session
+        candidatos = []
+        for numero, dados, erro in validadas:
+            resultado.lidas += 1
+            if erro:
+                resultado.registrar_erro(numero, erro)
+                continue
+
+            cpf = dados['cpf_digitos']
+            if cpf:
+                if cpf in cpfs_vistos:
+                    resultado.duplicadas += 1
+                    resultado.registrar_erro(numero, f"CPF repetido no arquivo (linha {cpfs_vistos[cpf]})")
+                    continue
+                cpfs_vistos[cpf] = numero
+            candidatos.append((numero, dados))
+
+        # CPFs já cadastrados: uma consulta pelos índices de CPF para o lote inteiro
+        cpfs = [dados['cpf_digitos'] for _, dados in candidatos if dados['cpf_digitos']]
+        existentes = set()
+        if cpfs:
+            for cpf_digitos, cpf in session.execute(
+                db.select(Cliente.cpf_digitos, Cliente.cpf).where(db.or_(
+                    Cliente.cpf_digitos.in_(cpfs),
+                    Cliente.cpf.in_([format_cpf(c) for c in cpfs] + cpfs)
+                ))
+            ):
+                existentes.add(cpf_digitos or ''.join(c for c in cpf if c.isdigit()))
+
+        agora = datetime.utcnow()
+        numeros = []
+        novos = []
+        for numero, dados in candidatos:
+            if dados['cpf_digitos'] in existentes:
+                resultado.duplicadas += 1
+                resultado.registrar_erro(numero, "CPF já cadastrado")
+                continue
+            numeros.append(numero)
+            novos.append(dict(
+                dados, ativo=True, saldo_aberto=0, saldo_vencido=0,
+                data_cadastro=agora, data_atualizacao=agora
+            ))
+
+        if not novos:
+            return
+
+        try:
+            session.execute(db.insert(Cliente), novos)
+            registrar_tags(session, 'clientes')
+            session.commit()
+            resultado.importadas += len(novos)
+        except Exception as e:
+            session.rollback()
+            for numero in numeros:
+                resultado.registrar_erro(numero, f"Erro ao gravar o lote: {str(e)}")
+
+
+def _registros(linhas: Iterable[Tuple[int, Tuple]]) -> Iterator[Tuple[int, Dict]]:
+    """(número da linha, campos) a partir das linhas brutas, com cabeçalho na primeira"""
+    linhas = iter(linhas)
+    primeira = next(linhas, None)
+    if primeira is None:
+        raise ValueError("Planilha vazia")
+
+    indices = _mapear_colunas(primeira[1])
+    for numero, linha in linhas:
+        if not any(_texto(valor) for valor in linha):
+            continue
+        yield numero, {
+            campo: linha[indice] if indice < len(linha) else None
+            for campo, indice in indices.items()
+        }
+
+
+def _mapear_colunas(cabecalho) -> Dict[str, int]:
+    """Posição de cada campo conhecido no cabeçalho"""
+    apelidos = {apelido: campo for campo, nomes in COLUNAS_IMPORTACAO.items() for apelido in nomes}
+    indices = {}
+    for posicao, titulo in enumerate(cabecalho):
+        campo = apelidos.get(normalizar_nome(_texto(titulo)))
+        if campo and campo not in indices:
+            indices[campo] = posicao
+
+    if 'nome' not in indices:
+        raise ValueError("A planilha precisa de uma coluna 'nome' na primeira linha")
+    return indices
+
+
+def _em_lotes(linhas: Iterator, tamanho: int) -> Iterator[List]:
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _processos_validacao(processos: Optional[int]) -> int:
+    """Processos de validação (automático: até 4, nunca no executável empacotado)"""
+    if processos is not None:
+        return processos
+    if getattr(sys, 'frozen', False):
+        return 0
+    return min(os.cpu_count() or 1, 4)
@@ -0,0 +1,277 @@
+"""
+DashboardMetricsService - Métricas do dashboard calculadas em lote
+"""
+
+from datetime import date, timedelta
+from typing import List, Dict, Optional
+
+from app import db
+from app.models import Cliente, Venda, ResumoDiario, InadimplenciaCliente, InadimplenciaSnapshot
+from app.utils.constants import STATUS_VENDA, FORMAS_PAGAMENTO, DIAS_INADIMPLENCIA
+
+
+class DashboardMetricsService:
+    """Service para as métricas do dashboard (estatísticas, alertas e gráficos)"""
+    
+    DIAS_GRAFICO_VENDAS = 7
+    DIAS_GRAFICO_PAGAMENTOS = 30
+    PERCENTUAL_ALERTA_LIMITE = 0.8
+    TAGS_CACHE = ('vendas', 'pagamentos', 'clientes', 'inadimplencia')
+    
+    def __init__(self):
+        self.db = db
+    
+    def obter_metricas(self, hoje: Optional[date] = None) -> Dict:
+        """
+        Calcular todas as métricas brutas do dashboard em uma única consulta
+        
+        As vendas em aberto e os clientes são agregados com SUM/CASE; os
+        totais por dia, forma e status vêm do resumo diário e a inadimplência
+        da tabela processada. Os resultados de linha única são combinados no
+        mesmo SELECT.
+        
+        Args:
+            hoje: Data de referência (padrão: hoje)
+        
+        Returns:
+            Dicionário com contagens e somas por indicador
+        """
+        hoje = hoje or date.today()
+        inicio_mes = hoje.replace(day=1)
+        inicio_pagamentos = hoje - timedelta(days=self.DIAS_GRAFICO_PAGAMENTOS)
+        dias_grafico = [hoje - timedelta(days=i) for i in range(self.DIAS_GRAFICO_VENDAS - 1, -1, -1)]
+        
+        inicio_resumo = min(inicio_mes, inicio_pagamentos, dias_grafico[0])
+        
+        def contar(condicao):
+            return db.func.coalesce(db.func.sum(db.case((condicao, 1), else_=0)), 0)
+        
+        def somar(condicao, coluna):
+            return db.func.coalesce(db.func.sum(db.case((condicao, coluna), else_=0)), 0)
+        
+        # Saldo em aberto: apenas vendas abertas (índice por status)
+        vendas = db.select(
+            db.func.count(Venda.id).label('vendas_abertas'),
+            db.func.coalesce(db.func.sum(Venda.total), 0).label('valor_aberto'),
+            contar(Venda.data_vencimento < hoje).label('vendas_vencidas'),
+            somar(Venda.data_vencimento < hoje, Venda.total).label('valor_vencido'),
+            contar(Venda.data_vencimento == hoje).label('vendas_vencem_hoje')
+        ).where(
+            Venda.status == STATUS_VENDA['ABERTA']
+        ).subquery()
+        
+        # Movimento do período: poucas dezenas de linhas do resumo diário
+        colunas_resumo = [
+            somar(ResumoDiario.data == hoje, ResumoDiario.vendas_qtd).label('vendas_hoje'),
+            somar(ResumoDiario.data == hoje, ResumoDiario.vendas_valor).label('valor_hoje'),
+            somar(ResumoDiario.data >= inicio_mes, ResumoDiario.vendas_qtd).label('vendas_mes'),
+            somar(ResumoDiario.data >= inicio_mes, ResumoDiario.vendas_valor).label('valor_mes'),
+            somar(ResumoDiario.data == hoje, ResumoDiario.pagamentos_qtd).label('pagamentos_hoje'),
+            somar(ResumoDiario.data == hoje, ResumoDiario.pagamentos_valor).label('valor_recebido_hoje')
+        ]
+        colunas_resumo += [
+            somar(ResumoDiario.data == dia, ResumoDiario.vendas_valor).label(f'vendas_dia_{indice}')
+            for indice, dia in enumerate(dias_grafico)
+        ]
+        colunas_resumo += [
+            somar(ResumoDiario.data >= inicio_pagamentos, getattr(ResumoDiario, f'pagamentos_{sufixo}_valor')).label(f'forma_{forma}')
+            for forma, sufixo in ResumoDiario.SUFIXOS_FORMA.items()
+        ]
+        resumo = db.select(*colunas_resumo).where(
+            ResumoDiario.data >= inicio_resumo,
+            ResumoDiario.data <= hoje
+        ).subquery()
+        
+        # Vendas por status (uma linha por dia com movimento)
+        status = db.select(*[
+            db.func.coalesce(db.func.sum(getattr(ResumoDiario, f'vendas_{sufixo}_qtd')), 0).label(f'status_{valor}')
+            for valor, sufixo in ResumoDiario.SUFIXOS_STATUS.items()
+        ]).subquery()
+        
+        clientes = db.select(
+            contar(Cliente.ativo == True).label('clientes_ativos'),
+            contar(
+                (Cliente.ativo == True) &
+                (Cliente.saldo_aberto > Cliente.limite_credito * self.PERCENTUAL_ALERTA_LIMITE)
+            ).label('clientes_limite')
+        ).subquery()
+        
+        # Inadimplência: tabela processada, uma linha por cliente com atraso
+        inadimplencia = db.select(
+            db.func.count(InadimplenciaCliente.cliente_id).label('clientes_inadimplentes'),
+            db.func.coalesce(db.func.sum(InadimplenciaCliente.vendas_inadimplentes), 0).label('vendas_inadimplentes'),
+            db.func.coalesce(db.func.sum(InadimplenciaCliente.valor_inadimplente), 0).label('valor_inadimplente'),
+            db.select(db.func.max(InadimplenciaSnapshot.gerado_em)).scalar_subquery().label('inadimplencia_gerada_em')
+        ).join(
+            Cliente, Cliente.id == InadimplenciaCliente.cliente_id
+        ).where(
+            Cliente.ativo == True,
+            InadimplenciaCliente.inadimplente == True
+        ).subquery()
+        
+        linha = self.db.session.execute(
+            db.select(vendas, resumo, status, clientes, inadimplencia).select_from(
+                vendas.join(resumo, db.true()).join(status, db.true()).join(clientes, db.true())
+                .join(inadimplencia, db.true())
+            )
+        ).mappings().one()
+        
+        metricas = dict(linha)
+        metricas['hoje'] = hoje
+        metricas['dias_grafico'] = dias_grafico
+        return metricas
+    
+    def calcular_estatisticas(self, metricas: Optional[Dict] = None) -> Dict:
+        """
+        Estatísticas dos cards do dashboard
+        
+        Args:
+            metricas: Resultado de obter_metricas (calculado se None)
+        
+        Returns:
+            Dicionário de estatísticas
+        """
+        m = metricas or self.obter_metricas()
+        
+        return {
+            'vendas_hoje': int(m['vendas_hoje']),
+            'valor_hoje': float(m['valor_hoje']),
+            'vendas_mes': int(m['vendas_mes']),
+            'valor_mes': float(m['valor_mes']),
+            'clientes_ativos': int(m['clientes_ativos']),
+            'vendas_abertas': int(m['vendas_abertas']),
+            'valor_aberto': float(m['valor_aberto']),
+            'vendas_vencidas': int(m['vendas_vencidas']),
+            'valor_vencido': float(m['valor_vencido']),
+            'pagamentos_hoje': int(m['pagamentos_hoje']),
+            'valor_recebido_hoje': float(m['valor_recebido_hoje'])
+        }
+    
+    def obter_alertas(self, metricas: Optional[Dict] = None) -> List[Dict]:
+        """
+        Alertas do dashboard
+        
+        Args:
+            metricas: Resultado de obter_metricas (calculado se None)
+        
+        Returns:
+            Lista de alertas
+        """
+        m = metricas or self.obter_metricas()
+        alertas = []
+        
+        clientes_inadimplentes = int(m['clientes_inadimplentes'])
+        if clientes_inadimplentes > 0:
+            gerada_em = m['inadimplencia_gerada_em']
+            situacao = f"situação de {gerada_em:%d/%m %H:%M}" if gerada_em else 'situação ainda não processada'
+            alertas.append({
+                'tipo': 'danger',
+                'icone': 'fas fa-exclamation-triangle',
+                'titulo': f'{clientes_inadimplentes} cliente(s) inadimplente(s)',
+                'descricao': (
+                    f"{int(m['vendas_inadimplentes'])} venda(s) em aberto há mais de "
+                    f"{DIAS_INADIMPLENCIA} dias ({situacao})"
+                ),
+                'link': '/relatorios/inadimplentes',
+                'link_texto': 'Ver inadimplentes'
+            })
+        
+        vendas_vencem_hoje = int(m['vendas_vencem_hoje'])
+        if vendas_vencem_hoje > 0:
+            alertas.append({
+                'tipo': 'warning',
+                'icone': 'fas fa-clock',
+                'titulo': f'{vendas_vencem_hoje} venda(s) vencem hoje',
+                'descricao': 'Acompanhe os pagamentos',
+                'link': f"/vendas?data_vencimento={m['hoje']}",
+                'link_texto': 'Ver vendas'
+            })
+        
+        clientes_limite = int(m['clientes_limite'])
+        if clientes_limite > 0:
+            alertas.append({
+                'tipo': 'info',
+                'icone': 'fas fa-credit-card',
+                'titulo': f'{clientes_limite} cliente(s) próximo(s) do limite',
+                'descricao': 'Mais de 80% do limite de crédito utilizado',
+                'link': '/clientes?filtro=limite',
+                'link_texto': 'Ver clientes'
+            })
+        
+        return alertas
+    
+    def obter_dados_graficos(self, metricas: Optional[Dict] = None) -> Dict:
+        """
+        Séries dos gráficos do dashboard
+        
+        Args:
+            metricas: Resultado de obter_metricas (calculado se None)
+        
+        Returns:
+            Dicionário com vendas dos últimos dias, pagamentos por forma e status
+        """
+        m = metricas or self.obter_metricas()
+        
+        return {
+            'vendas_7_dias': [
+                {'data': dia.strftime('%d/%m'), 'valor': float(m[f'vendas_dia_{indice}'])}
+                for indice, dia in enumerate(m['dias_grafico'])
+            ],
+            'pagamentos_forma': [
+                {'forma': forma, 'total': float(m[f'forma_{forma}'])}
+                for forma in FORMAS_PAGAMENTO.values()
+                if m[f'forma_{forma}']
+            ],
+            'status_vendas': [
+                {'status': status, 'quantidade': int(m[f'status_{status}'])}
+                for status in STATUS_VENDA.values()
+                if m[f'status_{status}']
+            ]
+        }
+    
+    def obter_clientes_maior_divida(self, limite: int = 5) -> List:
+        """
+        Clientes com maior valor em aberto (lido do saldo consolidado)
+        
+        Args:
+            limite: Quantidade de clientes
+        
+        Returns:
+            Linhas (id, nome, total_aberto, num_vendas)
+        """
+        num_vendas = db.select(
+            db.func.count(Venda.id)
+        ).where(
+            Venda.cliente_id == Cliente.id,
+            Venda.status == STATUS_VENDA['ABERTA']
+        ).scalar_subquery()
+        
+        return self.db.session.query(
+            Cliente.id,
+            Cliente.nome,
+            Cliente.saldo_aberto.label('total_aberto'),
+            num_vendas.label('num_vendas')
+        ).filter(
+            Cliente.ativo == True,
+            Cliente.saldo_aberto > 0
+        ).order_by(
+            Cliente.saldo_aberto.desc()
+        ).limit(limite).all()
+    
+    def obter_dashboard(self) -> Dict:
+        """
+        Todos os dados da página do dashboard
+        
+        Returns:
+            Dicionário com stats, alertas, dados_graficos, clientes_maior_divida
+            e vendas_recentes
+        """
+        metricas = self.obter_metricas()
+        
+        return {
+            'stats': self.calcular_estatisticas(metricas),
+            'alertas': self.obter_alertas(metricas),
+            'dados_graficos': self.obter_dados_graficos(metricas),
+            'clientes_maior_divida': self.obter_clientes_maior_divida(),
+            'vendas_recentes': Venda.query.order_by(Venda.data_criacao.desc()).limit(5).all()
+        }
@@ -0,0 +1,362 @@
+"""
+ExportService - Exportação de vendas, itens, pagamentos e clientes (CSV/XLSX)
+
+As linhas vêm do banco em blocos de EXPORTACAO_TAMANHO_BLOCO por um cursor
+do servidor (yield_per) e vão direto para a resposta: o CSV é enviado em
+pedaços à medida que é lido e o XLSX é montado pelo xlsxwriter em modo de
+memória constante. Não há limite de linhas e a memória usada não cresce com
+o tamanho da exportação.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import select
+
+from app import db
+from app.models import Cliente, Venda, ItemVenda, Pagamento, InadimplenciaCliente
+from app.utils.constants import (
+    EXPORT_FORMATS, EXPORTACAO_TAMANHO_BLOCO,
+    FORMAS_PAGAMENTO_LABELS, STATUS_VENDA_LABELS
+)
+from app.utils.moeda import formatar_csv, formatar_csv_coluna
+
+
+# Tipos de coluna: como cada valor é escrito no CSV e na planilha
+TEXTO = 'texto'
+INTEIRO = 'inteiro'
+MOEDA = 'moeda'
+QUANTIDADE = 'quantidade'
+DATA = 'data'
+DATA_HORA = 'data_hora'
+SIM_NAO = 'sim_nao'
+
+# Linhas por aba no XLSX (limite do Excel, contando o cabeçalho)
+MAX_LINHAS_ABA = 1048576
+
+MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+class ExportService:
+    """Service para exportação de dados em CSV e XLSX"""
+
+    TIPOS = ('vendas', 'itens', 'pagamentos', 'clientes')
+
+    def __init__(self):
+        self.db = db
+
+    def resposta(self, tipo: str, formato: str = 'csv', filtros: Dict = None) -> Response:
+        """
+        Resposta HTTP com a exportação
+
+        Args:
+            tipo: 'vendas', 'itens', 'pagamentos' ou 'clientes'
+            formato: 'csv' ou 'xlsx'
+            filtros: Filtros da listagem correspondente
+
+        Returns:
+            Response em fluxo (CSV) ou arquivo temporário (XLSX)
+
+        Raises:
+            ValueError: Se o tipo ou o formato não forem suportados
+        """
+        formato = (formato or 'csv').lower()
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Exportação desconhecida: {tipo}")
+        if formato not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação não suportado: {formato}")
+
+        nome_arquivo = f"{tipo}_{date.today().strftime('%Y%m%d')}.{formato}"
+
+        if formato == 'xlsx':
+            arquivo = tempfile.TemporaryFile()
+            self.gerar_xlsx(tipo, arquivo, filtros)
+            arquivo.seek(0)
+            return send_file(arquivo, mimetype=MIMETYPES['xlsx'], as_attachment=True,
+                             download_name=nome_arquivo, max_age=0)
+
+        resposta = Response(stream_with_context(self.gerar_csv(tipo, filtros)), mimetype=MIMETYPES['csv'])
+        resposta.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        resposta.headers['Cache-Control'] = 'no-store'
+        # Sem buffer no proxy: o download começa com o primeiro bloco
+        resposta.headers['X-Accel-Buffering'] = 'no'
+        return resposta
+
+    def gerar_csv(self, tipo: str, filtros: Dict = None) -> Iterator[str]:
+        """
+        CSV em pedaços (ponto e vírgula, vírgula decimal e BOM, como o Excel
+        em português espera)
+
+        O cabeçalho é enviado antes da consulta; depois, um pedaço por bloco
+        de linhas lido do cursor, convertido coluna a coluna.
+        """
+        colunas, consulta = self._exportacao(tipo, filtros)
+        conversores = [_conversor_coluna_csv(tipo_coluna) for _, tipo_coluna in colunas]
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';', lineterminator='\r\n')
+        buffer.write('\ufeff')
+        escritor.writerow([titulo for titulo, _ in colunas])
+        yield buffer.getvalue()
+
+        for bloco in self._blocos(consulta):
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows(zip(*[
+                converter(valores) for converter, valores in zip(conversores, zip(*bloco))
+            ]))
+            yield buffer.getvalue()
+
+    def gerar_xlsx(self, tipo: str, arquivo, filtros: Dict = None) -> int:
+        """
+        Gravar a exportação em XLSX no arquivo informado
+
+        O xlsxwriter em modo de memória constante grava cada linha em disco
+        assim que ela é escrita; acima do limite de linhas do Excel os dados
+        continuam em uma nova aba.
+
+        Args:
+            tipo: Tipo de exportação
+            arquivo: Arquivo binário aberto para escrita
+            filtros: Filtros da listagem correspondente
+
+        Returns:
+            Número de linhas exportadas
+        """
+        import xlsxwriter
+
+        colunas, consulta = self._exportacao(tipo, filtros)
+        planilha = xlsxwriter.Workbook(arquivo, {'constant_memory': True})
+        try:
+            formatos = {
+                MOEDA: planilha.add_format({'num_format': '#,##0.00'}),
+                QUANTIDADE: planilha.add_format({'num_format': '#,##0.000'}),
+                DATA: planilha.add_format({'num_format': 'dd/mm/yyyy'}),
+                DATA_HORA: planilha.add_format({'num_format': 'dd/mm/yyyy hh:mm'}),
+            }
+            negrito = planilha.add_format({'bold': True})
+            escritas = [_escrita_xlsx(tipo_coluna, formatos.get(tipo_coluna)) for _, tipo_coluna in colunas]
+
+            abas = 0
+            aba = None
+            numero = MAX_LINHAS_ABA
+            total = 0
+            for bloco in self._blocos(consulta):
+                for linha in bloco:
+                    if numero >= MAX_LINHAS_ABA:
+                        abas += 1
+                        aba = planilha.add_worksheet(tipo.capitalize() if abas == 1 else f"{tipo.capitalize()} {abas}")
+                        aba.write_row(0, 0, [titulo for titulo, _ in colunas], negrito)
+                        aba.freeze_panes(1, 0)
+                        numero = 1
+                    for coluna, (escrever, valor) in enumerate(zip(escritas, linha)):
+                        if valor is not None:
+                            escrever(aba, numero, coluna, valor)
+                    numero += 1
+                    total += 1
+
+            if aba is None:
+                aba = planilha.add_worksheet(tipo.capitalize())
+                aba.write_row(0, 0, [titulo for titulo, _ in colunas], negrito)
+        finally:
+            planilha.close()
+
+        return total
+
+    def _blocos(self, consulta) -> Iterator[List[Tuple]]:
+        """Linhas da consulta em blocos, por cursor do servidor"""
+        resultado = self.db.session.execute(
+            consulta.execution_options(yield_per=EXPORTACAO_TAMANHO_BLOCO)
+        )
+        try:
+            for bloco in resultado.partitions():
+                yield bloco
+        finally:
+            resultado.close()
+
+    def _exportacao(self, tipo: str, filtros: Optional[Dict]) -> Tuple[List[Tuple[str, str]], object]:
+        """Colunas (título, tipo) e consulta de um tipo de exportação"""
+        definicao = {
+            'vendas': self._vendas,
+            'itens': self._itens,
+            'pagamentos': self._pagamentos,
+            'clientes': self._clientes,
+        }[tipo]
+        campos, consulta = definicao(filtros or {})
+        return [(titulo, tipo_coluna) for titulo, _, tipo_coluna in campos], consulta
+
+    # Definições (título, expressão, tipo de coluna)
+
+    def _vendas(self, filtros: Dict) -> Tuple[List[Tuple], object]:
+        from app.services import venda_service
+
+        campos = [
+            ('Venda', Venda.id, INTEIRO),
+            ('Data', Venda.data_venda, DATA),
+            ('Cliente', Cliente.nome, TEXTO),
+            ('CPF', Cliente.cpf, TEXTO),
+            ('Subtotal', Venda.subtotal, MOEDA),
+            ('Total', Venda.total, MOEDA),
+            ('Pago', Venda.valor_pago, MOEDA),
+            ('Restante', Venda.valor_restante, MOEDA),
+            ('Vencimento', Venda.data_vencimento, DATA),
+            ('Quitada em', Venda.data_pagamento, DATA),
+            ('Status', Venda.status, 'status'),
+            ('Observações', Venda.observacoes, TEXTO),
+        ]
+        consulta = select(*[expressao for _, expressao, _ in campos]).join(Cliente, Venda.cliente_id == Cliente.id)
+        consulta = venda_service.aplicar_filtros(consulta, filtros)
+        return campos, consulta.order_by(Venda.data_venda, Venda.id)
+
+    def _itens(self, filtros: Dict) -> Tuple[List[Tuple], object]:
+        from app.services import venda_service
+
+        campos = [
+            ('Venda', Venda.id, INTEIRO),
+            ('Data', Venda.data_venda, DATA),
+            ('Cliente', Cliente.nome, TEXTO),
+            ('Descrição', ItemVenda.descricao, TEXTO),
+            ('Quantidade', ItemVenda.quantidade, QUANTIDADE),
+            ('Valor Unitário', ItemVenda.valor_unitario, MOEDA),
+            ('Subtotal', ItemVenda.subtotal, MOEDA),
+        ]
+        consulta = (
+            select(*[expressao for _, expressao, _ in campos])
+            .join(Venda, ItemVenda.venda_id == Venda.id)
+            .join(Cliente, Venda.cliente_id == Cliente.id)
+        )
+        consulta = venda_service.aplicar_filtros(consulta, filtros)
+        return campos, consulta.order_by(Venda.data_venda, Venda.id, ItemVenda.id)
+
+    def _pagamentos(self, filtros: Dict) -> Tuple[List[Tuple], object]:
+        campos = [
+            ('Pagamento', Pagamento.id, INTEIRO),
+            ('Data', Pagamento.data_pagamento, DATA),
+            ('Venda', Pagamento.venda_id, INTEIRO),
+            ('Cliente', Cliente.nome, TEXTO),
+            ('Forma', Pagamento.forma_pagamento, 'forma_pagamento'),
+            ('Valor', Pagamento.valor, MOEDA),
+            ('Recebido', Pagamento.valor_recebido, MOEDA),
+            ('Troco', Pagamento.troco, MOEDA),
+            ('Observações', Pagamento.observacoes, TEXTO),
+        ]
+        consulta = (
+            select(*[expressao for _, expressao, _ in campos])
+            .join(Venda, Pagamento.venda_id == Venda.id)
+            .join(Cliente, Venda.cliente_id == Cliente.id)
+        )
+
+        if filtros.get('cliente_id'):
+            consulta = consulta.where(Venda.cliente_id == filtros['cliente_id'])
+        forma_pagamento = filtros.get('forma_pagamento')
+        if forma_pagamento and forma_pagamento != 'todas':
+            consulta = consulta.where(Pagamento.forma_pagamento == forma_pagamento)
+        data_inicio = _data(filtros.get('data_inicio'))
+        if data_inicio:
+            consulta = consulta.where(Pagamento.data_pagamento >= data_inicio)
+        data_fim = _data(filtros.get('data_fim'))
+        if data_fim:
+            consulta = consulta.where(Pagamento.data_pagamento <= data_fim)
+
+        return campos, consulta.order_by(Pagamento.data_pagamento, Pagamento.id)
+
+    def _clientes(self, filtros: Dict) -> Tuple[List[Tuple], object]:
+        campos = [
+            ('Cliente', Cliente.id, INTEIRO),
+            ('Nome', Cliente.nome, TEXTO),
+            ('CPF', Cliente.cpf, TEXTO),
+            ('Telefone', Cliente.telefone, TEXTO),
+            ('Endereço', Cliente.endereco, TEXTO),
+            ('Limite de Crédito', Cliente.limite_credito, MOEDA),
+            ('Saldo em Aberto', Cliente.saldo_aberto, MOEDA),
+            ('Saldo Vencido', Cliente.expressao_saldo_vencido(), MOEDA),
+            ('Vencimento Mais Antigo', Cliente.data_vencimento_mais_antiga, DATA),
+            ('Ativo', Cliente.ativo, SIM_NAO),
+            ('Cadastro', Cliente.data_cadastro, DATA_HORA),
+            ('Observações', Cliente.observacoes, TEXTO),
+        ]
+        consulta = select(*[expressao for _, expressao, _ in campos])
+
+        filtro = filtros.get('filtro')
+        if filtro == 'ativos':
+            consulta = consulta.where(Cliente.ativo == True)
+        elif filtro == 'inativos':
+            consulta = consulta.where(Cliente.ativo == False)
+        elif filtro == 'inadimplentes':
+            consulta = consulta.where(
+                Cliente.ativo == True,
+                Cliente.id.in_(InadimplenciaCliente.ids_inadimplentes())
+            )
+        elif filtro == 'limite':
+            consulta = consulta.where(
+                Cliente.ativo == True,
+                Cliente.saldo_aberto >= (Cliente.limite_credito * 0.8)
+            )
+        condicao_busca = Cliente.condicao_busca(filtros.get('q') or '')
+        if condicao_busca is not None:
+            consulta = consulta.where(condicao_busca)
+
+        return campos, consulta.order_by(Cliente.nome, Cliente.id)
+
+
+def _data(valor) -> Optional[date]:
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _data_csv(valor) -> str:
+    # Datas se repetem muito numa exportação (dia da venda, vencimento)
+    return '' if valor is None else valor.strftime('%d/%m/%Y')
+
+
+def _data_hora_csv(valor) -> str:
+    return '' if valor is None else valor.strftime('%d/%m/%Y %H:%M')
+
+
+def _texto_csv(valor) -> str:
+    return '' if valor is None else valor
+
+
+_CONVERSORES_CSV = {
+    TEXTO: _texto_csv,
+    INTEIRO: _texto_csv,
+    MOEDA: formatar_csv,
+    QUANTIDADE: formatar_csv,
+    DATA: _data_csv,
+    DATA_HORA: _data_hora_csv,
+    SIM_NAO: lambda valor: 'Sim' if valor else 'Não',
+    'status': lambda valor: STATUS_VENDA_LABELS.get(valor, valor or ''),
+    'forma_pagamento': lambda valor: FORMAS_PAGAMENTO_LABELS.get(valor, valor or ''),
+}
+
+
+def _conversor_coluna_csv(tipo_coluna: str):
+    """Função que converte uma coluna inteira de um bloco para o CSV"""
+    if tipo_coluna in (MOEDA, QUANTIDADE):
+        return formatar_csv_coluna
+    converter = _CONVERSORES_CSV[tipo_coluna]
+    return lambda valores: list(map(converter, valores))
+
+
+def _escrita_xlsx(tipo_coluna: str, formato):
+    """Função que escreve uma célula do tipo de coluna na planilha"""
+    if tipo_coluna in (MOEDA, QUANTIDADE):
+        return lambda aba, linha, coluna, valor: aba.write_number(linha, coluna, float(valor), formato)
+    if tipo_coluna == INTEIRO:
+        return lambda aba, linha, coluna, valor: aba.write_number(linha, coluna, valor)
+    if tipo_coluna in (DATA, DATA_HORA):
+        return lambda aba, linha, coluna, valor: aba.write_datetime(linha, coluna, valor, formato)
+
+    converter = _CONVERSORES_CSV[tipo_coluna]
+    return lambda aba, linha, coluna, valor: aba.write_string(linha, coluna, converter(valor))
@@ -0,0 +1,56 @@
+"""
+InadimplenciaService - Processamento da situação de inadimplência dos clientes
+"""
+
+from datetime import date
+from typing import Optional, Tuple
+
+from app import db
+from app.models import InadimplenciaCliente, InadimplenciaSnapshot
+from app.utils.cache import registrar_tags
+
+
+class InadimplenciaService:
+    """
+    Service para a tabela de inadimplência
+
+    A situação de cada cliente (vendas e valor vencidos, maior atraso) é
+    gravada em InadimplenciaCliente por um processamento completo, feito
+    toda noite pelo comando refresh-delinquency ou sob demanda pela tela
+    de inadimplentes. Pagamentos e vendas reprocessam só os clientes
+    afetados, na mesma transação. As telas leem a tabela e mostram a hora
+    do último processamento.
+    """
+
+    TAG_CACHE = 'inadimplencia'
+
+    def __init__(self):
+        self.db = db
+
+    def atualizar(self, data_referencia: Optional[date] = None) -> Tuple[bool, str, Optional[InadimplenciaSnapshot]]:
+        """
+        Reprocessar a inadimplência de todos os clientes
+
+        Args:
+            data_referencia: Data em que os atrasos são contados (padrão: hoje)
+
+        Returns:
+            Tupla (sucesso, mensagem, processamento gravado)
+        """
+        try:
+            InadimplenciaCliente.recalcular(data_referencia=data_referencia)
+            registrar_tags(self.db.session, self.TAG_CACHE)
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            return False, f"Erro ao processar inadimplência: {str(e)}", None
+
+        snapshot = InadimplenciaSnapshot.ultimo()
+        return True, (
+            f"Inadimplência processada: {snapshot.clientes_inadimplentes} cliente(s) inadimplente(s), "
+            f"{snapshot.clientes_vencidos} com vendas vencidas"
+        ), snapshot
+
+    def situacao(self) -> Optional[InadimplenciaSnapshot]:
+        """Último processamento completo (None se nunca processado)"""
+        return InadimplenciaSnapshot.ultimo()
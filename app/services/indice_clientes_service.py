@@ -0,0 +1,236 @@
+"""
+IndiceClientesService - Índice de trigramas dos nomes para o autocomplete
+"""
+
+import math
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+from app import db
+from app.models import Cliente
+
+
+def normalizar_nome(texto: str) -> str:
+    """Minúsculas, sem acentos e só com letras, dígitos e espaços simples"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in texto).split())
+
+
+def trigramas(texto_normalizado: str, ultima_incompleta: bool = False) -> Set[str]:
+    """
+    Trigramas de cada palavra, com dois espaços antes e um depois (como o pg_trgm)
+    
+    Com ultima_incompleta, a última palavra não recebe o espaço final: no
+    autocomplete ela ainda está sendo digitada e deve casar como prefixo.
+    """
+    palavras = texto_normalizado.split()
+    resultado = set()
+    for posicao, palavra in enumerate(palavras):
+        fim = '' if ultima_incompleta and posicao == len(palavras) - 1 else ' '
+        palavra = f'  {palavra}{fim}'
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+
+class IndiceClientesService:
+    """
+    Índice de trigramas dos nomes de clientes, local ao processo
+    
+    O índice é construído na primeira busca do processo, recebe as
+    gravações de Cliente confirmadas neste processo e, a cada
+    INTERVALO_SINCRONIZACAO segundos, lê os clientes alterados por outros
+    workers (data_atualizacao posterior à última leitura). Exclusões não
+    deixam marca: quando a contagem de clientes não bate com o índice, os
+    IDs que não existem mais são retirados.
+    """
+    
+    COBERTURA_MINIMA = 0.5
+    INTERVALO_SINCRONIZACAO = 30
+    
+    def __init__(self):
+        self.db = db
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._clientes: Dict[int, Tuple[str, frozenset, bool]] = {}  # id -> (nome, trigramas, ativo)
+        self._construido = False
+        self._marca_atualizacao = None
+        self._ultima_sincronizacao = 0.0
+    
+    def buscar(self, termo: str, limite: int = 10, apenas_ativos: bool = True) -> List[int]:
+        """
+        IDs dos clientes cujo nome mais se parece com o termo
+        
+        Ignora acentos e tolera erros de digitação: a nota é a fração dos
+        trigramas do termo presentes no nome, com bônus quando o termo é
+        uma palavra do nome, começa uma palavra ou aparece no meio dela.
+        
+        Args:
+            termo: Texto digitado
+            limite: Quantidade máxima de IDs
+            apenas_ativos: Ignorar clientes inativos
+        
+        Returns:
+            IDs em ordem decrescente de relevância
+        """
+        consulta = normalizar_nome(termo)
+        trigramas_consulta = trigramas(consulta, ultima_incompleta=True)
+        if not trigramas_consulta:
+            return []
+        
+        self._sincronizar()
+        
+        with self._lock:
+            # Quem cobre `minimo` trigramas aparece em alguma das n - minimo + 1 listas menores
+            listas = sorted((self._postings.get(t, ()) for t in trigramas_consulta), key=len)
+            minimo = max(1, math.ceil(len(listas) * self.COBERTURA_MINIMA))
+            candidatos = set().union(*listas[:len(listas) - minimo + 1])
+            
+            notas = []
+            for cliente_id in candidatos:
+                nome, trigramas_nome, ativo = self._clientes[cliente_id]
+                if apenas_ativos and not ativo:
+                    continue
+                
+                compartilhados = sum(1 for ids in listas if cliente_id in ids)
+                if compartilhados < minimo:
+                    continue
+                
+                # Cobertura dos trigramas do termo, desempatada pela similaridade do nome inteiro
+                nota = (compartilhados / len(listas)
+                        + compartilhados / (len(listas) + len(trigramas_nome) - compartilhados))
+                if f' {consulta} ' in f' {nome} ':
+                    nota += 3.0
+                elif nome.startswith(consulta) or f' {consulta}' in nome:
+                    nota += 2.0
+                elif consulta in nome:
+                    nota += 1.0
+                
+                notas.append((-nota, nome, cliente_id))
+        
+        notas.sort()
+        return [cliente_id for _, _, cliente_id in notas[:limite]]
+    
+    def construir(self):
+        """(Re)construir o índice com todos os clientes"""
+        linhas = self.db.session.execute(
+            db.select(Cliente.id, Cliente.nome, Cliente.ativo, Cliente.data_atualizacao)
+        ).all()
+        
+        with self._lock:
+            self._postings = {}
+            self._clientes = {}
+            for linha in linhas:
+                self._indexar(linha.id, linha.nome, linha.ativo)
+            
+            self._marca_atualizacao = max((linha.data_atualizacao for linha in linhas
+                                           if linha.data_atualizacao), default=None)
+            self._ultima_sincronizacao = time.monotonic()
+            self._construido = True
+    
+    def atualizar(self, cliente_id: int, nome: Optional[str], ativo: bool = True):
+        """Reindexar um cliente (nome None remove do índice)"""
+        with self._lock:
+            if not self._construido:
+                return
+            self._remover(cliente_id)
+            if nome:
+                self._indexar(cliente_id, nome, ativo)
+    
+    def remover(self, cliente_id: int):
+        """Tirar um cliente do índice"""
+        with self._lock:
+            self._remover(cliente_id)
+    
+    def limpar(self):
+        """Descartar o índice (reconstruído na próxima busca)"""
+        with self._lock:
+            self._postings = {}
+            self._clientes = {}
+            self._construido = False
+    
+    def _sincronizar(self):
+        """Construir o índice ou ler os clientes alterados por outros processos"""
+        if not self._construido:
+            with self._lock:
+                if not self._construido:
+                    self.construir()
+            return
+        
+        if time.monotonic() - self._ultima_sincronizacao < self.INTERVALO_SINCRONIZACAO:
+            return
+        
+        self._ultima_sincronizacao = time.monotonic()
+        consulta = db.select(Cliente.id, Cliente.nome, Cliente.ativo, Cliente.data_atualizacao)
+        if self._marca_atualizacao is not None:
+            consulta = consulta.where(Cliente.data_atualizacao >= self._marca_atualizacao)
+        
+        for linha in self.db.session.execute(consulta):
+            self.atualizar(linha.id, linha.nome, linha.ativo)
+            if self._marca_atualizacao is None or linha.data_atualizacao > self._marca_atualizacao:
+                self._marca_atualizacao = linha.data_atualizacao
+        
+        # Clientes excluídos por outros processos
+        total = self.db.session.execute(db.select(db.func.count(Cliente.id))).scalar()
+        if total != len(self._clientes):
+            existentes = set(self.db.session.execute(db.select(Cliente.id)).scalars())
+            with self._lock:
+                for cliente_id in set(self._clientes) - existentes:
+                    self._remover(cliente_id)
+    
+    def _indexar(self, cliente_id: int, nome: str, ativo: bool):
+        normalizado = normalizar_nome(nome)
+        trigramas_nome = frozenset(trigramas(normalizado))
+        self._clientes[cliente_id] = (normalizado, trigramas_nome, bool(ativo))
+        for trigrama in trigramas_nome:
+            self._postings.setdefault(trigrama, set()).add(cliente_id)
+    
+    def _remover(self, cliente_id: int):
+        entrada = self._clientes.pop(cliente_id, None)
+        if entrada is None:
+            return
+        for trigrama in entrada[1]:
+            ids = self._postings.get(trigrama)
+            if ids is not None:
+                ids.discard(cliente_id)
+                if not ids:
+                    del self._postings[trigrama]
+
+
+# Manter o índice em dia com as gravações confirmadas neste processo
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_clientes_indice(session, flush_context):
+    """Guardar nome e situação dos clientes gravados até o commit"""
+    pendentes = session.info.setdefault('indice_clientes_pendentes', {})
+    
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Cliente) and obj.id is not None:
+            pendentes[obj.id] = (obj.nome, obj.ativo)
+    for obj in session.deleted:
+        if isinstance(obj, Cliente) and obj.id is not None:
+            pendentes[obj.id] = (None, False)
+    
+    if not pendentes:
+        session.info.pop('indice_clientes_pendentes', None)
+
+
+@event.listens_for(Session, 'after_commit')
+def atualizar_indice_clientes(session):
+    """Aplicar ao índice os clientes gravados"""
+    from app.services import indice_clientes_service
+    
+    for cliente_id, (nome, ativo) in session.info.pop('indice_clientes_pendentes', {}).items():
+        indice_clientes_service.atualizar(cliente_id, nome, ativo)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def descartar_clientes_indice(session, previous_transaction):
+    """Nada foi gravado: esquecer os clientes pendentes"""
+    if not session.in_transaction():
+        session.info.pop('indice_clientes_pendentes', None)
@@ -0,0 +1,450 @@
+"""
+PagamentoService - Lógica de negócio para pagamentos simples e múltiplos
+"""
+
+from datetime import datetime, date
+from decimal import Decimal
+from typing import List, Dict, Optional, Tuple
+
+from app import db
+from app.models import Venda, ItemVenda, Pagamento, PagamentoMultiplo, PagamentoMultiploDetalhe, ResumoDiario, InadimplenciaCliente
+from app.models.cliente import sincronizar_saldos
+from app.utils.constants import STATUS_VENDA, FORMAS_PAGAMENTO
+from app.utils.helpers import format_currency
+from app.utils.money import Money, somar
+from app.utils.cache import registrar_tags, tag_cliente_vendas, tag_mes_vendas
+
+
+class PagamentoService:
+    """Service para operações com pagamentos"""
+    
+    def __init__(self):
+        self.db = db
+    
+    def registrar_pagamento_simples(self, venda_id: int, dados_pagamento: Dict) -> Tuple[bool, str, Optional[Pagamento]]:
+        """
+        Registrar pagamento de uma única venda
+        
+        Args:
+            venda_id: ID da venda
+            dados_pagamento: {'valor': float, 'forma_pagamento': str,
+                              'valor_recebido': float, 'observacoes': str}
+        
+        Returns:
+            Tuple[sucesso, mensagem, pagamento]
+        """
+        try:
+            venda = Venda.query.get(venda_id)
+            if not venda:
+                return False, "Venda não encontrada", None
+            
+            if venda.status == STATUS_VENDA['PAGA']:
+                return False, "Venda já está paga", None
+            
+            forma_pagamento = dados_pagamento.get('forma_pagamento', FORMAS_PAGAMENTO['DINHEIRO'])
+            if forma_pagamento not in FORMAS_PAGAMENTO.values():
+                return False, "Forma de pagamento inválida", None
+            
+            valor = Money.de(dados_pagamento.get('valor', 0))
+            valor_recebido = dados_pagamento.get('valor_recebido')
+            
+            if forma_pagamento == FORMAS_PAGAMENTO['DINHEIRO'] and valor_recebido:
+                if Money.de(valor_recebido) < valor:
+                    return False, "Valor recebido não pode ser menor que o valor do pagamento", None
+            
+            try:
+                pagamento = venda.registrar_pagamento(
+                    valor=valor,
+                    forma_pagamento=forma_pagamento,
+                    valor_recebido=valor_recebido,
+                    observacoes=dados_pagamento.get('observacoes')
+                )
+            except ValueError as e:
+                return False, str(e), None
+            
+            self.db.session.commit()
+            
+            mensagem = f"Pagamento de {format_currency(pagamento.valor)} registrado com sucesso!"
+            if venda.status == STATUS_VENDA['PAGA']:
+                mensagem += f" Venda #{venda.id} quitada."
+            
+            return True, mensagem, pagamento
+        
+        except Exception as e:
+            self.db.session.rollback()
+            return False, f"Erro ao registrar pagamento: {str(e)}", None
+    
+    def processar_pagamento_multiplo(self, cliente_id: int, vendas_selecionadas: List[Dict], valor_pago: float,
+                                     forma_pagamento: str, valor_recebido: float = None,
+                                     observacoes: str = None) -> Tuple[bool, str, Optional[PagamentoMultiplo]]:
+        """
+        Processar pagamento múltiplo com valores informados por venda
+        
+        Args:
+            cliente_id: ID do cliente
+            vendas_selecionadas: Lista [{'venda_id': int, 'valor_pago': float}]
+            valor_pago: Valor total pago
+            forma_pagamento: Forma de pagamento
+            valor_recebido: Valor recebido (dinheiro)
+            observacoes: Observações
+        
+        Returns:
+            Tuple[sucesso, mensagem, pagamento_multiplo]
+        """
+        valores_por_venda = {}
+        for selecionada in vendas_selecionadas:
+            venda_id = int(selecionada['venda_id'])
+            valores_por_venda[venda_id] = valores_por_venda.get(venda_id, Money()) + \
+                Money.de(selecionada.get('valor_pago', 0))
+        
+        return self.liquidar_vendas(
+            cliente_id=cliente_id,
+            vendas_ids=list(valores_por_venda),
+            valor_pago=valor_pago,
+            forma_pagamento=forma_pagamento,
+            valor_recebido=valor_recebido,
+            observacoes=observacoes,
+            valores_por_venda=valores_por_venda
+        )
+    
+    def liquidar_vendas(self, cliente_id: int, vendas_ids: List[int], valor_pago, forma_pagamento: str,
+                        valor_recebido=None, observacoes: str = None,
+                        valores_por_venda: Dict[int, Decimal] = None) -> Tuple[bool, str, Optional[PagamentoMultiplo]]:
+        """
+        Liquidar várias vendas de um cliente em uma única operação
+        
+        O valor pago é distribuído entre as vendas proporcionalmente ao valor
+        restante de cada uma (centavos exatos, método dos maiores restos), a
+        menos que valores_por_venda seja informado. Todas as notas
+        selecionadas são encerradas; se o valor pago não cobrir o total, a
+        diferença vira uma nova nota de restante. Detalhes, pagamentos e
+        atualizações das vendas são gravados em lote, na mesma transação.
+        
+        Args:
+            cliente_id: ID do cliente
+            vendas_ids: IDs das vendas em aberto a liquidar
+            valor_pago: Valor total pago
+            forma_pagamento: Forma de pagamento
+            valor_recebido: Valor recebido (dinheiro)
+            observacoes: Observações
+            valores_por_venda: Valores definidos por venda {venda_id: valor}
+        
+        Returns:
+            Tuple[sucesso, mensagem, pagamento_multiplo]
+        """
+        try:
+            if forma_pagamento not in FORMAS_PAGAMENTO.values():
+                return False, "Forma de pagamento inválida", None
+            
+            vendas_ids = list(dict.fromkeys(int(v) for v in vendas_ids))
+            if not vendas_ids:
+                return False, "Selecione pelo menos uma venda", None
+            
+            # Uma leitura (com bloqueio) de todas as vendas envolvidas
+            linhas = self.db.session.execute(
+                db.select(
+                    Venda.id, Venda.data_venda, Venda.status, Venda.total, Venda.valor_pago, Venda.valor_restante
+                ).where(
+                    Venda.id.in_(vendas_ids),
+                    Venda.cliente_id == cliente_id,
+                    Venda.status == STATUS_VENDA['ABERTA']
+                ).order_by(
+                    Venda.data_vencimento, Venda.id
+                ).with_for_update()
+            ).all()
+            
+            if len(linhas) != len(vendas_ids):
+                return False, "Uma ou mais vendas são inválidas", None
+            
+            valor_total_notas = somar(l.valor_restante for l in linhas)
+            valor_pago = Money.de(valor_pago)
+            
+            if valor_pago <= 0:
+                return False, "Valor pago deve ser maior que zero", None
+            
+            if valor_pago > valor_total_notas:
+                return False, f"Valor pago maior que o total das vendas ({format_currency(valor_total_notas)})", None
+            
+            if forma_pagamento == FORMAS_PAGAMENTO['DINHEIRO'] and valor_recebido:
+                valor_recebido = Money.de(valor_recebido)
+                if valor_recebido < valor_pago:
+                    return False, "Valor recebido não pode ser menor que o valor pago", None
+            else:
+                valor_recebido = None
+            
+            # Distribuição do valor entre as vendas
+            if valores_por_venda:
+                alocacao = [Money.de(valores_por_venda.get(l.id, 0)) for l in linhas]
+                
+                for linha, valor in zip(linhas, alocacao):
+                    if valor < 0 or valor > Money.de(linha.valor_restante):
+                        return False, f"Valor inválido para a venda #{linha.id}", None
+                
+                if sum(alocacao) != valor_pago:
+                    return False, "A soma dos valores por venda difere do valor pago", None
+            else:
+                alocacao = valor_pago.distribuir(l.valor_restante for l in linhas)
+            
+            pagamento_multiplo = PagamentoMultiplo(
+                cliente_id=cliente_id,
+                valor_total_notas=valor_total_notas.decimal,
+                valor_pago=valor_pago.decimal,
+                forma_pagamento=forma_pagamento,
+                valor_recebido=valor_recebido.decimal if valor_recebido else None,
+                data_pagamento=date.today(),
+                observacoes=observacoes
+            )
+            
+            self.db.session.add(pagamento_multiplo)
+            self.db.session.flush()  # Para obter o ID
+            
+            venda_restante = self._gravar_liquidacao(pagamento_multiplo, linhas, alocacao)
+            
+            self.db.session.commit()
+            
+            mensagem = f"Pagamento múltiplo de {format_currency(valor_pago)} registrado em {len(linhas)} venda(s)."
+            if venda_restante:
+                mensagem += f" Saldo restante de {format_currency(venda_restante.total)} gerou a venda #{venda_restante.id}."
+            
+            return True, mensagem, pagamento_multiplo
+        
+        except Exception as e:
+            self.db.session.rollback()
+            return False, f"Erro ao processar pagamento múltiplo: {str(e)}", None
+    
+    def aplicar_pagamento_multiplo(self, pagamento_multiplo: PagamentoMultiplo) -> Optional[Venda]:
+        """
+        Aplicar às vendas um pagamento múltiplo cujos detalhes já foram gravados
+        
+        Args:
+            pagamento_multiplo: Pagamento múltiplo com detalhes
+        
+        Returns:
+            Venda de restante criada, se houver
+        """
+        detalhes = self.db.session.execute(
+            db.select(
+                PagamentoMultiploDetalhe.venda_id, PagamentoMultiploDetalhe.valor_pago
+            ).where(
+                PagamentoMultiploDetalhe.pagamento_multiplo_id == pagamento_multiplo.id
+            ).order_by(PagamentoMultiploDetalhe.id)
+        ).all()
+        
+        valores = {d.venda_id: Money.de(d.valor_pago) for d in detalhes}
+        linhas = self.db.session.execute(
+            db.select(
+                Venda.id, Venda.data_venda, Venda.status, Venda.total, Venda.valor_pago, Venda.valor_restante
+            ).where(
+                Venda.id.in_(list(valores))
+            ).order_by(
+                Venda.data_vencimento, Venda.id
+            ).with_for_update()
+        ).all()
+        
+        return self._gravar_liquidacao(
+            pagamento_multiplo,
+            linhas,
+            [valores[l.id] for l in linhas],
+            gravar_detalhes=False
+        )
+    
+    def _gravar_liquidacao(self, pagamento_multiplo: PagamentoMultiplo, linhas, alocacao: List[Money],
+                           gravar_detalhes: bool = True) -> Optional[Venda]:
+        """
+        Gravar em lote os efeitos de um pagamento múltiplo
+        
+        Args:
+            pagamento_multiplo: Pagamento múltiplo já persistido (com ID)
+            linhas: Linhas (id, data_venda, status, total, valor_pago, valor_restante) das vendas
+            alocacao: Valor pago em cada venda, na ordem das linhas
+            gravar_detalhes: Se False, os detalhes já existem no banco
+        
+        Returns:
+            Venda de restante criada, se houver
+        """
+        session = self.db.session
+        alocacao = [Money.de(valor) for valor in alocacao]
+        data_pagamento = pagamento_multiplo.data_pagamento or date.today()
+        observacao = f"Pagamento múltiplo #{pagamento_multiplo.id}"
+        
+        if gravar_detalhes:
+            session.execute(db.insert(PagamentoMultiploDetalhe), [
+                {
+                    'pagamento_multiplo_id': pagamento_multiplo.id,
+                    'venda_id': linha.id,
+                    'valor_original': linha.valor_restante,
+                    'valor_pago': valor.decimal
+                }
+                for linha, valor in zip(linhas, alocacao)
+            ])
+        
+        pagamentos = [
+            {
+                'venda_id': linha.id,
+                'valor': valor.decimal,
+                'forma_pagamento': pagamento_multiplo.forma_pagamento,
+                'troco': Decimal('0.00'),
+                'data_pagamento': data_pagamento,
+                'observacoes': observacao
+            }
+            for linha, valor in zip(linhas, alocacao)
+            if valor > 0
+        ]
+        if pagamentos:
+            session.execute(db.insert(Pagamento), pagamentos)
+        
+        # Todas as notas são encerradas: quitadas ou transferidas para o restante
+        tabela = Venda.__table__
+        session.execute(
+            tabela.update().where(
+                tabela.c.id == db.bindparam('b_id')
+            ).values(
+                valor_pago=db.bindparam('b_valor_pago'),
+                valor_restante=0,
+                status=STATUS_VENDA['PAGA'],
+                data_pagamento=data_pagamento,
+                data_atualizacao=datetime.utcnow()
+            ),
+            [
+                {'b_id': linha.id, 'b_valor_pago': (Money.de(linha.valor_pago) + valor).decimal}
+                for linha, valor in zip(linhas, alocacao)
+            ]
+        )
+        
+        # Descartar valores antigos das vendas já carregadas na sessão
+        mapper = db.inspect(Venda)
+        for linha in linhas:
+            venda = session.identity_map.get(mapper.identity_key_from_primary_key((linha.id,)))
+            if venda is not None:
+                session.expire(venda, ['valor_pago', 'valor_restante', 'status', 'data_pagamento', 'data_atualizacao'])
+        
+        # Gravações em lote não passam pelos eventos do ORM: somar os pagamentos e a
+        # mudança de status das vendas ao resumo diário, atualizar a inadimplência do
+        # cliente e marcar as entradas de cache do cliente e dos meses das vendas aqui
+        variacoes = {}
+        for pagamento in pagamentos:
+            ResumoDiario.variacao_pagamento(
+                variacoes, pagamento['data_pagamento'], pagamento['forma_pagamento'], pagamento['valor']
+            )
+        for linha in linhas:
+            if linha.status != STATUS_VENDA['PAGA']:
+                ResumoDiario.variacao_venda(variacoes, linha.data_venda, linha.status, linha.total, sinal=-1)
+                ResumoDiario.variacao_venda(variacoes, linha.data_venda, STATUS_VENDA['PAGA'], linha.total)
+        ResumoDiario.somar_variacoes(variacoes)
+        InadimplenciaCliente.recalcular(clientes_ids=[pagamento_multiplo.cliente_id])
+        registrar_tags(
+            session,
+            tag_cliente_vendas(pagamento_multiplo.cliente_id),
+            *{tag_mes_vendas(linha.data_venda) for linha in linhas}
+        )
+        
+        valor_restante = (somar(l.valor_restante for l in linhas) - sum(alocacao)).decimal
+        
+        if valor_restante <= 0:
+            sincronizar_saldos(session, [pagamento_multiplo.cliente_id])
+            return None
+        
+        # Nota de restante (o flush também atualiza o saldo do cliente)
+        venda_restante = Venda(
+            cliente_id=pagamento_multiplo.cliente_id,
+            data_venda=data_pagamento,
+            subtotal=valor_restante,
+            total=valor_restante,
+            eh_restante=True,
+            pagamento_multiplo_id=pagamento_multiplo.id,
+            observacoes=f"Restante do pagamento múltiplo #{pagamento_multiplo.id}"
+        )
+        venda_restante.gerar_data_vencimento()
+        venda_restante.itens.append(ItemVenda.criar_item_restante(
+            valor_restante=valor_restante,
+            notas_ids=[linha.id for linha in linhas],
+            data_pagamento=data_pagamento
+        ))
+        
+        session.add(venda_restante)
+        session.flush()
+        
+        return venda_restante
+    
+    def obter_vendas_em_aberto_cliente(self, cliente_id: int) -> List[Dict]:
+        """
+        Listar vendas em aberto de um cliente para a tela de pagamento múltiplo
+        
+        Args:
+            cliente_id: ID do cliente
+        
+        Returns:
+            Lista de dicionários com os dados de cada venda
+        """
+        vendas = Venda.query.filter(
+            Venda.cliente_id == cliente_id,
+            Venda.status == STATUS_VENDA['ABERTA']
+        ).order_by(Venda.data_vencimento, Venda.id).all()
+        
+        resumos = Venda.carregar_resumos(vendas, limite_itens=3)
+        
+        resultado = []
+        for venda in vendas:
+            resumo = resumos[venda.id]
+            resultado.append({
+                'id': venda.id,
+                'data_venda': venda.data_venda.strftime('%d/%m/%Y'),
+                'data_vencimento': venda.data_vencimento.strftime('%d/%m/%Y'),
+                'total': float(venda.total),
+                'total_formatado': format_currency(venda.total),
+                'valor_pago': float(resumo['valor_pago']),
+                'valor_pago_formatado': format_currency(resumo['valor_pago']),
+                'valor_restante': float(resumo['valor_restante']),
+                'valor_restante_formatado': format_currency(resumo['valor_restante']),
+                'esta_vencida': venda.esta_vencida,
+                'dias_atraso': venda.dias_atraso,
+                'vencido_text': f"({venda.dias_atraso} dias em atraso)" if venda.esta_vencida else '',
+                'eh_restante': venda.eh_restante,
+                'itens_count': resumo['itens_count'],
+                'itens_resumo': ', '.join(resumo['itens_descricoes'])
+            })
+        
+        return resultado
+    
+    def gerar_dados_comprovante(self, pagamento_id: int, tipo: str = 'individual') -> Optional[Dict]:
+        """
+        Gerar dados para impressão do comprovante
+        
+        Args:
+            pagamento_id: ID do pagamento (simples ou múltiplo)
+            tipo: 'individual' ou 'multiplo'
+        
+        Returns:
+            Dados do comprovante ou None se não encontrado
+        """
+        if tipo == 'multiplo':
+            pagamento = PagamentoMultiplo.query.get(pagamento_id)
+        else:
+            pagamento = Pagamento.query.get(pagamento_id)
+        
+        if not pagamento:
+            return None
+        
+        dados = pagamento.gerar_comprovante_dados()
+        dados['tipo'] = tipo
+        return dados
+    
+    def calcular_troco(self, valor_recebido: float, valor_total: float) -> Tuple[bool, str, float]:
+        """
+        Calcular troco para pagamento em dinheiro
+        
+        Args:
+            valor_recebido: Valor entregue pelo cliente
+            valor_total: Valor a pagar
+        
+        Returns:
+            Tuple[valido, mensagem, troco]
+        """
+        recebido = Money.de(valor_recebido)
+        total = Money.de(valor_total)
+        
+        if recebido < total:
+            return False, f"Valor recebido insuficiente. Faltam {format_currency(total - recebido)}", 0.0
+        
+        troco = recebido - total
+        return True, f"Troco: {format_currency(troco)}", float(troco)
@@ -0,0 +1,354 @@
+"""
+RelatorioService - Relatórios agregados (contas a receber por faixa de atraso
+e inadimplentes)
+"""
+
+import csv
+import io
+from itertools import islice
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import case, func
+
+from app import db
+from app.models import Cliente, Venda, InadimplenciaCliente, InadimplenciaSnapshot
+from app.utils.cache import response_cache
+from app.utils.constants import STATUS_VENDA, ITEMS_PER_PAGE, EXPORTACAO_TAMANHO_BLOCO
+from app.utils.moeda import formatar_csv, formatar_csv_coluna
+from app.utils.paginacao import PaginaCursor, paginar_por_cursor
+
+
+class RelatorioService:
+    """
+    Service para relatórios
+
+    Contas a receber é calculado por uma única consulta agregada no banco e
+    guardado inteiro no cache de respostas, com a data-base na chave e as
+    tags dos modelos de que depende. Paginação, filtros de exibição e CSV
+    trabalham sobre esse resultado, sem consultar o banco de novo.
+
+    Inadimplentes lê a tabela de inadimplência (InadimplenciaCliente),
+    processada toda noite e atualizada pelos pagamentos, paginada por cursor
+    no próprio banco.
+    """
+
+    # Faixas de atraso: (chave, título, dias mínimo, dias máximo), contadas do vencimento à data-base
+    FAIXAS_ATRASO = (
+        ('a_vencer', 'A vencer', None, -1),
+        ('ate_30', '0-30 dias', 0, 30),
+        ('de_31_a_60', '31-60 dias', 31, 60),
+        ('de_61_a_90', '61-90 dias', 61, 90),
+        ('acima_90', 'Mais de 90 dias', 91, None),
+    )
+    ORDENACOES = ('atraso', 'total', 'nome')
+    TAGS_CACHE = ('vendas', 'pagamentos', 'clientes')
+
+    def __init__(self):
+        self.db = db
+
+    # Contas a receber
+
+    def contas_a_receber(self, data_base: Optional[date] = None, cursor: Optional[str] = None,
+                         per_page: int = ITEMS_PER_PAGE, apenas_vencidos: bool = False,
+                         ordenacao: str = 'atraso') -> Dict:
+        """
+        Saldo em aberto de cada cliente distribuído pelas faixas de atraso
+
+        Args:
+            data_base: Data de referência para contar os dias de atraso (padrão: hoje)
+            cursor: Página desejada (número, como devolvido em next_cursor/prev_cursor)
+            per_page: Clientes por página
+            apenas_vencidos: Só clientes com alguma venda vencida na data-base
+            ordenacao: 'atraso' (maior atraso primeiro), 'total' ou 'nome'
+
+        Returns:
+            Dicionário com data-base, faixas, página de clientes (PaginaCursor)
+            e totais por faixa
+        """
+        if ordenacao not in self.ORDENACOES:
+            raise ValueError(f"Ordenação inválida: {ordenacao}")
+
+        relatorio = self.calcular_contas_a_receber(data_base)
+        linhas = self._filtrar_ordenar(relatorio['clientes'], apenas_vencidos, ordenacao)
+
+        totais = relatorio['totais']
+        if apenas_vencidos:
+            totais = self._totalizar(linhas)
+
+        return {
+            'data_base': relatorio['data_base'],
+            'faixas': relatorio['faixas'],
+            'pagination': self._paginar(linhas, cursor, per_page),
+            'totais': totais,
+            'calculado_em': relatorio['calculado_em']
+        }
+
+    def calcular_contas_a_receber(self, data_base: Optional[date] = None) -> Dict:
+        """
+        Relatório completo da data-base (em cache até a próxima gravação de
+        vendas, pagamentos ou clientes)
+
+        Uma única consulta agrupada por cliente soma o restante das vendas em
+        aberto em cada faixa (SUM com CASE sobre o vencimento); as faixas são
+        limites de data calculados aqui, então a consulta usa o índice de
+        data_vencimento e não depende de funções de data do banco.
+
+        Returns:
+            Dicionário com 'data_base', 'faixas', 'clientes' (lista de dicts)
+            e 'totais'
+        """
+        data_base = data_base or date.today()
+
+        chave = f"relatorio:contas_receber:{data_base.isoformat()}"
+        relatorio = response_cache.get(chave)
+        if relatorio is not None:
+            return relatorio
+
+        colunas_faixas = []
+        for chave_faixa, _, minimo, maximo in self.FAIXAS_ATRASO:
+            # dias de atraso >= minimo  <=>  vencimento <= data_base - minimo
+            condicoes = []
+            if minimo is not None:
+                condicoes.append(Venda.data_vencimento <= data_base - timedelta(days=minimo))
+            if maximo is not None:
+                condicoes.append(Venda.data_vencimento >= data_base - timedelta(days=maximo))
+            colunas_faixas.append(
+                func.sum(case((db.and_(*condicoes), Venda.valor_restante), else_=0)).label(chave_faixa)
+            )
+
+        consulta = (
+            db.session.query(
+                Cliente.id, Cliente.nome, Cliente.cpf, Cliente.telefone,
+                func.count(Venda.id).label('vendas'),
+                func.min(Venda.data_vencimento).label('vencimento_mais_antigo'),
+                func.sum(Venda.valor_restante).label('total'),
+                *colunas_faixas
+            )
+            .join(Venda, Venda.cliente_id == Cliente.id)
+            .filter(
+                # Vendas em aberto, inclusive as já marcadas como vencidas
+                Venda.status != STATUS_VENDA['PAGA'],
+                Venda.valor_restante > 0
+            )
+            .group_by(Cliente.id, Cliente.nome, Cliente.cpf, Cliente.telefone)
+        )
+
+        clientes = []
+        for linha in consulta:
+            dias_atraso = (data_base - linha.vencimento_mais_antigo).days
+            clientes.append({
+                'cliente_id': linha.id,
+                'nome': linha.nome,
+                'cpf': linha.cpf,
+                'telefone': linha.telefone,
+                'vendas': linha.vendas,
+                'vencimento_mais_antigo': linha.vencimento_mais_antigo,
+                'dias_atraso': max(dias_atraso, 0),
+                'total': _decimal(linha.total),
+                **{chave_faixa: _decimal(getattr(linha, chave_faixa)) for chave_faixa, *_ in self.FAIXAS_ATRASO}
+            })
+
+        relatorio = {
+            'data_base': data_base,
+            'faixas': [(chave_faixa, titulo) for chave_faixa, titulo, *_ in self.FAIXAS_ATRASO],
+            'clientes': clientes,
+            'totais': self._totalizar(clientes),
+            'calculado_em': datetime.now()
+        }
+        response_cache.set(chave, relatorio, tags=self.TAGS_CACHE)
+        return relatorio
+
+    def contas_a_receber_csv(self, data_base: Optional[date] = None, apenas_vencidos: bool = False,
+                             ordenacao: str = 'atraso') -> Iterator[str]:
+        """
+        Relatório completo em CSV (ponto e vírgula e vírgula decimal, como
+        as exportações)
+        """
+        relatorio = self.calcular_contas_a_receber(data_base)
+        linhas = self._filtrar_ordenar(relatorio['clientes'], apenas_vencidos, ordenacao)
+        faixas = relatorio['faixas']
+
+        cabecalho = ['Cliente', 'Nome', 'CPF', 'Telefone', 'Vendas em Aberto',
+                     'Vencimento Mais Antigo', 'Dias de Atraso']
+        cabecalho += [titulo for _, titulo in faixas] + ['Total']
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';', lineterminator='\r\n')
+        buffer.write('\ufeff')
+        escritor.writerow([f"Contas a receber em {relatorio['data_base']:%d/%m/%Y}"])
+        escritor.writerow(cabecalho)
+        valores = list(zip(*[
+            formatar_csv_coluna([linha[chave] for linha in linhas])
+            for chave in [chave for chave, _ in faixas] + ['total']
+        ]))
+        for linha, valores_linha in zip(linhas, valores):
+            escritor.writerow([
+                linha['cliente_id'], linha['nome'], linha['cpf'] or '', linha['telefone'] or '',
+                linha['vendas'], f"{linha['vencimento_mais_antigo']:%d/%m/%Y}", linha['dias_atraso'],
+                *valores_linha
+            ])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        totais = self._totalizar(linhas) if apenas_vencidos else relatorio['totais']
+        escritor.writerow(['', 'Total', '', '', totais['vendas'], '', '',
+                           *[formatar_csv(totais[chave]) for chave, _ in faixas],
+                           formatar_csv(totais['total'])])
+        yield buffer.getvalue()
+
+    # Inadimplentes
+
+    def inadimplentes(self, cursor: Optional[str] = None, per_page: int = ITEMS_PER_PAGE,
+                      ordenacao: str = 'atraso', apenas_inadimplentes: bool = False) -> Dict:
+        """
+        Clientes com vendas vencidas, pela tabela de inadimplência
+
+        Args:
+            cursor: Cursor da página (como devolvido em next_cursor/prev_cursor)
+            per_page: Clientes por página
+            ordenacao: 'atraso' (maior atraso primeiro), 'total' ou 'nome'
+            apenas_inadimplentes: Só clientes com atraso acima de DIAS_INADIMPLENCIA
+
+        Returns:
+            Dicionário com a página de clientes (PaginaCursor), os totais e o
+            último processamento (InadimplenciaSnapshot ou None)
+        """
+        if ordenacao not in self.ORDENACOES:
+            raise ValueError(f"Ordenação inválida: {ordenacao}")
+
+        consulta = self._consulta_inadimplentes(apenas_inadimplentes)
+        totais = consulta.with_entities(
+            func.count(InadimplenciaCliente.cliente_id).label('clientes'),
+            func.coalesce(func.sum(InadimplenciaCliente.vendas_vencidas), 0).label('vendas_vencidas'),
+            func.coalesce(func.sum(InadimplenciaCliente.valor_vencido), 0).label('valor_vencido'),
+            func.coalesce(func.sum(InadimplenciaCliente.valor_inadimplente), 0).label('valor_inadimplente')
+        ).one()
+
+        return {
+            'pagination': paginar_por_cursor(
+                consulta, self._ordem_inadimplentes(ordenacao),
+                cursor=cursor,
+                per_page=per_page,
+                montar=lambda linha: linha
+            ),
+            'totais': {
+                'clientes': totais.clientes,
+                'vendas_vencidas': int(totais.vendas_vencidas),
+                'valor_vencido': _decimal(totais.valor_vencido),
+                'valor_inadimplente': _decimal(totais.valor_inadimplente)
+            },
+            'situacao': InadimplenciaSnapshot.ultimo()
+        }
+
+    def inadimplentes_csv(self, ordenacao: str = 'atraso', apenas_inadimplentes: bool = False) -> Iterator[str]:
+        """Relatório de inadimplentes completo em CSV, lido em blocos"""
+        situacao = InadimplenciaSnapshot.ultimo()
+        consulta = self._consulta_inadimplentes(apenas_inadimplentes).order_by(*(
+            coluna.desc() if descendente else coluna.asc()
+            for coluna, descendente in self._ordem_inadimplentes(ordenacao)
+        ))
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';', lineterminator='\r\n')
+        buffer.write('\ufeff')
+        if situacao:
+            escritor.writerow([f"Inadimplentes - situação de {situacao.gerado_em:%d/%m/%Y %H:%M}"])
+        escritor.writerow(['Cliente', 'Nome', 'CPF', 'Telefone', 'Vendas Vencidas', 'Valor Vencido',
+                           'Vendas Inadimplentes', 'Valor Inadimplente', 'Vencimento Mais Antigo',
+                           'Dias de Atraso', 'Inadimplente'])
+        linhas = iter(consulta.yield_per(EXPORTACAO_TAMANHO_BLOCO))
+        while True:
+            bloco = list(islice(linhas, EXPORTACAO_TAMANHO_BLOCO))
+            if not bloco:
+                break
+            vencidos = formatar_csv_coluna([_decimal(linha.valor_vencido) for linha in bloco])
+            inadimplentes = formatar_csv_coluna([_decimal(linha.valor_inadimplente) for linha in bloco])
+            escritor.writerows(
+                [
+                    linha.cliente_id, linha.nome, linha.cpf or '', linha.telefone or '',
+                    linha.vendas_vencidas, vencido,
+                    linha.vendas_inadimplentes, inadimplente,
+                    f"{linha.vencimento_mais_antigo:%d/%m/%Y}", linha.dias_atraso,
+                    'Sim' if linha.inadimplente else 'Não'
+                ]
+                for linha, vencido, inadimplente in zip(bloco, vencidos, inadimplentes)
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def _consulta_inadimplentes(self, apenas_inadimplentes: bool):
+        consulta = db.session.query(
+            InadimplenciaCliente.cliente_id, Cliente.nome, Cliente.cpf, Cliente.telefone,
+            InadimplenciaCliente.vendas_vencidas, InadimplenciaCliente.valor_vencido,
+            InadimplenciaCliente.vendas_inadimplentes, InadimplenciaCliente.valor_inadimplente,
+            InadimplenciaCliente.vencimento_mais_antigo, InadimplenciaCliente.dias_atraso,
+            InadimplenciaCliente.inadimplente
+        ).join(
+            Cliente, Cliente.id == InadimplenciaCliente.cliente_id
+        ).filter(
+            Cliente.ativo == True
+        )
+        if apenas_inadimplentes:
+            consulta = consulta.filter(InadimplenciaCliente.inadimplente == True)
+        return consulta
+
+    @staticmethod
+    def _ordem_inadimplentes(ordenacao: str):
+        if ordenacao == 'nome':
+            return [(Cliente.nome, False), (InadimplenciaCliente.cliente_id, False)]
+        if ordenacao == 'total':
+            return [(InadimplenciaCliente.valor_vencido, True), (InadimplenciaCliente.cliente_id, True)]
+        return [(InadimplenciaCliente.dias_atraso, True), (InadimplenciaCliente.valor_vencido, True),
+                (InadimplenciaCliente.cliente_id, True)]
+
+    # Apoio
+
+    def _filtrar_ordenar(self, clientes: List[Dict], apenas_vencidos: bool, ordenacao: str) -> List[Dict]:
+        if apenas_vencidos:
+            # Vencida: vencimento antes da data-base (como Venda.esta_vencida)
+            clientes = [c for c in clientes if c['dias_atraso'] > 0]
+
+        if ordenacao == 'nome':
+            return sorted(clientes, key=lambda c: (c['nome'].lower(), c['cliente_id']))
+        if ordenacao == 'total':
+            return sorted(clientes, key=lambda c: (-c['total'], c['cliente_id']))
+        return sorted(clientes, key=lambda c: (-c['dias_atraso'], -c['total'], c['cliente_id']))
+
+    def _totalizar(self, clientes: List[Dict]) -> Dict:
+        totais = {'clientes': len(clientes), 'vendas': sum(c['vendas'] for c in clientes)}
+        for chave in ['total'] + [chave for chave, *_ in self.FAIXAS_ATRASO]:
+            totais[chave] = sum((c[chave] for c in clientes), Decimal('0.00'))
+        return totais
+
+    @staticmethod
+    def _paginar(linhas: List, cursor: Optional[str], per_page: int) -> PaginaCursor:
+        """Página do resultado em memória (o cursor é o número da página)"""
+        try:
+            pagina = max(int(cursor), 1) if cursor else 1
+        except ValueError:
+            pagina = 1
+
+        per_page = max(per_page, 1)
+        ultima = max((len(linhas) + per_page - 1) // per_page, 1)
+        pagina = min(pagina, ultima)
+        inicio = (pagina - 1) * per_page
+
+        return PaginaCursor(
+            linhas[inicio:inicio + per_page], per_page,
+            cursor=str(pagina) if pagina > 1 else None,
+            next_cursor=str(pagina + 1) if pagina < ultima else None,
+            prev_cursor=str(pagina - 1) if pagina > 1 else None,
+            total=len(linhas)
+        )
+
+
+def _decimal(valor) -> Decimal:
+    return Decimal(valor or 0).quantize(Decimal('0.01'))
+
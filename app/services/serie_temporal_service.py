@@ -0,0 +1,181 @@
+"""
+SerieTemporalService - Séries temporais agrupadas por dia, semana ou mês
+"""
+
+from datetime import date, timedelta
+from typing import List, Dict, Optional
+
+from app import db
+from app.models import Venda, ResumoDiario
+from app.utils.constants import STATUS_VENDA
+from app.utils.cache import response_cache
+
+
+class SerieTemporalService:
+    """Service para séries temporais de vendas, recebimentos, crédito e vencidos"""
+    
+    GRANULARIDADES = ('dia', 'semana', 'mes')
+    METRICAS = ('vendas', 'recebimentos', 'novo_credito', 'vencido')
+    MAX_PERIODOS = 1000
+    TAGS_CACHE = ('series', 'vendas', 'pagamentos')
+    
+    def __init__(self):
+        self.db = db
+    
+    def obter_series(self, data_inicio: date, data_fim: date, granularidade: str = 'dia',
+                     metricas: Optional[List[str]] = None) -> Dict:
+        """
+        Séries de um período, uma consulta GROUP BY por métrica
+        
+        Args:
+            data_inicio: Primeiro dia do período
+            data_fim: Último dia do período
+            granularidade: 'dia', 'semana' (início na segunda) ou 'mes'
+            metricas: Métricas desejadas (padrão: todas)
+        
+        Returns:
+            Dicionário com os períodos e uma lista de valores por métrica,
+            com zero nos períodos sem movimento
+        """
+        metricas = list(metricas or self.METRICAS)
+        
+        if granularidade not in self.GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        invalidas = [m for m in metricas if m not in self.METRICAS]
+        if invalidas:
+            raise ValueError(f"Métrica(s) inválida(s): {', '.join(invalidas)}")
+        if data_inicio > data_fim:
+            raise ValueError("Data inicial maior que a data final")
+        
+        periodos = self.gerar_periodos(data_inicio, data_fim, granularidade)
+        if len(periodos) > self.MAX_PERIODOS:
+            raise ValueError(f"Período muito longo para a granularidade '{granularidade}'")
+        
+        chave = f"series:{data_inicio}:{data_fim}:{granularidade}:{','.join(metricas)}"
+        resultado = response_cache.get(chave)
+        if resultado is not None:
+            return resultado
+        
+        series = {}
+        for metrica in metricas:
+            valores = getattr(self, f'_consultar_{metrica}')(data_inicio, data_fim, granularidade)
+            series[metrica] = [float(valores.get(periodo, 0)) for periodo in periodos]
+        
+        resultado = {
+            'granularidade': granularidade,
+            'data_inicio': data_inicio.isoformat(),
+            'data_fim': data_fim.isoformat(),
+            'periodos': [periodo.isoformat() for periodo in periodos],
+            'series': series
+        }
+        response_cache.set(chave, resultado, tags=self.TAGS_CACHE)
+        return resultado
+    
+    @staticmethod
+    def inicio_periodo(dia: date, granularidade: str) -> date:
+        """Primeiro dia do período que contém a data"""
+        if granularidade == 'semana':
+            return dia - timedelta(days=dia.weekday())
+        if granularidade == 'mes':
+            return dia.replace(day=1)
+        return dia
+    
+    @staticmethod
+    def gerar_periodos(data_inicio: date, data_fim: date, granularidade: str) -> List[date]:
+        """Início de cada período entre as datas (inclusive)"""
+        periodos = []
+        atual = SerieTemporalService.inicio_periodo(data_inicio, granularidade)
+        
+        while atual <= data_fim:
+            periodos.append(atual)
+            if granularidade == 'semana':
+                atual += timedelta(days=7)
+            elif granularidade == 'mes':
+                atual = (atual.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                atual += timedelta(days=1)
+        
+        return periodos
+    
+    def expressao_periodo(self, coluna, granularidade: str):
+        """
+        Expressão SQL com o início do período de uma coluna de data
+        
+        Args:
+            coluna: Coluna Date
+            granularidade: 'dia', 'semana' ou 'mes'
+        
+        Returns:
+            Expressão agrupável (data ou texto AAAA-MM-DD, conforme o banco)
+        """
+        dialeto = self.db.session.get_bind().dialect.name
+        
+        if dialeto == 'mysql':
+            if granularidade == 'semana':
+                return db.func.subdate(coluna, db.func.weekday(coluna))
+            if granularidade == 'mes':
+                return db.func.date_format(coluna, '%Y-%m-01')
+            return coluna
+        
+        # SQLite (ambiente de testes)
+        if granularidade == 'semana':
+            return db.func.date(coluna, 'weekday 0', '-6 days')
+        if granularidade == 'mes':
+            return db.func.strftime('%Y-%m-01', coluna)
+        return db.func.date(coluna)
+    
+    def _agrupar(self, coluna_data, coluna_valor, granularidade, *condicoes) -> Dict[date, float]:
+        """Executar um SUM agrupado por período"""
+        periodo = self.expressao_periodo(coluna_data, granularidade).label('periodo')
+        
+        linhas = self.db.session.execute(
+            db.select(
+                periodo,
+                db.func.coalesce(db.func.sum(coluna_valor), 0)
+            ).where(*condicoes).group_by(periodo)
+        ).all()
+        
+        return {
+            date.fromisoformat(str(inicio)[:10]): total
+            for inicio, total in linhas
+        }
+    
+    def _consultar_vendas(self, data_inicio, data_fim, granularidade):
+        """Valor vendido por período (resumo diário)"""
+        return self._agrupar(
+            ResumoDiario.data, ResumoDiario.vendas_valor, granularidade,
+            ResumoDiario.data >= data_inicio,
+            ResumoDiario.data <= data_fim
+        )
+    
+    def _consultar_recebimentos(self, data_inicio, data_fim, granularidade):
+        """Valor recebido por período (resumo diário)"""
+        return self._agrupar(
+            ResumoDiario.data, ResumoDiario.pagamentos_valor, granularidade,
+            ResumoDiario.data >= data_inicio,
+            ResumoDiario.data <= data_fim
+        )
+    
+    def _consultar_novo_credito(self, data_inicio, data_fim, granularidade):
+        """Crédito concedido por período (vendas novas, sem notas de restante)"""
+        return self._agrupar(
+            Venda.data_venda, Venda.total, granularidade,
+            Venda.data_venda >= data_inicio,
+            Venda.data_venda <= data_fim,
+            Venda.eh_restante == False
+        )
+    
+    def _consultar_vencido(self, data_inicio, data_fim, granularidade):
+        """Saldo ainda devido, pelo período em que venceu"""
+        fim = min(data_fim, date.today() - timedelta(days=1))
+        
+        return self._agrupar(
+            Venda.data_vencimento, Venda.valor_restante, granularidade,
+            Venda.data_vencimento >= data_inicio,
+            Venda.data_vencimento <= fim,
+            Venda.status != STATUS_VENDA['PAGA']
+        )
+    
+    def limpar_cache(self):
+        """Descartar todas as séries em cache"""
+        response_cache.invalidate('series')
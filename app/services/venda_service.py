@@ -5,21 +5,26 @@ VendaService - Lógica de negócio para gestão de vendas
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy import func, or_, and_, desc, asc
+from sqlalchemy import func, and_, asc
 from sqlalchemy.orm import joinedload
 
 from app import db
-from app.models import Cliente, Venda, ItemVenda, Pagamento
+from app.models import Cliente, Venda, ItemVenda, Pagamento, LinhaVenda
 from app.utils.constants import (
     STATUS_VENDA, DIAS_VENCIMENTO_PADRAO, VALOR_MINIMO_VENDA,
     ITEMS_PER_PAGE
 )
 from app.utils.helpers import parse_currency, format_currency
+from app.utils.money import Money, ZERO
+from app.utils.paginacao import paginar_por_cursor
+from app.utils.cache import response_cache, tag_cliente_vendas, tag_mes_vendas
 
 
 class VendaService:
     """Service para operações com vendas"""
     
+    MESES_TAGS_ESTATISTICAS = 36
+    
     def __init__(self):
         self.db = db
     
@@ -58,7 +63,7 @@ class VendaService:
             venda.gerar_data_vencimento()
             
             # Adicionar itens
-            total_venda = Decimal('0.00')
+            total_venda = ZERO
             for item_data in itens:
                 try:
                     descricao = item_data.get('descricao', '').strip()
@@ -84,7 +89,7 @@ class VendaService:
                     item.calcular_subtotal()
                     
                     venda.itens.append(item)
-                    total_venda += item.subtotal
+                    total_venda += Money.de(item.subtotal)
                     
                 except (ValueError, TypeError) as e:
                     return False, f"Erro nos dados do item: {str(e)}", None
@@ -231,7 +236,8 @@ class VendaService:
         
         Args:
             venda_id: ID da venda
-            incluir_relacionamentos: Se deve incluir cliente, itens e pagamentos
+            incluir_relacionamentos: Se deve incluir o cliente (itens e
+                pagamentos são relacionamentos dinâmicos, consultados à parte)
             
         Returns:
             Venda ou None
@@ -239,109 +245,57 @@ class VendaService:
         query = Venda.query
         
         if incluir_relacionamentos:
-            query = query.options(
-                joinedload(Venda.cliente),
-                joinedload(Venda.itens),
-                joinedload(Venda.pagamentos)
-            )
+            query = query.options(joinedload(Venda.cliente))
         
         return query.get(venda_id)
     
-    def listar_vendas(self, filtros: Dict = None, page: int = 1, per_page: int = ITEMS_PER_PAGE) -> Dict:
+    def listar_vendas(self, filtros: Dict = None, cursor: str = None, per_page: int = ITEMS_PER_PAGE) -> Dict:
         """
-        Listar vendas com filtros e paginação
+        Listar vendas com filtros e paginação por cursor
         
         Args:
             filtros: Dicionário com filtros
-            page: Página atual
+            cursor: Cursor da página (None para a primeira)
             per_page: Itens por página
             
         Returns:
-            Dict com resultados paginados e estatísticas
+            Dict com as vendas da página (LinhaVenda) e estatísticas
         """
         try:
-            # Query base
-            query = Venda.query.options(
-                joinedload(Venda.cliente),
-                joinedload(Venda.itens)
-            )
+            # Query base (projetada em LinhaVenda, com o cliente juntado, na paginação)
+            query = Venda.query
             
             # Aplicar filtros
-            if filtros:
-                # Filtro por cliente
-                if filtros.get('cliente_id'):
-                    query = query.filter(Venda.cliente_id == filtros['cliente_id'])
-                
-                # Filtro por status
-                status = filtros.get('status')
-                if status and status != 'todas':
-                    if status == 'abertas':
-                        query = query.filter(Venda.status == STATUS_VENDA['ABERTA'])
-                    elif status == 'pagas':
-                        query = query.filter(Venda.status == STATUS_VENDA['PAGA'])
-                    elif status == 'vencidas':
-                        query = query.filter(
-                            and_(
-                                Venda.status == STATUS_VENDA['ABERTA'],
-                                Venda.data_vencimento < date.today()
-                            )
-                        )
-                    elif status == 'restantes':
-                        query = query.filter(Venda.eh_restante == True)
-                
-                # Filtro por data
-                if filtros.get('data_inicio'):
-                    try:
-                        data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d').date()
-                        query = query.filter(Venda.data_venda >= data_inicio)
-                    except ValueError:
-                        pass
-                
-                if filtros.get('data_fim'):
-                    try:
-                        data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d').date()
-                        query = query.filter(Venda.data_venda <= data_fim)
-                    except ValueError:
-                        pass
-                
-                # Filtro por valor
-                if filtros.get('valor_min'):
-                    try:
-                        valor_min = Decimal(str(filtros['valor_min']))
-                        query = query.filter(Venda.total >= valor_min)
-                    except (ValueError, TypeError):
-                        pass
-                
-                if filtros.get('valor_max'):
-                    try:
-                        valor_max = Decimal(str(filtros['valor_max']))
-                        query = query.filter(Venda.total <= valor_max)
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Ordenação
+            query = self.aplicar_filtros(query, filtros)
+            
+            # Ordenação (sempre desempatada pelo id, que fecha a chave do cursor)
             ordenacao = filtros.get('ordenacao', 'data_desc') if filtros else 'data_desc'
+            tags_total = ('vendas',)
             
             if ordenacao == 'data_asc':
-                query = query.order_by(asc(Venda.data_venda))
+                ordem = [(Venda.data_venda, False), (Venda.id, False)]
             elif ordenacao == 'data_desc':
-                query = query.order_by(desc(Venda.data_venda))
+                ordem = [(Venda.data_venda, True), (Venda.id, True)]
             elif ordenacao == 'valor_asc':
-                query = query.order_by(asc(Venda.total))
+                ordem = [(Venda.total, False), (Venda.id, False)]
             elif ordenacao == 'valor_desc':
-                query = query.order_by(desc(Venda.total))
+                ordem = [(Venda.total, True), (Venda.id, True)]
             elif ordenacao == 'cliente':
-                query = query.join(Cliente).order_by(asc(Cliente.nome))
+                ordem = [(Cliente.nome, False), (Venda.id, False)]
+                tags_total = ('vendas', 'clientes')
             elif ordenacao == 'vencimento':
-                query = query.order_by(asc(Venda.data_vencimento))
+                ordem = [(Venda.data_vencimento, False), (Venda.id, False)]
             else:
-                query = query.order_by(desc(Venda.data_criacao))
+                ordem = [(Venda.data_criacao, True), (Venda.id, True)]
             
             # Paginação
-            pagination = query.paginate(
-                page=page,
+            pagination = paginar_por_cursor(
+                LinhaVenda.consulta(query), ordem,
+                cursor=cursor,
                 per_page=per_page,
-                error_out=False
+                contar_total=True,
+                tags_total=tags_total,
+                montar=LinhaVenda.da_linha
             )
             
             # Estatísticas
@@ -363,56 +317,109 @@ class VendaService:
                 'error': str(e)
             }
     
-    def buscar_vendas(self, termo: str, page: int = 1, per_page: int = ITEMS_PER_PAGE) -> Dict:
+    def aplicar_filtros(self, query, filtros: Dict = None):
+        """
+        Aplicar os filtros da listagem de vendas (cliente, status, período e valor)
+        
+        Args:
+            query: Query ou select sobre Venda
+            filtros: Dicionário com filtros (como em listar_vendas)
+            
+        Returns:
+            Query filtrada
+        """
+        if not filtros:
+            return query
+        
+        # Filtro por cliente
+        if filtros.get('cliente_id'):
+            query = query.filter(Venda.cliente_id == filtros['cliente_id'])
+        
+        # Filtro por status
+        status = filtros.get('status')
+        if status and status != 'todas':
+            if status == 'abertas':
+                query = query.filter(Venda.status == STATUS_VENDA['ABERTA'])
+            elif status == 'pagas':
+                query = query.filter(Venda.status == STATUS_VENDA['PAGA'])
+            elif status == 'vencidas':
+                query = query.filter(
+                    and_(
+                        Venda.status == STATUS_VENDA['ABERTA'],
+                        Venda.data_vencimento < date.today()
+                    )
+                )
+            elif status == 'restantes':
+                query = query.filter(Venda.eh_restante == True)
+        
+        # Filtro por data
+        if filtros.get('data_inicio'):
+            try:
+                data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d').date()
+                query = query.filter(Venda.data_venda >= data_inicio)
+            except ValueError:
+                pass
+        
+        if filtros.get('data_fim'):
+            try:
+                data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d').date()
+                query = query.filter(Venda.data_venda <= data_fim)
+            except ValueError:
+                pass
+        
+        # Filtro por valor
+        if filtros.get('valor_min'):
+            try:
+                valor_min = Decimal(str(filtros['valor_min']))
+                query = query.filter(Venda.total >= valor_min)
+            except (ValueError, TypeError):
+                pass
+        
+        if filtros.get('valor_max'):
+            try:
+                valor_max = Decimal(str(filtros['valor_max']))
+                query = query.filter(Venda.total <= valor_max)
+            except (ValueError, TypeError):
+                pass
+        
+        return query
+    
+    def buscar_vendas(self, termo: str, cursor: str = None, per_page: int = ITEMS_PER_PAGE) -> Dict:
         """
         Buscar vendas por termo
         
         Args:
             termo: Termo de busca
-            page: Página atual
+            cursor: Cursor da página (None para a primeira)
             per_page: Itens por página
             
         Returns:
             Dict com resultados paginados
         """
         if not termo or len(termo.strip()) < 2:
-            return self.listar_vendas(page=page, per_page=per_page)
+            return self.listar_vendas(cursor=cursor, per_page=per_page)
         
         termo = termo.strip()
         
-        # Query com busca
-        query = Venda.query.options(
-            joinedload(Venda.cliente),
-            joinedload(Venda.itens)
-        ).join(Cliente)
-        
-        # Buscar por ID da venda, nome do cliente ou observações
-        try:
-            # Tentar buscar por ID da venda
-            venda_id = int(termo)
-            query = query.filter(Venda.id == venda_id)
-        except ValueError:
-            # Buscar por texto
-            query = query.filter(
-                or_(
-                    Cliente.nome.ilike(f'%{termo}%'),
-                    Venda.observacoes.ilike(f'%{termo}%'),
-                    ItemVenda.descricao.ilike(f'%{termo}%')
-                )
-            ).join(ItemVenda, isouter=True)
-        
-        query = query.order_by(desc(Venda.data_criacao))
-        
-        # Paginação
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        if termo.isdigit():
+            # Número: buscar pelo ID da venda
+            pagination = paginar_por_cursor(
+                LinhaVenda.consulta(Venda.query.filter(Venda.id == int(termo))),
+                [(Venda.id, True)],
+                cursor=cursor,
+                per_page=per_page,
+                contar_total=True,
+                montar=LinhaVenda.da_linha
+            )
+        else:
+            # Texto: índice de busca (itens, observações e nome do cliente), por relevância
+            from app.services import busca_vendas_service
+            pagination = busca_vendas_service.buscar(termo, cursor=cursor, per_page=per_page)
         
         return {
             'vendas': pagination.items,
             'pagination': pagination,
+            'stats': self.calcular_estatisticas_vendas(),
             'total': pagination.total,
             'termo_busca': termo
         }
@@ -421,81 +428,72 @@ class VendaService:
         """
         Calcular estatísticas das vendas
         
+        Uma única consulta com agregação condicional (SUM/CASE), guardada no
+        cache pelo conjunto normalizado de filtros. A entrada é descartada
+        quando uma venda (ou pagamento) do cliente ou dos meses filtrados muda.
+        
         Args:
             filtros: Filtros aplicados (opcional)
             
         Returns:
             Dict com estatísticas
         """
+        cliente_id, data_inicio, data_fim = self._filtros_estatisticas(filtros)
+        hoje = date.today()
+        
+        chave = f"estatisticas_vendas:{hoje}:{cliente_id}:{data_inicio}:{data_fim}"
+        stats = response_cache.get(chave)
+        if stats is not None:
+            return stats
+        
         try:
-            # Query base para estatísticas
-            base_query = Venda.query
-            
-            # Aplicar mesmos filtros da listagem
-            if filtros:
-                if filtros.get('cliente_id'):
-                    base_query = base_query.filter(Venda.cliente_id == filtros['cliente_id'])
-                
-                if filtros.get('data_inicio'):
-                    try:
-                        data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d').date()
-                        base_query = base_query.filter(Venda.data_venda >= data_inicio)
-                    except ValueError:
-                        pass
-                
-                if filtros.get('data_fim'):
-                    try:
-                        data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d').date()
-                        base_query = base_query.filter(Venda.data_venda <= data_fim)
-                    except ValueError:
-                        pass
-            
-            # Total de vendas
-            total_vendas = base_query.count()
-            
-            # Vendas em aberto
-            vendas_abertas = base_query.filter(
-                Venda.status == STATUS_VENDA['ABERTA']
-            ).count()
-            
-            # Vendas pagas
-            vendas_pagas = base_query.filter(
-                Venda.status == STATUS_VENDA['PAGA']
-            ).count()
-            
-            # Vendas vencidas
-            vendas_vencidas = base_query.filter(
-                and_(
-                    Venda.status == STATUS_VENDA['ABERTA'],
-                    Venda.data_vencimento < date.today()
-                )
-            ).count()
-            
-            # Valor total em aberto
-            valor_total_aberto = base_query.filter(
-                Venda.status == STATUS_VENDA['ABERTA']
-            ).with_entities(func.sum(Venda.total)).scalar() or 0
-            
-            # Valor total vendido
-            valor_total_vendido = base_query.with_entities(
-                func.sum(Venda.total)
-            ).scalar() or 0
+            condicoes = []
+            if cliente_id:
+                condicoes.append(Venda.cliente_id == cliente_id)
+            if data_inicio:
+                condicoes.append(Venda.data_venda >= data_inicio)
+            if data_fim:
+                condicoes.append(Venda.data_venda <= data_fim)
+            
+            def contar(condicao):
+                return func.coalesce(func.sum(db.case((condicao, 1), else_=0)), 0)
+            
+            aberta = Venda.status == STATUS_VENDA['ABERTA']
+            
+            linha = self.db.session.execute(
+                db.select(
+                    func.count(Venda.id).label('total_vendas'),
+                    contar(aberta).label('vendas_abertas'),
+                    contar(Venda.status == STATUS_VENDA['PAGA']).label('vendas_pagas'),
+                    contar(and_(aberta, Venda.data_vencimento < hoje)).label('vendas_vencidas'),
+                    func.coalesce(func.sum(db.case((aberta, Venda.total), else_=0)), 0).label('valor_total_aberto'),
+                    func.coalesce(func.sum(Venda.total), 0).label('valor_total_vendido')
+                ).where(*condicoes)
+            ).one()
+            
+            total_vendas = linha.total_vendas
+            vendas_abertas = int(linha.vendas_abertas)
+            vendas_vencidas = int(linha.vendas_vencidas)
+            valor_total_vendido = linha.valor_total_vendido
             
             # Ticket médio
             ticket_medio = (valor_total_vendido / total_vendas) if total_vendas > 0 else 0
             
-            return {
+            stats = {
                 'total_vendas': total_vendas,
                 'vendas_abertas': vendas_abertas,
-                'vendas_pagas': vendas_pagas,
+                'vendas_pagas': int(linha.vendas_pagas),
                 'vendas_vencidas': vendas_vencidas,
-                'valor_total_aberto': float(valor_total_aberto),
+                'valor_total_aberto': float(linha.valor_total_aberto),
                 'valor_total_vendido': float(valor_total_vendido),
                 'ticket_medio': float(ticket_medio),
                 'percentual_abertas': (vendas_abertas / total_vendas * 100) if total_vendas > 0 else 0,
                 'percentual_vencidas': (vendas_vencidas / total_vendas * 100) if total_vendas > 0 else 0
             }
             
+            response_cache.set(chave, stats, tags=self.tags_estatisticas(cliente_id, data_inicio, data_fim))
+            return stats
+            
         except Exception as e:
             return {
                 'total_vendas': 0,
@@ -510,6 +508,48 @@ class VendaService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _filtros_estatisticas(filtros: Dict = None) -> Tuple[Optional[int], Optional[date], Optional[date]]:
+        """Filtros que afetam as estatísticas, normalizados (cliente, data inicial, data final)"""
+        filtros = filtros or {}
+        
+        try:
+            cliente_id = int(filtros['cliente_id']) if filtros.get('cliente_id') else None
+        except (ValueError, TypeError):
+            cliente_id = None
+        
+        datas = []
+        for campo in ('data_inicio', 'data_fim'):
+            try:
+                datas.append(datetime.strptime(filtros[campo], '%Y-%m-%d').date() if filtros.get(campo) else None)
+            except (ValueError, TypeError):
+                datas.append(None)
+        
+        return cliente_id, datas[0], datas[1]
+    
+    def tags_estatisticas(self, cliente_id: Optional[int] = None, data_inicio: Optional[date] = None,
+                          data_fim: Optional[date] = None) -> Tuple[str, ...]:
+        """
+        Tags de invalidação das estatísticas de um conjunto de filtros
+        
+        Filtro por cliente: só as vendas dele. Período fechado de até
+        MESES_TAGS_ESTATISTICAS meses: as vendas desses meses. Demais
+        casos: qualquer venda.
+        """
+        if cliente_id:
+            return (tag_cliente_vendas(cliente_id),)
+        
+        if data_inicio and data_fim and data_inicio <= data_fim:
+            meses = (data_fim.year - data_inicio.year) * 12 + data_fim.month - data_inicio.month + 1
+            if meses <= self.MESES_TAGS_ESTATISTICAS:
+                return tuple(
+                    tag_mes_vendas(date(data_inicio.year + (data_inicio.month - 1 + i) // 12,
+                                        (data_inicio.month - 1 + i) % 12 + 1, 1))
+                    for i in range(meses)
+                )
+        
+        return ('vendas',)
+    
     def obter_vendas_vencidas(self, dias_vencimento: int = 30) -> List[Venda]:
         """
         Obter vendas vencidas há mais de X dias
@@ -578,8 +618,7 @@ class VendaService:
             if not cliente.ativo:
                 return False, "Cliente inativo", {}
             
-            valor_decimal = Decimal(str(valor_venda))
-            pode_comprar = cliente.verificar_limite_credito(valor_decimal)
+            pode_comprar = cliente.verificar_limite_credito(Money.de(valor_venda).decimal)
             
             dados_cliente = {
                 'nome': cliente.nome,
@@ -609,13 +648,13 @@ class VendaService:
             Dict com subtotais e total
         """
         try:
-            total = Decimal('0.00')
+            total = ZERO
             itens_calculados = []
             
             for item in itens:
                 quantidade = Decimal(str(item.get('quantidade', 0)))
                 valor_unitario = Decimal(str(item.get('valor_unitario', 0)))
-                subtotal = quantidade * valor_unitario
+                subtotal = Money.de(valor_unitario) * quantidade
                 
                 itens_calculados.append({
                     'descricao': item.get('descricao', ''),
@@ -0,0 +1,379 @@
+"""
+Cache de respostas compartilhado pelo processo (ou por vários workers)
+
+O cache é uma LRU limitada com expiração por entrada. Cada entrada pode
+receber tags ('vendas', 'pagamentos', 'clientes'...) e é descartada quando
+um commit grava um modelo associado a uma dessas tags.
+
+Backends disponíveis (CACHE_TYPE):
+    simple  - memória do processo
+    sqlite  - arquivo SQLite local, compartilhado entre workers WSGI
+    null    - cache desabilitado
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+AUSENTE = object()
+
+
+class MemoryCacheBackend:
+    """LRU em memória, protegida por lock"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entradas = OrderedDict()  # chave -> (expira, valor, tags)
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> Tuple[Any, bool]:
+        """Retornar (valor, expirou); valor é AUSENTE se não houver entrada válida"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return AUSENTE, False
+            if entrada[0] <= time.time():
+                del self._entradas[chave]
+                return AUSENTE, True
+            self._entradas.move_to_end(chave)
+            return entrada[1], False
+
+    def set(self, chave: str, valor: Any, timeout: int, tags: Iterable[str] = ()) -> int:
+        """Gravar entrada e retornar quantas foram despejadas pela LRU"""
+        with self._lock:
+            self._entradas[chave] = (time.time() + timeout, valor, frozenset(tags))
+            self._entradas.move_to_end(chave)
+
+            despejadas = 0
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+                despejadas += 1
+            return despejadas
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Remover entradas marcadas com qualquer uma das tags"""
+        tags = set(tags)
+        with self._lock:
+            chaves = [chave for chave, entrada in self._entradas.items() if entrada[2] & tags]
+            for chave in chaves:
+                del self._entradas[chave]
+            return len(chaves)
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class SQLiteCacheBackend:
+    """
+    LRU em arquivo SQLite, para compartilhar o cache entre workers
+
+    A hora do último acesso só é regravada quando tem mais de
+    INTERVALO_ACESSO segundos: um acerto não toma o lock de escrita do
+    arquivo a cada leitura, e a ordem da LRU fica com essa resolução.
+    """
+
+    INTERVALO_ACESSO = 30
+
+    def __init__(self, path: str, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        diretorio = os.path.dirname(path)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        with self._conexao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entradas ("
+                "chave TEXT PRIMARY KEY, valor BLOB NOT NULL, "
+                "expira REAL NOT NULL, acesso REAL NOT NULL)"
+            )
+            conexao.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_entradas_acesso ON cache_entradas (acesso)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                "tag TEXT NOT NULL, chave TEXT NOT NULL, PRIMARY KEY (tag, chave))"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS ix_cache_tags_chave ON cache_tags (chave)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.path, timeout=5)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    @staticmethod
+    def _remover(conexao, chaves):
+        marcadores = ','.join('?' * len(chaves))
+        conexao.execute(f"DELETE FROM cache_entradas WHERE chave IN ({marcadores})", chaves)
+        conexao.execute(f"DELETE FROM cache_tags WHERE chave IN ({marcadores})", chaves)
+
+    def get(self, chave: str) -> Tuple[Any, bool]:
+        agora = time.time()
+        with self._conexao() as conexao:
+            linha = conexao.execute(
+                "SELECT valor, expira, acesso FROM cache_entradas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                return AUSENTE, False
+            if linha[1] <= agora:
+                self._remover(conexao, [chave])
+                return AUSENTE, True
+            if agora - linha[2] >= self.INTERVALO_ACESSO:
+                conexao.execute("UPDATE cache_entradas SET acesso = ? WHERE chave = ?", (agora, chave))
+        return pickle.loads(linha[0]), False
+
+    def set(self, chave: str, valor: Any, timeout: int, tags: Iterable[str] = ()) -> int:
+        agora = time.time()
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._conexao() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO cache_entradas (chave, valor, expira, acesso) VALUES (?, ?, ?, ?)",
+                (chave, dados, agora + timeout, agora)
+            )
+            conexao.execute("DELETE FROM cache_tags WHERE chave = ?", (chave,))
+            conexao.executemany(
+                "INSERT INTO cache_tags (tag, chave) VALUES (?, ?)",
+                [(tag, chave) for tag in set(tags)]
+            )
+
+            excesso = conexao.execute("SELECT COUNT(*) FROM cache_entradas").fetchone()[0] - self.max_entries
+            if excesso <= 0:
+                return 0
+
+            chaves = [linha[0] for linha in conexao.execute(
+                "SELECT chave FROM cache_entradas ORDER BY acesso LIMIT ?", (excesso,)
+            )]
+            self._remover(conexao, chaves)
+            return len(chaves)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = list(set(tags))
+        if not tags:
+            return 0
+
+        marcadores = ','.join('?' * len(tags))
+        with self._conexao() as conexao:
+            chaves = [linha[0] for linha in conexao.execute(
+                f"SELECT DISTINCT chave FROM cache_tags WHERE tag IN ({marcadores})", tags
+            )]
+            if chaves:
+                self._remover(conexao, chaves)
+            return len(chaves)
+
+    def clear(self):
+        with self._conexao() as conexao:
+            conexao.execute("DELETE FROM cache_entradas")
+            conexao.execute("DELETE FROM cache_tags")
+
+    def __len__(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM cache_entradas").fetchone()[0]
+
+
+class NullCacheBackend:
+    """Backend que não guarda nada (cache desabilitado)"""
+
+    max_entries = 0
+
+    def get(self, chave):
+        return AUSENTE, False
+
+    def set(self, chave, valor, timeout, tags=()):
+        return 0
+
+    def invalidate(self, tags):
+        return 0
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class ResponseCache:
+    """Fachada do cache com contadores de acerto, falha e despejo"""
+
+    def __init__(self):
+        self.backend = None
+        self.default_timeout = 300
+        self._contadores = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configurar o backend a partir de CACHE_TYPE e registrar no app"""
+        tipo = app.config.get('CACHE_TYPE', 'simple')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 512)
+
+        if tipo == 'sqlite':
+            self.backend = SQLiteCacheBackend(app.config['CACHE_SQLITE_PATH'], max_entries)
+        elif tipo == 'null':
+            self.backend = NullCacheBackend()
+        else:
+            self.backend = MemoryCacheBackend(max_entries)
+
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        app.extensions['response_cache'] = self
+
+    def _backend(self):
+        # Uso fora de uma aplicação configurada (scripts): memória com padrões
+        if self.backend is None:
+            self.backend = MemoryCacheBackend()
+        return self.backend
+
+    def _contar(self, contador: str, quantidade: int = 1):
+        if quantidade:
+            with self._lock:
+                self._contadores[contador] += quantidade
+
+    def get(self, chave: str, default: Any = None) -> Any:
+        """Valor em cache ou default"""
+        valor, expirou = self._backend().get(chave)
+        if valor is AUSENTE:
+            self._contar('misses')
+            self._contar('expired', int(expirou))
+            return default
+        self._contar('hits')
+        return valor
+
+    def set(self, chave: str, valor: Any, timeout: Optional[int] = None, tags: Iterable[str] = ()):
+        """Gravar valor por timeout segundos (padrão: CACHE_DEFAULT_TIMEOUT)"""
+        if timeout is None:
+            timeout = self.default_timeout
+        self._contar('evictions', self._backend().set(chave, valor, timeout, tags))
+
+    def invalidate(self, *tags: str) -> int:
+        """Descartar todas as entradas marcadas com as tags"""
+        removidas = self._backend().invalidate(tags)
+        self._contar('invalidations', removidas)
+        return removidas
+
+    def clear(self):
+        self._backend().clear()
+
+    def stats(self) -> Dict:
+        """Contadores do processo atual e ocupação do backend"""
+        with self._lock:
+            dados = dict(self._contadores)
+
+        consultas = dados['hits'] + dados['misses']
+        backend = self._backend()
+        dados.update({
+            'hit_rate': round(dados['hits'] / consultas, 4) if consultas else 0.0,
+            'entries': len(backend),
+            'max_entries': backend.max_entries,
+            'backend': type(backend).__name__
+        })
+        return dados
+
+
+response_cache = ResponseCache()
+
+
+def make_request_key(prefixo: str = 'view') -> str:
+    """
+    Chave de cache da requisição atual: endpoint, caminho, query string
+    (em ordem canônica) e usuário logado
+    """
+    from flask import request, session
+    from urllib.parse import urlencode
+
+    query = urlencode(sorted(request.args.items(multi=True)))
+    usuario = session.get('user_name', 'anonymous')
+    return f"{prefixo}:{request.endpoint}:{request.path}?{query}#{usuario}"
+
+
+# Invalidação por tags a partir das gravações do ORM
+
+def _tags_por_modelo():
+    """Tags invalidadas pela gravação de cada modelo"""
+    from app.models import Cliente, Venda, ItemVenda, Pagamento, PagamentoMultiplo
+
+    # Pagamentos e vendas também mudam os saldos de vendas e clientes
+    return {
+        Venda: ('vendas', 'clientes'),
+        ItemVenda: ('vendas',),
+        Pagamento: ('pagamentos', 'vendas', 'clientes'),
+        PagamentoMultiplo: ('pagamentos', 'vendas', 'clientes'),
+        Cliente: ('clientes',)
+    }
+
+
+def tag_cliente_vendas(cliente_id: int) -> str:
+    """Tag das entradas calculadas sobre as vendas de um cliente"""
+    return f'vendas:cliente:{cliente_id}'
+
+
+def tag_mes_vendas(dia) -> str:
+    """Tag das entradas calculadas sobre as vendas de um mês"""
+    return f'vendas:mes:{dia:%Y-%m}'
+
+
+def registrar_tags(session, *tags: str):
+    """Invalidar as tags no próximo commit (gravações em lote fora do ORM)"""
+    if tags:
+        session.info.setdefault('cache_tags_pendentes', set()).update(tags)
+
+
+def _tags_faixa_venda(venda) -> Set[str]:
+    """Tags de cliente e mês da venda, antes e depois da alteração"""
+    from sqlalchemy import inspect
+
+    estado = inspect(venda)
+    clientes = {venda.cliente_id, *(estado.attrs.cliente_id.history.deleted or ())}
+    datas = {venda.data_venda, *(estado.attrs.data_venda.history.deleted or ())}
+
+    tags = {tag_cliente_vendas(cliente_id) for cliente_id in clientes if cliente_id is not None}
+    tags.update(tag_mes_vendas(dia) for dia in datas if dia is not None)
+    return tags
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_tags_cache(session, flush_context):
+    """Guardar as tags afetadas pelo flush até o commit"""
+    from app.models import Venda
+
+    mapa = _tags_por_modelo()
+
+    tags = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags.update(mapa.get(type(obj), ()))
+        if isinstance(obj, Venda):
+            # Pagamentos também passam por aqui: atualizam valor_pago e status da venda
+            tags.update(_tags_faixa_venda(obj))
+
+    registrar_tags(session, *tags)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidar_tags_cache(session):
+    """Descartar as entradas afetadas depois que os dados foram gravados"""
+    tags = session.info.pop('cache_tags_pendentes', None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def descartar_tags_cache(session, previous_transaction):
+    """Nada foi gravado: esquecer as tags pendentes"""
+    if not session.in_transaction():
+        session.info.pop('cache_tags_pendentes', None)
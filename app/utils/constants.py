@@ -58,7 +58,12 @@ MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
 # Configurações de exportação
 EXPORT_FORMATS = ['csv', 'xlsx']
-MAX_EXPORT_ROWS = 10000
+EXPORTACAO_TAMANHO_BLOCO = 1000  # linhas lidas do cursor e enviadas por vez
+
+# Configurações de importação de clientes
+IMPORTACAO_FORMATOS = {'csv', 'xlsx'}
+IMPORTACAO_TAMANHO_LOTE = 500  # linhas validadas e gravadas por vez
+IMPORTACAO_LOTES_POR_PROCESSO = 4  # lotes em andamento por processo de validação
 
 # Configurações de impressão
 IMPRESSORA_LARGURA_PAPEL = 48  # caracteres por linha
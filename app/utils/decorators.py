@@ -176,12 +176,16 @@ def validate_json(required_fields: list = None, optional_fields: list = None):
     return decorator
 
 
-def cache_response(timeout: int = 300):
+def cache_response(timeout: int = None, tags: tuple = ()):
     """
-    Decorator para cache de respostas
+    Decorator para cache de respostas GET no cache compartilhado
+    
+    A chave combina endpoint, caminho, query string e usuário. Só respostas
+    200 são guardadas; gravações nos modelos das tags descartam a entrada.
     
     Args:
-        timeout: Tempo de cache em segundos
+        timeout: Tempo de cache em segundos (padrão: CACHE_DEFAULT_TIMEOUT)
+        tags: Tags de invalidação ('vendas', 'pagamentos', 'clientes')
         
     Returns:
         Decorator function
@@ -189,27 +193,32 @@ def cache_response(timeout: int = 300):
     def decorator(f: Callable) -> Callable:
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
-            # Gerar chave de cache baseada na função e argumentos
-            cache_key = f"{f.__name__}_{hash(str(args) + str(kwargs))}"
+            from flask import make_response
+            from app.utils.cache import response_cache, make_request_key
             
-            # Verificar se existe cache
-            if hasattr(g, 'cache_store'):
-                cached_result = g.cache_store.get(cache_key)
-                if cached_result:
-                    current_app.logger.debug(f"Cache hit for {cache_key}")
-                    return cached_result
+            if request.method != 'GET':
+                return f(*args, **kwargs)
             
-            # Executar função e armazenar resultado
-            result = f(*args, **kwargs)
+            cache_key = make_request_key()
             
-            # Armazenar no cache (implementação simples em memória)
-            if not hasattr(g, 'cache_store'):
-                g.cache_store = {}
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                current_app.logger.debug(f"Cache hit for {cache_key}")
+                body, status, headers = cached
+                return current_app.response_class(body, status=status, headers=headers)
             
-            g.cache_store[cache_key] = result
-            current_app.logger.debug(f"Cache set for {cache_key}")
+            response = make_response(f(*args, **kwargs))
             
-            return result
+            if response.status_code == 200 and not response.direct_passthrough:
+                response_cache.set(
+                    cache_key,
+                    (response.get_data(), response.status_code, list(response.headers.items())),
+                    timeout=timeout,
+                    tags=tags
+                )
+                current_app.logger.debug(f"Cache set for {cache_key}")
+            
+            return response
         
         return decorated_function
     return decorator
@@ -249,6 +258,9 @@ def rate_limit(calls: int = 100, period: int = 3600):
     """
     Decorator para limitação de taxa de requisições
     
+    Usa o limitador compartilhado (janela deslizante), que vale entre
+    requisições e, com RATE_LIMIT_TYPE = 'sqlite', entre workers.
+    
     Args:
         calls: Número máximo de chamadas
         period: Período em segundos
@@ -259,37 +271,26 @@ def rate_limit(calls: int = 100, period: int = 3600):
     def decorator(f: Callable) -> Callable:
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
+            from app.utils.rate_limit import rate_limiter
+            
             # Identificar cliente (IP + user)
             client_id = f"{request.remote_addr}_{session.get('user_name', 'anonymous')}"
+            rate_key = f"rate_limit:{request.endpoint or f.__name__}:{client_id}"
             
-            # Chave para armazenar contadores
-            rate_key = f"rate_limit_{f.__name__}_{client_id}"
-            
-            # Verificar rate limit (implementação simples)
-            if not hasattr(g, 'rate_limit_store'):
-                g.rate_limit_store = {}
-            
-            now = time.time()
+            result = rate_limiter.hit(rate_key, calls, period)
             
-            if rate_key in g.rate_limit_store:
-                timestamps = g.rate_limit_store[rate_key]
-                # Remover timestamps antigos
-                timestamps = [ts for ts in timestamps if now - ts < period]
-                
-                if len(timestamps) >= calls:
-                    if request.is_json:
-                        return jsonify({
-                            'success': False,
-                            'error': 'Limite de requisições excedido. Tente novamente mais tarde.'
-                        }), 429
-                    else:
-                        from flask import abort
-                        abort(429)
-                
-                timestamps.append(now)
-                g.rate_limit_store[rate_key] = timestamps
-            else:
-                g.rate_limit_store[rate_key] = [now]
+            if not result.permitido:
+                if request.is_json:
+                    response = jsonify({
+                        'success': False,
+                        'error': 'Limite de requisições excedido. Tente novamente mais tarde.'
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(result.retry_after)
+                    return response
+                else:
+                    from flask import abort
+                    abort(429)
             
             return f(*args, **kwargs)
         
@@ -5,13 +5,16 @@ Funções auxiliares e utilitárias do sistema
 import re
 import locale
 from datetime import datetime, date
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from typing import Union, Optional, Any, Dict, List
 from flask import flash, request
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from app.utils import moeda
+from app.utils.money import Money
 
-# Configurar locale para formatação brasileira
+
+# Configurar locale brasileiro (valores em reais não dependem dele: ver app.utils.moeda)
 try:
     locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 except locale.Error:
@@ -31,32 +34,9 @@ def format_currency(value: Union[Decimal, float, int, str], symbol: str = 'R$')
         symbol: Símbolo da moeda
         
     Returns:
-        String formatada (ex: "R$ 1.234,56")
+        String formatada (ex: "R$ 1.234,56"); valores inválidos viram "R$ 0,00"
     """
-    try:
-        if value is None:
-            return f"{symbol} 0,00"
-        
-        # Converter para Decimal para precisão
-        if isinstance(value, str):
-            value = parse_currency(value)
-        
-        decimal_value = Decimal(str(value))
-        
-        # Formatar usando locale brasileiro
-        try:
-            formatted = locale.currency(float(decimal_value), grouping=True, symbol=False)
-            return f"{symbol} {formatted}"
-        except:
-            # Fallback manual se locale não funcionar
-            abs_value = abs(decimal_value)
-            formatted = f"{abs_value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            if decimal_value < 0:
-                formatted = f"-{formatted}"
-            return f"{symbol} {formatted}"
-    
-    except (ValueError, TypeError, InvalidOperation):
-        return f"{symbol} 0,00"
+    return moeda.formatar(value, symbol)
 
 
 def parse_currency(value: Union[str, float, int, Decimal]) -> Decimal:
@@ -67,38 +47,9 @@ def parse_currency(value: Union[str, float, int, Decimal]) -> Decimal:
         value: Valor a ser convertido (ex: "R$ 1.234,56" ou "1234.56")
         
     Returns:
-        Valor como Decimal
+        Valor como Decimal (zero se inválido)
     """
-    try:
-        if value is None:
-            return Decimal('0.00')
-        
-        if isinstance(value, Decimal):
-            return value
-        
-        if isinstance(value, (int, float)):
-            return Decimal(str(value))
-        
-        # Remover símbolos e espaços
-        clean_value = str(value).strip()
-        clean_value = re.sub(r'[R$\s]', '', clean_value)
-        
-        # Se está vazio, retornar zero
-        if not clean_value:
-            return Decimal('0.00')
-        
-        # Verificar formato brasileiro (vírgula como decimal)
-        if ',' in clean_value and '.' in clean_value:
-            # Formato: 1.234,56
-            clean_value = clean_value.replace('.', '').replace(',', '.')
-        elif ',' in clean_value and clean_value.count(',') == 1:
-            # Formato: 1234,56
-            clean_value = clean_value.replace(',', '.')
-        
-        return Decimal(clean_value)
-    
-    except (ValueError, TypeError, InvalidOperation):
-        return Decimal('0.00')
+    return moeda.ler(value)
 
 
 def validate_cpf(cpf: str) -> bool:
@@ -203,6 +154,22 @@ def clean_phone(phone: str) -> str:
     return re.sub(r'[^0-9]', '', phone)
 
 
+def somente_digitos(value: Optional[str]) -> Optional[str]:
+    """
+    Extrair os dígitos de um CPF, telefone ou termo de busca
+    
+    Args:
+        value: Texto com ou sem formatação
+        
+    Returns:
+        Apenas números, ou None se não houver nenhum
+    """
+    if not value:
+        return None
+    
+    return re.sub(r'[^0-9]', '', value) or None
+
+
 def format_date(date_value: Union[date, datetime, str], format_type: str = 'short') -> str:
     """
     Formatar data
@@ -519,6 +486,23 @@ def percentage(part: Union[int, float], total: Union[int, float], decimals: int
         return 0.0
 
 
+def distribuir_proporcional(valor: Union[Decimal, float, int, str], pesos: List[Union[Decimal, float, int, str]]) -> List[Decimal]:
+    """
+    Distribuir um valor em reais proporcionalmente aos pesos, sem perder centavos
+    
+    Ver Money.distribuir: centavos inteiros e método dos maiores restos, a
+    soma das partes é sempre exatamente igual ao valor.
+    
+    Args:
+        valor: Valor a distribuir
+        pesos: Pesos de cada parte (ex.: valor restante de cada venda)
+        
+    Returns:
+        Lista de valores com duas casas decimais, na ordem dos pesos
+    """
+    return [parte.decimal for parte in Money.de(valor).distribuir(pesos)]
+
+
 def clean_string(text: str) -> str:
     """
     Limpar string removendo espaços extras e caracteres especiais
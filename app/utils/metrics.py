@@ -0,0 +1,210 @@
+"""
+Instrumentação de requisições e consultas SQL
+
+Em requisições amostradas (METRICS_SAMPLE_RATE), eventos do engine
+SQLAlchemy contam as consultas, somam o tempo de banco e guardam a
+consulta mais lenta. Ao fim da requisição os números entram em
+histogramas por endpoint, expostos em /metrics no formato texto do
+Prometheus. Os histogramas são do processo atual (um conjunto por worker).
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Histograma cumulativo no estilo Prometheus"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observe(self, valor: float):
+        self.contagens[bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas(self, nome: str, rotulos: str) -> List[str]:
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + ('+Inf',), self.contagens):
+            acumulado += contagem
+            linhas.append(f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+        linhas.append(f'{nome}_sum{{{rotulos}}} {self.soma:.6f}')
+        linhas.append(f'{nome}_count{{{rotulos}}} {self.total}')
+        return linhas
+
+
+class RequestMetrics:
+    """Histogramas por endpoint de latência, consultas e tempo de banco"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Registrar hooks de requisição, eventos SQL e a rota /metrics"""
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        app.before_request(iniciar_requisicao)
+        app.after_request(finalizar_requisicao)
+        app.add_url_rule('/metrics', 'metrics', exportar_metricas)
+        app.extensions['request_metrics'] = self
+
+    def registrar(self, endpoint: str, duracao: float, dados_sql: Dict):
+        with self._lock:
+            metricas = self._endpoints.get(endpoint)
+            if metricas is None:
+                metricas = self._endpoints[endpoint] = {
+                    'latencia': Histogram(BUCKETS_LATENCIA),
+                    'consultas': Histogram(BUCKETS_CONSULTAS),
+                    'tempo_banco': 0.0,
+                    'consulta_mais_lenta': 0.0
+                }
+
+            metricas['latencia'].observe(duracao)
+            metricas['consultas'].observe(dados_sql['count'])
+            metricas['tempo_banco'] += dados_sql['time']
+            metricas['consulta_mais_lenta'] = max(metricas['consulta_mais_lenta'], dados_sql['slowest_time'])
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato texto do Prometheus"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            linhas = [
+                '# HELP http_request_duration_seconds Latência das requisições amostradas',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            for endpoint, metricas in endpoints:
+                linhas += metricas['latencia'].linhas('http_request_duration_seconds', f'endpoint="{endpoint}"')
+
+            linhas += [
+                '# HELP db_queries_per_request Consultas SQL por requisição amostrada',
+                '# TYPE db_queries_per_request histogram'
+            ]
+            for endpoint, metricas in endpoints:
+                linhas += metricas['consultas'].linhas('db_queries_per_request', f'endpoint="{endpoint}"')
+
+            linhas += [
+                '# HELP db_query_seconds_total Tempo total de banco das requisições amostradas',
+                '# TYPE db_query_seconds_total counter'
+            ]
+            linhas += [
+                f'db_query_seconds_total{{endpoint="{endpoint}"}} {metricas["tempo_banco"]:.6f}'
+                for endpoint, metricas in endpoints
+            ]
+
+            linhas += [
+                '# HELP db_slowest_query_seconds Consulta mais lenta observada',
+                '# TYPE db_slowest_query_seconds gauge'
+            ]
+            linhas += [
+                f'db_slowest_query_seconds{{endpoint="{endpoint}"}} {metricas["consulta_mais_lenta"]:.6f}'
+                for endpoint, metricas in endpoints
+            ]
+
+        from app.utils.cache import response_cache
+        stats = response_cache.stats()
+        linhas += ['# HELP response_cache_events_total Eventos do cache de respostas',
+                   '# TYPE response_cache_events_total counter']
+        linhas += [
+            f'response_cache_events_total{{event="{nome}"}} {stats[nome]}'
+            for nome in ('hits', 'misses', 'evictions', 'expired', 'invalidations')
+        ]
+        linhas += ['# TYPE response_cache_entries gauge', f'response_cache_entries {stats["entries"]}']
+
+        return '\n'.join(linhas) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def dados_sql_requisicao() -> Optional[Dict]:
+    """Contadores SQL da requisição atual, se ela estiver sendo amostrada"""
+    if not has_request_context():
+        return None
+    return g.get('sql_metrics')
+
+
+# Hooks de requisição
+
+def iniciar_requisicao():
+    """Decidir a amostragem e zerar os contadores da requisição"""
+    taxa = current_app.config.get('METRICS_SAMPLE_RATE', 1.0)
+    if request.endpoint == 'metrics' or random.random() >= taxa:
+        return
+
+    g.sql_metrics = {'count': 0, 'time': 0.0, 'slowest_time': 0.0, 'slowest_statement': None}
+    g.metrics_inicio = time.perf_counter()
+
+
+def finalizar_requisicao(response):
+    """Registrar a requisição nos histogramas e, se configurado, no header de debug"""
+    dados = g.pop('sql_metrics', None)
+    if dados is None:
+        return response
+
+    duracao = time.perf_counter() - g.pop('metrics_inicio')
+    request_metrics.registrar(request.endpoint or 'desconhecido', duracao, dados)
+
+    if current_app.config.get('METRICS_DEBUG_HEADER', current_app.debug):
+        response.headers['X-SQL-Metrics'] = (
+            f"count={dados['count']}; db={dados['time'] * 1000:.1f}ms; "
+            f"slowest={dados['slowest_time'] * 1000:.1f}ms; total={duracao * 1000:.1f}ms"
+        )
+
+    limite_lenta = current_app.config.get('METRICS_SLOW_QUERY_SECONDS', 0.5)
+    if dados['slowest_time'] >= limite_lenta:
+        current_app.logger.warning(
+            f"SLOW QUERY em {request.endpoint}: {dados['slowest_time']:.3f}s - "
+            f"{dados['slowest_statement']}"
+        )
+
+    return response
+
+
+def exportar_metricas():
+    """Endpoint /metrics (texto do Prometheus)"""
+    return Response(request_metrics.exportar(), mimetype='text/plain; version=0.0.4')
+
+
+# Eventos do engine (valem para todos os engines do processo)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if dados_sql_requisicao() is not None:
+        conn.info.setdefault('metrics_inicio_consulta', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    dados = dados_sql_requisicao()
+    inicios = conn.info.get('metrics_inicio_consulta')
+    if dados is None or not inicios:
+        return
+
+    duracao = time.perf_counter() - inicios.pop()
+    dados['count'] += 1
+    dados['time'] += duracao
+    if duracao > dados['slowest_time']:
+        dados['slowest_time'] = duracao
+        dados['slowest_statement'] = ' '.join(statement.split())[:500]
@@ -0,0 +1,161 @@
+"""
+Codec de valores em reais (BRL)
+
+Formatação e leitura de valores monetários sem locale: locale.currency
+depende de estado global do processo (não é thread-safe e muda com
+setlocale) e é lento para ser chamado em toda célula de listagem, recibo
+ou resposta JSON. Aqui a formatação é feita sobre centavos inteiros e a
+leitura resolve o formato comum ('R$ 1.234,56') só com operações de string,
+deixando a expressão pré-compilada para formas raras; formatar_csv_coluna
+converte colunas inteiras das exportações e relatórios de uma vez.
+"""
+
+import re
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import List, Optional, Sequence, Union
+
+from app.utils.money import Money
+
+
+Valor = Union[Money, Decimal, int, float, str, None]
+
+SIMBOLO = 'R$'
+
+# Símbolo da moeda e espaços (inclusive o não separável do locale)
+_SIMBOLO_E_ESPACOS = re.compile(r'[R$\s]')
+
+_ZERO = Decimal('0.00')
+
+
+def centavos(valor: Valor) -> int:
+    """
+    Centavos de um valor (Money, Decimal, int, float ou texto em reais),
+    arredondados (meio para cima)
+
+    Raises:
+        ValueError: Se o valor não for numérico
+    """
+    tipo = type(valor)
+    if tipo is Decimal:
+        if valor.is_finite():
+            return int(valor.scaleb(2).to_integral_value(ROUND_HALF_UP))
+        raise ValueError(f'Valor monetário inválido: {valor!r}')
+    if tipo is int:
+        return valor * 100
+    if tipo is Money:
+        return valor.centavos
+    if isinstance(valor, str):
+        return ler_centavos(valor)
+    return Money.de(valor).centavos
+
+
+def formatar_centavos(valor_centavos: int, simbolo: str = SIMBOLO) -> str:
+    """
+    Texto de um valor em centavos (ex.: 123456 -> 'R$ 1.234,56')
+
+    Com simbolo='' fica só o número ('1.234,56').
+    """
+    reais, resto = divmod(valor_centavos if valor_centavos >= 0 else -valor_centavos, 100)
+    if reais < 1000:
+        inteiro = str(reais)
+    else:
+        inteiro = f'{reais:,}'.replace(',', '.')
+    sinal = '-' if valor_centavos < 0 else ''
+    if not simbolo:
+        return f'{sinal}{inteiro},{resto:02d}'
+    return f'{simbolo} {sinal}{inteiro},{resto:02d}'
+
+
+def formatar(valor: Valor, simbolo: str = SIMBOLO) -> str:
+    """
+    Texto de um valor em reais (ex.: 'R$ 1.234,56')
+
+    None e valores inválidos viram 'R$ 0,00'.
+    """
+    if valor is None:
+        return formatar_centavos(0, simbolo)
+    try:
+        return formatar_centavos(centavos(valor), simbolo)
+    except ValueError:
+        return formatar_centavos(0, simbolo)
+
+
+def formatar_csv(valor: Optional[Decimal]) -> str:
+    """
+    Número para células CSV (exportações e relatórios): vírgula decimal,
+    sem símbolo nem separador de milhar, casas preservadas ('1234,56')
+
+    None vira célula vazia.
+    """
+    return '' if valor is None else str(valor).replace('.', ',')
+
+
+def formatar_csv_coluna(valores: Sequence[Optional[Decimal]]) -> List[str]:
+    """
+    formatar_csv de uma coluna inteira, na ordem recebida
+
+    Os valores são convertidos com uma única junção e uma única troca de
+    ponto por vírgula sobre o texto da coluna, em vez de uma chamada por
+    célula. None vira célula vazia.
+    """
+    if not valores:
+        return []
+    return '\n'.join(map(str, valores)).replace('.', ',').replace('None', '').split('\n')
+
+
+def ler(texto: Valor, padrao: Optional[Decimal] = _ZERO) -> Optional[Decimal]:
+    """
+    Ler valor digitado ('R$ 1.234,56', '1234,56', '1234.56') como Decimal
+
+    Mesmas regras de sempre: com vírgula, a vírgula é o separador decimal e
+    os pontos são de milhar; sem vírgula, o ponto é decimal. As casas são
+    preservadas (não arredonda).
+
+    Args:
+        texto: Valor digitado (números são convertidos diretamente)
+        padrao: Devolvido quando o texto não é um valor válido
+
+    Returns:
+        Valor como Decimal
+    """
+    if texto is None:
+        return padrao
+    if isinstance(texto, Decimal):
+        return texto
+    if isinstance(texto, Money):
+        return texto.decimal
+    if isinstance(texto, (int, float)):
+        return Decimal(str(texto))
+
+    # Caminho rápido: 'R$' só no início e espaços só nas pontas
+    limpo = str(texto).replace('R$', '').strip()
+    if ',' in limpo:
+        limpo = limpo.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(limpo)
+    except InvalidOperation:
+        pass
+
+    # Demais formas ('- R$ 12', '1 234,56', texto vazio): remover símbolo e espaços
+    limpo = _SIMBOLO_E_ESPACOS.sub('', str(texto))
+    if not limpo:
+        return _ZERO
+    if ',' in limpo:
+        limpo = limpo.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(limpo)
+    except InvalidOperation:
+        return padrao
+
+
+def ler_centavos(texto: Valor) -> int:
+    """
+    Ler valor digitado em centavos, arredondado (meio para cima)
+
+    Raises:
+        ValueError: Se o texto não for um valor válido
+    """
+    valor = ler(texto, padrao=None)
+    if valor is None or not valor.is_finite():
+        raise ValueError(f'Valor monetário inválido: {texto!r}')
+    return int((valor * 100).to_integral_value(ROUND_HALF_UP))
@@ -0,0 +1,218 @@
+"""
+Money - Valor em reais guardado em centavos inteiros
+
+Soma, subtração e distribuição em centavos são exatas: não há Decimal(str(x))
+a cada operação nem float no meio do caminho, e a soma das partes de uma
+distribuição é sempre o valor distribuído. A conversão de e para as colunas
+Numeric(10, 2) não perde nada (Money.de(coluna) e money.decimal).
+"""
+
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import Iterable, List, Union
+
+
+Numero = Union['Money', Decimal, int, float, str, None]
+
+
+class Money:
+    """
+    Valor monetário imutável em centavos
+
+    Exemplos:
+        Money.de('12.50') + Money.de(3)      -> Money('15.50')
+        Money.de('10.00').distribuir([1, 2]) -> [Money('3.33'), Money('6.67')]
+        Money.de('7.90') * Decimal('1.235')  -> Money('9.76')
+    """
+
+    __slots__ = ('_centavos',)
+
+    def __init__(self, centavos: int = 0):
+        """
+        Args:
+            centavos: Valor em centavos (use Money.de para valores em reais)
+        """
+        object.__setattr__(self, '_centavos', int(centavos))
+
+    @classmethod
+    def de(cls, valor: Numero) -> 'Money':
+        """
+        Converter valor em reais (coluna Numeric, Decimal, int, float, texto
+        '1234.56' ou outro Money); None vira zero
+
+        Frações de centavo são arredondadas (meio para cima).
+
+        Raises:
+            ValueError: Se o valor não for numérico
+        """
+        if isinstance(valor, Money):
+            return valor
+        if valor is None:
+            return ZERO
+        if isinstance(valor, int) and not isinstance(valor, bool):
+            return cls(valor * 100)
+
+        try:
+            if not isinstance(valor, Decimal):
+                valor = Decimal(str(valor).strip())
+            return cls(int((valor * 100).to_integral_value(ROUND_HALF_UP)))
+        except (InvalidOperation, ValueError, TypeError, OverflowError):
+            raise ValueError(f"Valor monetário inválido: {valor!r}")
+
+    @property
+    def centavos(self) -> int:
+        return self._centavos
+
+    @property
+    def decimal(self) -> Decimal:
+        """Valor em reais com duas casas (para colunas Numeric(10, 2))"""
+        return Decimal(self._centavos).scaleb(-2)
+
+    def distribuir(self, pesos: Iterable[Numero]) -> List['Money']:
+        """
+        Dividir o valor proporcionalmente aos pesos, sem perder centavos
+
+        Cada parte recebe o piso da sua cota e os centavos que sobram vão
+        para as maiores frações (empate desfeito pela ordem recebida). A soma
+        das partes é sempre igual ao valor, e nenhuma parte excede o seu peso
+        quando o valor não excede a soma dos pesos.
+
+        Args:
+            pesos: Peso de cada parte (ex.: valor restante de cada venda)
+
+        Returns:
+            Partes na ordem dos pesos (zeros se o valor ou os pesos não forem positivos)
+        """
+        pesos_centavos = [Money.de(peso)._centavos for peso in pesos]
+        total_pesos = sum(pesos_centavos)
+        centavos = self._centavos
+
+        if centavos <= 0 or total_pesos <= 0:
+            return [ZERO] * len(pesos_centavos)
+
+        partes = []
+        restos = []
+        for indice, peso in enumerate(pesos_centavos):
+            parte, resto = divmod(centavos * peso, total_pesos)
+            partes.append(parte)
+            restos.append((resto, -indice))
+
+        sobra = centavos - sum(partes)
+        for _, indice in sorted(restos, reverse=True)[:sobra]:
+            partes[-indice] += 1
+
+        return [Money(parte) for parte in partes]
+
+    def formatar(self, simbolo: str = 'R$') -> str:
+        """Texto no formato brasileiro (ex.: 'R$ 1.234,56')"""
+        from app.utils.moeda import formatar_centavos
+        return formatar_centavos(self._centavos, simbolo)
+
+    # Aritmética
+
+    def __add__(self, outro):
+        if isinstance(outro, Money):
+            return Money(self._centavos + outro._centavos)
+        if outro == 0:
+            return self
+        return NotImplemented
+
+    # sum() começa em 0
+    __radd__ = __add__
+
+    def __sub__(self, outro):
+        if isinstance(outro, Money):
+            return Money(self._centavos - outro._centavos)
+        if outro == 0:
+            return self
+        return NotImplemented
+
+    def __rsub__(self, outro):
+        if outro == 0:
+            return -self
+        return NotImplemented
+
+    def __mul__(self, fator):
+        """Multiplicar por quantidade (ex.: kg), arredondando ao centavo"""
+        if isinstance(fator, int) and not isinstance(fator, bool):
+            return Money(self._centavos * fator)
+        if isinstance(fator, float):
+            fator = Decimal(str(fator))
+        if isinstance(fator, Decimal):
+            return Money(int((self._centavos * fator).to_integral_value(ROUND_HALF_UP)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self._centavos)
+
+    def __abs__(self):
+        return self if self._centavos >= 0 else Money(-self._centavos)
+
+    def __bool__(self):
+        return self._centavos != 0
+
+    # Comparação (exata: em centavos com Money, pelo Decimal com int e Decimal)
+    #
+    # float não é comparado: arredondá-lo ao centavo tornaria Money(5) igual a
+    # 0.05 com hashes diferentes, quebrando dicionários e conjuntos.
+
+    def _pares(self, outro):
+        if isinstance(outro, Money):
+            return self._centavos, outro._centavos
+        if isinstance(outro, (int, Decimal)) and not isinstance(outro, bool):
+            return self.decimal, outro
+        return None
+
+    def __eq__(self, outro):
+        pares = self._pares(outro)
+        return NotImplemented if pares is None else pares[0] == pares[1]
+
+    def __lt__(self, outro):
+        pares = self._pares(outro)
+        return NotImplemented if pares is None else pares[0] < pares[1]
+
+    def __le__(self, outro):
+        pares = self._pares(outro)
+        return NotImplemented if pares is None else pares[0] <= pares[1]
+
+    def __gt__(self, outro):
+        pares = self._pares(outro)
+        return NotImplemented if pares is None else pares[0] > pares[1]
+
+    def __ge__(self, outro):
+        pares = self._pares(outro)
+        return NotImplemented if pares is None else pares[0] >= pares[1]
+
+    def __hash__(self):
+        # Igual ao hash do Decimal equivalente, que é igual ao de qualquer
+        # int ou Decimal que compare igual (Money.de('1.00') == 1 == Decimal('1.0'))
+        return hash(self.decimal)
+
+    # Conversões
+
+    def __float__(self):
+        return self._centavos / 100
+
+    def __str__(self):
+        return str(self.decimal)
+
+    def __repr__(self):
+        return f"Money('{self.decimal}')"
+
+    def __format__(self, especificacao):
+        return format(self.decimal, especificacao)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError('Money é imutável')
+
+    def __reduce__(self):
+        return (Money, (self._centavos,))
+
+
+ZERO = Money(0)
+
+
+def somar(valores: Iterable[Numero]) -> Money:
+    """Soma exata de valores em reais (colunas, Decimals ou Money)"""
+    return Money(sum(Money.de(valor)._centavos for valor in valores))
@@ -0,0 +1,153 @@
+"""
+Detector de consultas N+1
+
+Durante a requisição, cada consulta SQL é reduzida a uma "impressão"
+(literais e listas IN trocados por ?) e contada junto com a linha de
+código da aplicação que a disparou. Impressões repetidas a partir de
+NPLUSONE_THRESHOLD vezes são tratadas conforme NPLUSONE_ACTION:
+    log      - aviso no log ao fim da requisição
+    raise    - NPlusOneError no ponto da consulta (uso em testes)
+    overlay  - aviso no log e painel no HTML da resposta (debug)
+"""
+
+import os
+import re
+import traceback
+from collections import Counter
+from html import escape
+from typing import Dict, List
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DIRETORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAMETRO = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+class NPlusOneError(Exception):
+    """Consulta repetida acima do limite dentro de uma requisição"""
+
+
+def impressao_sql(statement: str) -> str:
+    """Forma canônica da consulta, sem literais nem tamanho de listas"""
+    sql = _RE_STRING.sub('?', statement)
+    sql = _RE_PARAMETRO.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_LISTA.sub('(?)', sql)
+    return ' '.join(sql.split())
+
+
+def local_chamada() -> str:
+    """Linha de código da aplicação mais próxima que disparou a consulta"""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        arquivo = os.path.abspath(frame.filename)
+        if arquivo.startswith(DIRETORIO_APP) and arquivo != os.path.abspath(__file__):
+            return f"{os.path.relpath(arquivo, os.path.dirname(DIRETORIO_APP))}:{frame.lineno} em {frame.name}"
+    return 'desconhecido'
+
+
+class NPlusOneDetector:
+    """Registro das consultas repetidas por requisição"""
+
+    def init_app(self, app):
+        """Registrar hooks de requisição quando NPLUSONE_ENABLED"""
+        if not app.config.get('NPLUSONE_ENABLED', False):
+            return
+
+        app.before_request(iniciar_requisicao)
+        app.after_request(finalizar_requisicao)
+        app.extensions['nplusone'] = self
+
+    @staticmethod
+    def relatorio(consultas: Dict, limite: int) -> List[Dict]:
+        """Impressões repetidas a partir do limite, das mais frequentes às menos"""
+        repetidas = [
+            {
+                'sql': sql,
+                'count': dados['count'],
+                'locais': dados['locais'].most_common(3)
+            }
+            for sql, dados in consultas.items()
+            if dados['count'] >= limite
+        ]
+        return sorted(repetidas, key=lambda item: item['count'], reverse=True)
+
+
+nplusone_detector = NPlusOneDetector()
+
+
+# Hooks de requisição
+
+def iniciar_requisicao():
+    g.nplusone_consultas = {}
+
+
+def finalizar_requisicao(response):
+    consultas = g.pop('nplusone_consultas', None)
+    if not consultas:
+        return response
+
+    repetidas = NPlusOneDetector.relatorio(consultas, current_app.config.get('NPLUSONE_THRESHOLD', 5))
+    if not repetidas:
+        return response
+
+    from flask import request
+    for item in repetidas:
+        locais = '; '.join(f"{local} ({vezes}x)" for local, vezes in item['locais'])
+        current_app.logger.warning(
+            f"N+1 em {request.endpoint}: {item['count']}x {item['sql'][:200]} - {locais}"
+        )
+
+    if (current_app.config.get('NPLUSONE_ACTION') == 'overlay' and current_app.debug
+            and response.mimetype == 'text/html' and not response.direct_passthrough):
+        html = response.get_data(as_text=True)
+        if '</body>' in html:
+            response.set_data(html.replace('</body>', _painel_html(repetidas) + '</body>', 1))
+
+    return response
+
+
+def _painel_html(repetidas: List[Dict]) -> str:
+    """Painel fixo com as consultas repetidas (apenas em debug)"""
+    itens = ''.join(
+        f"<li><strong>{item['count']}x</strong> <code>{escape(item['sql'][:300])}</code><br>"
+        + '<br>'.join(f"&nbsp;&nbsp;{escape(local)} ({vezes}x)" for local, vezes in item['locais'])
+        + '</li>'
+        for item in repetidas
+    )
+    return (
+        '<div id="nplusone-report" style="position:fixed;bottom:0;right:0;max-width:50%;'
+        'max-height:40%;overflow:auto;z-index:99999;background:#fff3cd;border:1px solid #856404;'
+        'padding:8px;font-size:12px;">'
+        f'<strong>Consultas N+1 detectadas</strong><ul>{itens}</ul></div>'
+    )
+
+
+# Evento do engine
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def registrar_consulta(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    consultas = g.get('nplusone_consultas')
+    if consultas is None:
+        return
+
+    sql = impressao_sql(statement)
+    dados = consultas.get(sql)
+    if dados is None:
+        dados = consultas[sql] = {'count': 0, 'locais': Counter()}
+
+    local = local_chamada()
+    dados['count'] += 1
+    dados['locais'][local] += 1
+
+    limite = current_app.config.get('NPLUSONE_THRESHOLD', 5)
+    if dados['count'] == limite and current_app.config.get('NPLUSONE_ACTION') == 'raise':
+        raise NPlusOneError(f"Consulta repetida {limite}x (última em {local}): {sql[:300]}")
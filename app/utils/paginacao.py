@@ -0,0 +1,256 @@
+"""
+Paginação por cursor (keyset)
+
+Em vez de OFFSET, cada página continua a partir dos valores de ordenação
+do último registro exibido:
+    WHERE (data_venda, id) < (:data, :id) ORDER BY data_venda DESC, id DESC LIMIT n
+Com índice na coluna de ordenação, uma página no fim de anos de histórico
+custa o mesmo que a primeira. O total de registros (COUNT) é opcional e
+pode ficar em cache, invalidado pelas mesmas tags do cache de respostas.
+
+O cursor é opaco para quem o recebe: JSON em base64 com os valores de
+ordenação, a direção (próxima ou anterior) e uma assinatura da ordenação
+que o gerou. Cursores inválidos ou de outra ordenação voltam à primeira página.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+from app.utils.cache import response_cache
+from app.utils.constants import ITEMS_PER_PAGE
+
+
+PROXIMA = 'n'
+ANTERIOR = 'p'
+
+TIMEOUT_TOTAL = 60
+
+
+class PaginaCursor:
+    """Página de resultados com cursores para a próxima e a anterior"""
+
+    def __init__(self, items: List, per_page: int, cursor: Optional[str] = None,
+                 next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None,
+                 total: Optional[int] = None):
+        self.items = items
+        self.per_page = per_page
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    def to_dict(self) -> Dict:
+        """Metadados da página para respostas JSON"""
+        return {
+            'per_page': self.per_page,
+            'total': self.total,
+            'has_prev': self.has_prev,
+            'has_next': self.has_next,
+            'prev_cursor': self.prev_cursor,
+            'next_cursor': self.next_cursor
+        }
+
+
+def paginar_por_cursor(query, ordem: Sequence[Tuple[Any, bool]], cursor: Optional[str] = None,
+                       per_page: int = ITEMS_PER_PAGE, contar_total: bool = False,
+                       tags_total: Iterable[str] = (), montar: Optional[Callable] = None) -> PaginaCursor:
+    """
+    Paginar query pelos valores de ordenação
+
+    Args:
+        query: Query SQLAlchemy sem ORDER BY
+        ordem: Pares (coluna, descendente); a última coluna deve ser única (o id)
+        cursor: Cursor recebido (None para a primeira página)
+        per_page: Itens por página
+        contar_total: Calcular o total de registros (um COUNT a mais)
+        tags_total: Tags para guardar o total no cache de respostas
+            (sem tags, o COUNT é executado a cada página)
+        montar: Função que recebe cada linha e devolve o item da página
+            (padrão: a primeira entidade da linha); para queries de colunas
+
+    Returns:
+        PaginaCursor
+    """
+    assinatura = _assinatura(ordem)
+    valores, direcao = decodificar_cursor(cursor, assinatura, len(ordem))
+    para_frente = direcao != ANTERIOR
+
+    quantidade = len(ordem)
+    consulta = query.order_by(None).add_columns(*(
+        coluna.label(f'cursor_{posicao}') for posicao, (coluna, _) in enumerate(ordem)
+    ))
+    if valores is not None:
+        consulta = consulta.filter(_condicao_apos(ordem, valores, para_frente))
+
+    # A página anterior é lida na ordem inversa e depois desvirada
+    consulta = consulta.order_by(*(
+        coluna.desc() if descendente == para_frente else coluna.asc()
+        for coluna, descendente in ordem
+    ))
+    linhas = consulta.limit(per_page + 1).all()
+
+    ha_mais = len(linhas) > per_page
+    linhas = linhas[:per_page]
+    if not para_frente:
+        linhas.reverse()
+
+    if para_frente:
+        tem_proxima, tem_anterior = ha_mais, valores is not None
+    else:
+        tem_proxima, tem_anterior = True, ha_mais
+
+    proximo = anterior = None
+    if linhas:
+        if tem_proxima:
+            proximo = codificar_cursor(tuple(linhas[-1])[-quantidade:], PROXIMA, assinatura)
+        if tem_anterior:
+            anterior = codificar_cursor(tuple(linhas[0])[-quantidade:], ANTERIOR, assinatura)
+    elif valores is not None:
+        # Página vazia a partir de um cursor: oferecer o caminho de volta
+        if para_frente:
+            anterior = codificar_cursor(valores, ANTERIOR, assinatura)
+        else:
+            proximo = codificar_cursor(valores, PROXIMA, assinatura)
+
+    total = contar_registros(query, tags_total) if contar_total else None
+
+    return PaginaCursor(
+        items=[montar(linha) if montar else linha[0] for linha in linhas],
+        per_page=per_page,
+        cursor=cursor,
+        next_cursor=proximo,
+        prev_cursor=anterior,
+        total=total
+    )
+
+
+def contar_registros(query, tags: Iterable[str] = ()) -> int:
+    """
+    COUNT da query, guardado no cache de respostas quando há tags
+
+    Args:
+        query: Query SQLAlchemy
+        tags: Tags de invalidação (vazio executa o COUNT sem cache)
+
+    Returns:
+        Quantidade de registros
+    """
+    query = query.order_by(None)
+    tags = tuple(tags)
+    if not tags:
+        return query.count()
+
+    compilado = query.statement.compile()
+    impressao = f"{compilado}|{sorted(compilado.params.items(), key=lambda item: item[0])!r}"
+    chave = 'total:' + hashlib.sha1(impressao.encode('utf-8')).hexdigest()
+
+    total = response_cache.get(chave)
+    if total is None:
+        total = query.count()
+        response_cache.set(chave, total, timeout=TIMEOUT_TOTAL, tags=tags)
+    return total
+
+
+def codificar_cursor(valores: Sequence, direcao: str, assinatura: int) -> str:
+    """Cursor opaco com os valores de ordenação de um registro"""
+    dados = {'v': [_codificar_valor(valor) for valor in valores], 'd': direcao, 'o': assinatura}
+    texto = json.dumps(dados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: Optional[str], assinatura: int,
+                       quantidade: int) -> Tuple[Optional[List], str]:
+    """
+    Valores e direção de um cursor
+
+    Returns:
+        (valores, direção); valores é None para cursor ausente ou inválido
+    """
+    if not cursor:
+        return None, PROXIMA
+
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        dados = json.loads(texto)
+        if dados.get('o') != assinatura or len(dados['v']) != quantidade:
+            return None, PROXIMA
+        valores = [_decodificar_valor(valor) for valor in dados['v']]
+    except (binascii.Error, ArithmeticError, ValueError, TypeError, KeyError, AttributeError):
+        return None, PROXIMA
+
+    return valores, ANTERIOR if dados.get('d') == ANTERIOR else PROXIMA
+
+
+def url_cursor(cursor: Optional[str], **argumentos) -> str:
+    """URL da requisição atual trocando o cursor (e descartando ?page=)"""
+    parametros = request.args.to_dict()
+    parametros.pop('page', None)
+    parametros.pop('cursor', None)
+    parametros.update(argumentos)
+    if cursor:
+        parametros['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **parametros)
+
+
+def _condicao_apos(ordem: Sequence[Tuple[Any, bool]], valores: Sequence, para_frente: bool):
+    """Registros depois (ou antes) da tupla de valores, na ordem dada"""
+    def comparar(coluna, descendente, valor, inclusivo=False):
+        maior = descendente != para_frente
+        if maior:
+            return coluna >= valor if inclusivo else coluna > valor
+        return coluna <= valor if inclusivo else coluna < valor
+
+    alternativas = []
+    for posicao, (coluna, descendente) in enumerate(ordem):
+        iguais = [ordem[anterior][0] == valores[anterior] for anterior in range(posicao)]
+        alternativas.append(and_(*iguais, comparar(coluna, descendente, valores[posicao])))
+
+    # Limite redundante na primeira coluna para o banco usar o índice como faixa
+    primeira, descendente = ordem[0]
+    return and_(comparar(primeira, descendente, valores[0], inclusivo=True), or_(*alternativas))
+
+
+def _assinatura(ordem: Sequence[Tuple[Any, bool]]) -> int:
+    descricao = '|'.join(f"{coluna}:{int(bool(descendente))}" for coluna, descendente in ordem)
+    return zlib.crc32(descricao.encode('utf-8'))
+
+
+def _codificar_valor(valor):
+    if isinstance(valor, datetime):
+        return {'t': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {'n': str(valor)}
+    return valor
+
+
+def _decodificar_valor(valor):
+    if isinstance(valor, dict):
+        if 't' in valor:
+            return datetime.fromisoformat(valor['t'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+        if 'n' in valor:
+            return Decimal(valor['n'])
+        raise ValueError('Valor de cursor desconhecido')
+    if isinstance(valor, (list, tuple)):
+        raise ValueError('Valor de cursor desconhecido')
+    return valor
@@ -0,0 +1,204 @@
+"""
+Limitação de taxa por janela deslizante, compartilhada entre requisições
+
+Cada chave guarda só três números: início da janela atual, contagem da
+janela atual e contagem da anterior. A taxa estimada é a contagem atual
+somada à anterior ponderada pela fração da janela anterior que ainda está
+dentro do período, então cada verificação custa O(1). Chaves ociosas por
+mais de dois períodos são descartadas.
+
+Backends disponíveis (RATE_LIMIT_TYPE):
+    simple  - memória do processo
+    sqlite  - arquivo SQLite local, compartilhado entre workers WSGI
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+
+class RateLimitResult(NamedTuple):
+    """Resultado de uma verificação"""
+    permitido: bool
+    restante: int
+    retry_after: int
+
+
+def _avaliar(estado: Optional[Tuple[float, int, int]], limite: int, periodo: float,
+             agora: float) -> Tuple[Tuple[float, int, int], RateLimitResult]:
+    """
+    Aplicar uma tentativa ao estado (inicio, atual, anterior) de uma chave
+
+    Returns:
+        Novo estado e resultado da verificação
+    """
+    janela = math.floor(agora / periodo) * periodo
+    inicio, atual, anterior = estado or (janela, 0, 0)
+
+    if inicio != janela:
+        anterior = atual if inicio == janela - periodo else 0
+        atual = 0
+
+    peso = 1 - (agora - janela) / periodo
+    estimado = anterior * peso + atual
+
+    if estimado >= limite:
+        if atual >= limite or not anterior:
+            espera = janela + periodo - agora
+        else:
+            espera = janela + periodo * (1 - (limite - atual) / anterior) - agora
+        return (janela, atual, anterior), RateLimitResult(False, 0, max(1, math.ceil(espera)))
+
+    atual += 1
+    restante = max(0, int(limite - estimado - 1))
+    return (janela, atual, anterior), RateLimitResult(True, restante, 0)
+
+
+class MemoryRateLimitBackend:
+    """Contadores em memória, ordenados pelo último uso para despejo barato"""
+
+    def __init__(self):
+        self._estados = OrderedDict()  # chave -> (inicio, atual, anterior, periodo)
+        self._lock = threading.Lock()
+
+    def hit(self, chave: str, limite: int, periodo: float) -> RateLimitResult:
+        agora = time.time()
+        with self._lock:
+            estado = self._estados.pop(chave, None)
+            novo, resultado = _avaliar(estado and estado[:3], limite, periodo, agora)
+            self._estados[chave] = novo + (periodo,)
+
+            # As mais antigas ficam no início; parar na primeira ainda ativa
+            while self._estados:
+                inicio, _, _, periodo_antigo = next(iter(self._estados.values()))
+                if inicio >= agora - 2 * periodo_antigo:
+                    break
+                self._estados.popitem(last=False)
+
+        return resultado
+
+    def reset(self, chave: str = None):
+        with self._lock:
+            if chave is None:
+                self._estados.clear()
+            else:
+                self._estados.pop(chave, None)
+
+    def __len__(self):
+        return len(self._estados)
+
+
+class SQLiteRateLimitBackend:
+    """Contadores em arquivo SQLite, para valer entre workers"""
+
+    LIMPEZA_A_CADA = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._verificacoes = 0
+
+        diretorio = os.path.dirname(path)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        with self._conexao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "chave TEXT PRIMARY KEY, inicio REAL NOT NULL, atual INTEGER NOT NULL, "
+                "anterior INTEGER NOT NULL, expira REAL NOT NULL)"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_expira ON rate_limit (expira)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def hit(self, chave: str, limite: int, periodo: float) -> RateLimitResult:
+        agora = time.time()
+        conexao = self._conexao()
+
+        # BEGIN IMMEDIATE serializa a leitura e a gravação entre processos
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            linha = conexao.execute(
+                "SELECT inicio, atual, anterior FROM rate_limit WHERE chave = ?", (chave,)
+            ).fetchone()
+            novo, resultado = _avaliar(linha, limite, periodo, agora)
+            conexao.execute(
+                "INSERT OR REPLACE INTO rate_limit (chave, inicio, atual, anterior, expira) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chave,) + novo + (novo[0] + 2 * periodo,)
+            )
+
+            self._verificacoes += 1
+            if self._verificacoes % self.LIMPEZA_A_CADA == 0:
+                conexao.execute("DELETE FROM rate_limit WHERE expira < ?", (agora,))
+
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+
+        return resultado
+
+    def reset(self, chave: str = None):
+        if chave is None:
+            self._conexao().execute("DELETE FROM rate_limit")
+        else:
+            self._conexao().execute("DELETE FROM rate_limit WHERE chave = ?", (chave,))
+
+    def __len__(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+
+
+class RateLimiter:
+    """Fachada do limitador, configurada pelo app"""
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        """Configurar o backend a partir de RATE_LIMIT_TYPE e registrar no app"""
+        if app.config.get('RATE_LIMIT_TYPE', 'simple') == 'sqlite':
+            self.backend = SQLiteRateLimitBackend(app.config['RATE_LIMIT_SQLITE_PATH'])
+        else:
+            self.backend = MemoryRateLimitBackend()
+
+        app.extensions['rate_limiter'] = self
+
+    def _backend(self):
+        if self.backend is None:
+            self.backend = MemoryRateLimitBackend()
+        return self.backend
+
+    def hit(self, chave: str, limite: int, periodo: float) -> RateLimitResult:
+        """
+        Registrar uma tentativa para a chave
+
+        Args:
+            chave: Identificador (ex.: 'login:192.168.0.10')
+            limite: Máximo de tentativas por período
+            periodo: Período em segundos
+
+        Returns:
+            RateLimitResult; tentativas recusadas não são contadas
+        """
+        return self._backend().hit(chave, limite, periodo)
+
+    def reset(self, chave: str = None):
+        """Zerar uma chave (ou todas)"""
+        self._backend().reset(chave)
+
+
+rate_limiter = RateLimiter()
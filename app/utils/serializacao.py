@@ -0,0 +1,109 @@
+"""
+Serialização com seleção de campos (fields=)
+
+Cada campo de um Serializador é avaliado só quando pedido. Campos caros
+declaram um carregador que recebe todos os objetos da lista de uma vez e
+devolve os dados em lote (uma consulta para a lista inteira, em vez de
+uma por objeto); campos que compartilham o carregador o executam uma vez.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request
+
+
+# Valor de campo que não deve aparecer no dicionário (ex.: troco de pagamento em cartão)
+OMITIR = object()
+
+
+class Campo:
+    """Campo calculado a partir de dados carregados em lote"""
+
+    __slots__ = ('valor', 'carregador')
+
+    def __init__(self, valor: Callable[[Any, Any], Any], carregador: Callable[[List], Any]):
+        """
+        Args:
+            valor: Função (objeto, lote) -> valor do campo
+            carregador: Função (objetos) -> lote, executada uma vez por lista
+        """
+        self.valor = valor
+        self.carregador = carregador
+
+
+class Serializador:
+    """Conversão de objetos em dicionários com os campos pedidos"""
+
+    def __init__(self, campos: Dict[str, Any], padrao: Optional[Sequence[str]] = None):
+        """
+        Args:
+            campos: Nome -> função (objeto) -> valor, ou Campo para dados em lote
+            padrao: Campos devolvidos quando nenhum é pedido (padrão: todos)
+        """
+        self.campos = campos
+        self.padrao = tuple(padrao) if padrao is not None else tuple(campos)
+
+    def selecionar(self, fields: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        """
+        Validar os campos pedidos
+
+        Raises:
+            ValueError: Se algum campo não existir
+        """
+        if fields is None:
+            return self.padrao
+
+        selecionados = tuple(dict.fromkeys(fields))
+        desconhecidos = [campo for campo in selecionados if campo not in self.campos]
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+        return selecionados
+
+    def serializar(self, obj, fields: Optional[Iterable[str]] = None) -> Dict:
+        """Dicionário de um objeto"""
+        return self.serializar_lista([obj], fields)[0]
+
+    def serializar_lista(self, objetos: Iterable, fields: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Dicionários de vários objetos em uma passada
+
+        Args:
+            objetos: Objetos a serializar
+            fields: Campos desejados (None para o conjunto padrão)
+
+        Returns:
+            Lista de dicionários na ordem dos objetos
+        """
+        objetos = list(objetos)
+        campos = self.selecionar(fields)
+
+        # Cada carregador roda uma vez para a lista toda
+        lotes = {}
+        for nome in campos:
+            campo = self.campos[nome]
+            if isinstance(campo, Campo) and campo.carregador not in lotes:
+                lotes[campo.carregador] = campo.carregador(objetos) if objetos else None
+
+        resultado = []
+        for obj in objetos:
+            dados = {}
+            for nome in campos:
+                campo = self.campos[nome]
+                if isinstance(campo, Campo):
+                    valor = campo.valor(obj, lotes[campo.carregador])
+                else:
+                    valor = campo(obj)
+                if valor is not OMITIR:
+                    dados[nome] = valor
+            resultado.append(dados)
+        return resultado
+
+
+def campos_da_requisicao(parametro: str = 'fields') -> Optional[List[str]]:
+    """
+    Campos pedidos em ?fields=id,nome (None se o parâmetro não foi enviado)
+    """
+    valor = request.args.get(parametro)
+    if valor is None:
+        return None
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
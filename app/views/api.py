@@ -3,12 +3,14 @@ Blueprint API - Endpoints AJAX para funcionalidades dinâmicas
 """
 
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func, or_, and_
-from app import db
-from app.models import Cliente, Venda, ItemVenda, Pagamento
-from app.utils.helpers import parse_currency, format_currency
+from app.models import Cliente, Venda, ItemVenda
+from app.models.serializadores import serializador_cliente, CAMPOS_RESUMO_CLIENTE
+from app.utils.helpers import parse_currency, format_currency, distribuir_proporcional, parse_date
 from app.utils.constants import STATUS_VENDA
+from app.utils.serializacao import campos_da_requisicao
+from app.services import dashboard_service, serie_temporal_service, indice_clientes_service
 from app.views.auth import login_required
+from app.utils.decorators import cache_response
 from datetime import date, timedelta
 from decimal import Decimal
 
@@ -24,51 +26,24 @@ def clientes_buscar():
     """Buscar clientes para autocomplete"""
     
     termo = request.args.get('q', '').strip()
-    limite = int(request.args.get('limit', 10))
+    limite = min(int(request.args.get('limit', 10)), 50)
     apenas_ativos = request.args.get('ativo', 'true').lower() == 'true'
     
     if not termo or len(termo) < 2:
         return jsonify([])
     
     try:
-        # Buscar clientes
-        query = Cliente.query
-        
-        if apenas_ativos:
-            query = query.filter(Cliente.ativo == True)
-        
-        # Remover formatação para busca em CPF e telefone
-        termo_limpo = ''.join(filter(str.isalnum, termo))
-        
-        query = query.filter(
-            or_(
-                Cliente.nome.ilike(f'%{termo}%'),
-                func.replace(func.replace(func.replace(
-                    Cliente.cpf, '.', ''), '-', ''), ' ', ''
-                ).ilike(f'%{termo_limpo}%'),
-                func.replace(func.replace(func.replace(func.replace(
-                    Cliente.telefone, '(', ''), ')', ''), '-', ''), ' ', ''
-                ).ilike(f'%{termo_limpo}%')
-            )
-        ).order_by(Cliente.nome).limit(limite)
-        
-        clientes = query.all()
-        
-        # Converter para JSON
-        resultado = []
-        for cliente in clientes:
-            resultado.append({
-                'id': cliente.id,
-                'nome': cliente.nome,
-                'cpf': cliente.cpf,
-                'telefone': cliente.telefone,
-                'limite_credito': float(cliente.limite_credito),
-                'valor_aberto': float(cliente.valor_total_em_aberto),
-                'credito_disponivel': float(cliente.credito_disponivel),
-                'pode_comprar': cliente.pode_comprar,
-                'esta_inadimplente': cliente.esta_inadimplente,
-                'ativo': cliente.ativo
-            })
+        # Uma consulta só de colunas, com o saldo consolidado de cada cliente
+        if Cliente.busca_por_digitos(termo):
+            condicoes = [Cliente.condicao_busca(termo)]
+            if apenas_ativos:
+                condicoes.append(Cliente.ativo == True)
+            resultado = Cliente.resumos_credito(*condicoes, ordem=Cliente.nome, limite=limite)
+        else:
+            # Nomes: candidatos do índice em memória; o banco só carrega os escolhidos
+            ids = indice_clientes_service.buscar(termo, limite=limite, apenas_ativos=apenas_ativos)
+            por_id = {r['id']: r for r in Cliente.resumos_credito(Cliente.id.in_(ids))} if ids else {}
+            resultado = [por_id[i] for i in ids if i in por_id]
         
         return jsonify(resultado)
         
@@ -85,24 +60,14 @@ def cliente_resumo(id):
     
     try:
         cliente = Cliente.query.get_or_404(id)
+        campos = campos_da_requisicao() or CAMPOS_RESUMO_CLIENTE
         
+        return jsonify(serializador_cliente.serializar(cliente, campos))
+    
+    except ValueError as e:
         return jsonify({
-            'id': cliente.id,
-            'nome': cliente.nome,
-            'cpf': cliente.cpf,
-            'telefone': cliente.telefone,
-            'endereco': cliente.endereco,
-            'limite_credito': float(cliente.limite_credito),
-            'ativo': cliente.ativo,
-            'valor_total_em_aberto': float(cliente.valor_total_em_aberto),
-            'valor_total_vencido': float(cliente.valor_total_vencido),
-            'credito_disponivel': float(cliente.credito_disponivel),
-            'pode_comprar': cliente.pode_comprar,
-            'esta_inadimplente': cliente.esta_inadimplente,
-            'total_vendas': cliente.vendas.count(),
-            'vendas_em_aberto': cliente.vendas_em_aberto.count(),
-            'vendas_vencidas': cliente.vendas_vencidas.count()
-        })
+            'error': str(e)
+        }), 400
         
     except Exception as e:
         return jsonify({
@@ -118,24 +83,26 @@ def cliente_vendas_abertas(id):
     try:
         cliente = Cliente.query.get_or_404(id)
         vendas = cliente.vendas_em_aberto.order_by(Venda.data_vencimento).all()
+        resumos = Venda.carregar_resumos(vendas, limite_itens=2)
         
         resultado = []
         for venda in vendas:
+            resumo = resumos[venda.id]
             resultado.append({
                 'id': venda.id,
                 'data_venda': venda.data_venda.strftime('%d/%m/%Y'),
                 'data_vencimento': venda.data_vencimento.strftime('%d/%m/%Y'),
                 'total': float(venda.total),
-                'valor_pago': float(venda.valor_pago),
-                'valor_restante': float(venda.valor_restante),
+                'valor_pago': float(resumo['valor_pago']),
+                'valor_restante': float(resumo['valor_restante']),
                 'dias_atraso': venda.dias_atraso,
                 'esta_vencida': venda.esta_vencida,
                 'eh_restante': venda.eh_restante,
                 'status': venda.status,
-                'itens_count': venda.itens.count(),
-                'descricao_resumo': ', '.join([
-                    item.descricao for item in venda.itens.limit(2)
-                ]) + ('...' if venda.itens.count() > 2 else '')
+                'itens_count': resumo['itens_count'],
+                'descricao_resumo': ', '.join(resumo['itens_descricoes']) + (
+                    '...' if resumo['itens_count'] > 2 else ''
+                )
             })
         
         return jsonify({
@@ -278,7 +245,7 @@ def pagamentos_simular_multiplo():
         vendas = Venda.query.filter(
             Venda.id.in_(vendas_ids),
             Venda.status == STATUS_VENDA['ABERTA']
-        ).all()
+        ).order_by(Venda.data_vencimento, Venda.id).all()
         
         if len(vendas) != len(vendas_ids):
             return jsonify({
@@ -288,29 +255,11 @@ def pagamentos_simular_multiplo():
         
         valor_total_vendas = sum(v.valor_restante for v in vendas)
         
-        # Simular distribuição proporcional
+        # Simular distribuição proporcional (mesma regra usada ao liquidar)
         distribuicao = []
-        valor_restante_distribuir = valor_pago
+        valores = distribuir_proporcional(valor_pago, [v.valor_restante for v in vendas])
         
-        for venda in vendas:
-            if valor_restante_distribuir <= 0:
-                valor_para_venda = Decimal('0')
-            else:
-                # Calcular proporção desta venda no total
-                proporcao = venda.valor_restante / valor_total_vendas
-                valor_para_venda = valor_pago * proporcao
-                
-                # Limitar ao valor restante da venda e ao valor ainda disponível
-                valor_para_venda = min(
-                    valor_para_venda,
-                    venda.valor_restante,
-                    valor_restante_distribuir
-                )
-                
-                # Arredondar para 2 casas decimais
-                valor_para_venda = valor_para_venda.quantize(Decimal('0.01'))
-                valor_restante_distribuir -= valor_para_venda
-            
+        for venda, valor_para_venda in zip(vendas, valores):
             nova_situacao_venda = venda.valor_restante - valor_para_venda
             
             distribuicao.append({
@@ -351,28 +300,12 @@ def pagamentos_simular_multiplo():
 
 @api_bp.route('/dashboard/stats')
 @login_required
+@cache_response(timeout=60, tags=dashboard_service.TAGS_CACHE)
 def dashboard_stats():
     """Estatísticas atualizadas do dashboard"""
     
     try:
-        hoje = date.today()
-        inicio_mes = hoje.replace(day=1)
-        
-        stats = {
-            'vendas_hoje': Venda.query.filter(Venda.data_venda == hoje).count(),
-            'vendas_mes': Venda.query.filter(Venda.data_venda >= inicio_mes).count(),
-            'clientes_ativos': Cliente.query.filter(Cliente.ativo == True).count(),
-            'vendas_abertas': Venda.query.filter(Venda.status == STATUS_VENDA['ABERTA']).count(),
-            'vendas_vencidas': Venda.vendas_vencidas().count(),
-            'valor_aberto': float(db.session.query(
-                func.sum(Venda.total)
-            ).filter(Venda.status == STATUS_VENDA['ABERTA']).scalar() or 0),
-            'valor_recebido_hoje': float(db.session.query(
-                func.sum(Pagamento.valor)
-            ).filter(Pagamento.data_pagamento == hoje).scalar() or 0)
-        }
-        
-        return jsonify(stats)
+        return jsonify(dashboard_service.calcular_estatisticas())
         
     except Exception as e:
         return jsonify({
@@ -382,74 +315,57 @@ def dashboard_stats():
 
 @api_bp.route('/dashboard/alertas')
 @login_required
+@cache_response(timeout=60, tags=dashboard_service.TAGS_CACHE)
 def dashboard_alertas():
     """Alertas atualizados do dashboard"""
     
     try:
-        from app.utils.constants import DIAS_INADIMPLENCIA
-        
-        alertas = []
-        hoje = date.today()
-        
-        # Vendas vencidas há mais de X dias
-        data_limite = hoje - timedelta(days=DIAS_INADIMPLENCIA)
-        vendas_inadimplentes = Venda.query.filter(
-            Venda.status == STATUS_VENDA['ABERTA'],
-            Venda.data_vencimento < data_limite
-        ).count()
-        
-        if vendas_inadimplentes > 0:
-            alertas.append({
-                'tipo': 'danger',
-                'icone': 'fas fa-exclamation-triangle',
-                'titulo': f'{vendas_inadimplentes} venda(s) inadimplente(s)',
-                'descricao': f'Vendas em aberto há mais de {DIAS_INADIMPLENCIA} dias',
-                'link': '/vendas?status=vencida',
-                'link_texto': 'Ver vendas'
-            })
-        
-        # Vendas que vencem hoje
-        vendas_vencem_hoje = Venda.query.filter(
-            Venda.status == STATUS_VENDA['ABERTA'],
-            Venda.data_vencimento == hoje
-        ).count()
-        
-        if vendas_vencem_hoje > 0:
-            alertas.append({
-                'tipo': 'warning',
-                'icone': 'fas fa-clock',
-                'titulo': f'{vendas_vencem_hoje} venda(s) vencem hoje',
-                'descricao': 'Acompanhe os pagamentos',
-                'link': f'/vendas?data_vencimento={hoje}',
-                'link_texto': 'Ver vendas'
-            })
-        
-        # Clientes próximos do limite
-        clientes_limite = db.session.query(Cliente).join(Venda).filter(
-            Cliente.ativo == True,
-            Venda.status == STATUS_VENDA['ABERTA']
-        ).group_by(Cliente.id).having(
-            func.sum(Venda.total) > (Cliente.limite_credito * 0.8)
-        ).count()
-        
-        if clientes_limite > 0:
-            alertas.append({
-                'tipo': 'info',
-                'icone': 'fas fa-credit-card',
-                'titulo': f'{clientes_limite} cliente(s) próximo(s) do limite',
-                'descricao': 'Mais de 80% do limite de crédito utilizado',
-                'link': '/clientes?filtro=limite',
-                'link_texto': 'Ver clientes'
-            })
-        
-        return jsonify(alertas)
-        
+        return jsonify(dashboard_service.obter_alertas())
+    
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+@api_bp.route('/series')
+@login_required
+def series_temporais():
+    """Séries de vendas, recebimentos, novo crédito e vencido por período"""
+    
+    hoje = date.today()
+    data_inicio = parse_date(request.args.get('inicio', '')) or hoje.replace(day=1) - timedelta(days=365)
+    data_fim = parse_date(request.args.get('fim', '')) or hoje
+    granularidade = request.args.get('granularidade', 'mes')
+    metricas = [m for m in request.args.get('metricas', '').split(',') if m] or None
+    
+    try:
+        return jsonify({
+            'success': True,
+            **serie_temporal_service.obter_series(data_inicio, data_fim, granularidade, metricas)
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
+            'success': False,
             'error': str(e)
         }), 500
 
 
+@api_bp.route('/sistema/cache')
+@login_required
+def sistema_cache():
+    """Contadores do cache de respostas"""
+    from app.utils.cache import response_cache
+    
+    return jsonify(response_cache.stats())
+
+
 # Endpoints Utilitários
 
 @api_bp.route('/utils/format-currency/<valor>')
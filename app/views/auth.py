@@ -10,6 +10,7 @@ from flask import (
 )
 from app.utils.helpers import flash_success, flash_error, flash_warning
 from app.utils.decorators import log_action
+from app.utils.rate_limit import rate_limiter
 
 
 auth_bp = Blueprint('auth', __name__)
@@ -281,33 +282,21 @@ def security_headers(response):
     return response
 
 
-# Rate limiting simples (em memória)
-login_attempts = {}
+# Rate limiting de login (limitador compartilhado entre workers)
+LOGIN_MAX_TENTATIVAS = 5
+LOGIN_PERIODO = 3600  # 1 hora
 
 @auth_bp.before_request
 def rate_limit_login():
     """Rate limiting para tentativas de login"""
     
     if request.endpoint == 'auth.login' and request.method == 'POST':
-        client_ip = request.remote_addr
-        now = datetime.utcnow()
-        
-        # Limpar tentativas antigas (mais de 1 hora)
-        if client_ip in login_attempts:
-            login_attempts[client_ip] = [
-                attempt for attempt in login_attempts[client_ip]
-                if now - attempt < timedelta(hours=1)
-            ]
-        
-        # Verificar limite (5 tentativas por hora)
-        if client_ip in login_attempts and len(login_attempts[client_ip]) >= 5:
-            flash_error('Muitas tentativas de login. Tente novamente em 1 hora.')
-            return render_template('login.html'), 429
+        resultado = rate_limiter.hit(f"login:{request.remote_addr}", LOGIN_MAX_TENTATIVAS, LOGIN_PERIODO)
         
-        # Registrar tentativa
-        if client_ip not in login_attempts:
-            login_attempts[client_ip] = []
-        login_attempts[client_ip].append(now)
+        if not resultado.permitido:
+            minutos = max(1, resultado.retry_after // 60)
+            flash_error(f'Muitas tentativas de login. Tente novamente em {minutos} minuto(s).')
+            return render_template('login.html'), 429, {'Retry-After': str(resultado.retry_after)}
 
 
 # Context processor para dados de sessão
@@ -3,16 +3,21 @@ Blueprint Clientes - CRUD completo de clientes
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from app import db
-from app.models import Cliente, Venda
+from app.models import Cliente, Venda, LinhaVenda, LinhaCliente, InadimplenciaCliente
+from app.models.serializadores import (
+    serializador_cliente, serializador_venda,
+    CAMPOS_RESUMO_CLIENTE, CAMPOS_VENDAS_CLIENTE
+)
 from app.utils.helpers import (
     flash_success, flash_error, flash_warning, 
     format_currency, validate_cpf, paginate_query
 )
+from app.utils.paginacao import paginar_por_cursor
+from app.utils.serializacao import campos_da_requisicao
 from app.utils.constants import ITEMS_PER_PAGE
 from app.views.auth import login_required
-from datetime import date, timedelta
 
 
 clientes_bp = Blueprint('clientes', __name__)
@@ -22,11 +27,12 @@ clientes_bp = Blueprint('clientes', __name__)
 @login_required
 def index():
     """Listagem de clientes com busca e filtros"""
+    from app.services import inadimplencia_service
     
     # Parâmetros de busca
     termo_busca = request.args.get('q', '').strip()
     filtro = request.args.get('filtro', 'todos')
-    page = int(request.args.get('page', 1))
+    cursor = request.args.get('cursor')
     per_page = int(request.args.get('per_page', ITEMS_PER_PAGE))
     
     # Query base
@@ -38,65 +44,42 @@ def index():
     elif filtro == 'inativos':
         query = query.filter(Cliente.ativo == False)
     elif filtro == 'inadimplentes':
-        # Clientes com vendas vencidas
-        data_limite = date.today() - timedelta(days=30)
-        query = query.join(Venda).filter(
+        # Clientes inadimplentes no último processamento da inadimplência
+        query = query.filter(
             Cliente.ativo == True,
-            Venda.status == 'aberta',
-            Venda.data_vencimento < data_limite
-        ).distinct()
+            Cliente.id.in_(InadimplenciaCliente.ids_inadimplentes())
+        )
     elif filtro == 'limite':
         # Clientes próximos do limite (80% ou mais)
-        query = query.join(Venda).filter(
+        query = query.filter(
             Cliente.ativo == True,
-            Venda.status == 'aberta'
-        ).group_by(Cliente.id).having(
-            func.sum(Venda.total) >= (Cliente.limite_credito * 0.8)
+            Cliente.saldo_aberto >= (Cliente.limite_credito * 0.8)
         )
     
-    # Busca por termo
-    if termo_busca:
-        # Remover formatação para busca em CPF e telefone
-        termo_limpo = ''.join(filter(str.isalnum, termo_busca))
-        
-        query = query.filter(
-            or_(
-                Cliente.nome.ilike(f'%{termo_busca}%'),
-                func.replace(func.replace(func.replace(
-                    Cliente.cpf, '.', ''), '-', ''), ' ', ''
-                ).ilike(f'%{termo_limpo}%'),
-                func.replace(func.replace(func.replace(func.replace(
-                    Cliente.telefone, '(', ''), ')', ''), '-', ''), ' ', ''
-                ).ilike(f'%{termo_limpo}%')
-            )
-        )
+    # Busca por termo (nome, ou prefixo de CPF/telefone)
+    condicao_busca = Cliente.condicao_busca(termo_busca)
+    if condicao_busca is not None:
+        query = query.filter(condicao_busca)
     
-    # Ordenação
+    # Ordenação (desempatada pelo id, que fecha a chave do cursor)
     ordenacao = request.args.get('ordem', 'nome')
     if ordenacao == 'data_cadastro':
-        query = query.order_by(Cliente.data_cadastro.desc())
+        ordem = [(Cliente.data_cadastro, True), (Cliente.id, True)]
     elif ordenacao == 'limite_credito':
-        query = query.order_by(Cliente.limite_credito.desc())
+        ordem = [(Cliente.limite_credito, True), (Cliente.id, True)]
     elif ordenacao == 'valor_aberto':
-        # Ordenar por valor em aberto (requer subquery)
-        subquery = db.session.query(
-            Venda.cliente_id,
-            func.sum(Venda.total).label('total_aberto')
-        ).filter(
-            Venda.status == 'aberta'
-        ).group_by(Venda.cliente_id).subquery()
-        
-        query = query.outerjoin(
-            subquery, Cliente.id == subquery.c.cliente_id
-        ).order_by(subquery.c.total_aberto.desc().nullslast())
+        ordem = [(Cliente.saldo_aberto, True), (Cliente.id, True)]
     else:
-        query = query.order_by(Cliente.nome)
+        ordem = [(Cliente.nome, False), (Cliente.id, False)]
     
     # Paginação
-    pagination = query.paginate(
-        page=page,
+    pagination = paginar_por_cursor(
+        LinhaCliente.consulta(query), ordem,
+        cursor=cursor,
         per_page=per_page,
-        error_out=False
+        contar_total=True,
+        tags_total=('clientes', inadimplencia_service.TAG_CACHE),
+        montar=LinhaCliente.da_linha
     )
     
     clientes = pagination.items
@@ -107,8 +90,8 @@ def index():
         'clientes_ativos': Cliente.query.filter(Cliente.ativo == True).count(),
         'clientes_inadimplentes': Cliente.clientes_inadimplentes().count(),
         'valor_total_aberto': db.session.query(
-            func.sum(Venda.total)
-        ).filter(Venda.status == 'aberta').scalar() or 0
+            func.sum(Cliente.saldo_aberto)
+        ).scalar() or 0
     }
     
     return render_template(
@@ -118,7 +101,8 @@ def index():
         stats=stats,
         termo_busca=termo_busca,
         filtro=filtro,
-        ordenacao=ordenacao
+        ordenacao=ordenacao,
+        inadimplencia=inadimplencia_service.situacao()
     )
 
 
@@ -206,6 +190,53 @@ def create():
     return render_template('clientes/form.html')
 
 
+@clientes_bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+def importar():
+    """Importar clientes de planilha CSV ou XLSX"""
+
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            flash_error('Selecione o arquivo da planilha.')
+            return render_template('clientes/importar.html')
+
+        from app.services import cliente_service
+        sucesso, mensagem, resultado = cliente_service.importar_clientes(
+            arquivo.stream, arquivo.filename, processos=1
+        )
+
+        if not sucesso:
+            flash_error(mensagem)
+        elif resultado.total_erros:
+            flash_warning(mensagem)
+        else:
+            flash_success(mensagem)
+
+        return render_template('clientes/importar.html', resultado=resultado)
+
+    # GET - Mostrar formulário
+    return render_template('clientes/importar.html')
+
+
+@clientes_bp.route('/exportar')
+@login_required
+def exportar():
+    """Exportar clientes filtrados (CSV ou XLSX, sem limite de linhas)"""
+    
+    filtros = {
+        'filtro': request.args.get('filtro', 'todos'),
+        'q': request.args.get('q', '').strip()
+    }
+    
+    from app.services import export_service
+    try:
+        return export_service.resposta('clientes', request.args.get('formato', 'csv'), filtros)
+    except ValueError as e:
+        flash_error(str(e))
+        return redirect(url_for('clientes.index'))
+
+
 @clientes_bp.route('/<int:id>')
 @login_required
 def view(id):
@@ -445,23 +476,11 @@ def api_resumo(id):
     
     cliente = Cliente.query.get_or_404(id)
     
-    return jsonify({
-        'id': cliente.id,
-        'nome': cliente.nome,
-        'cpf': cliente.cpf,
-        'telefone': cliente.telefone,
-        'endereco': cliente.endereco,
-        'limite_credito': float(cliente.limite_credito),
-        'ativo': cliente.ativo,
-        'valor_total_em_aberto': float(cliente.valor_total_em_aberto),
-        'valor_total_vencido': float(cliente.valor_total_vencido),
-        'credito_disponivel': float(cliente.credito_disponivel),
-        'pode_comprar': cliente.pode_comprar,
-        'esta_inadimplente': cliente.esta_inadimplente,
-        'total_vendas': cliente.vendas.count(),
-        'vendas_em_aberto': cliente.vendas_em_aberto.count(),
-        'vendas_vencidas': cliente.vendas_vencidas.count()
-    })
+    try:
+        campos = campos_da_requisicao() or CAMPOS_RESUMO_CLIENTE
+        return jsonify(serializador_cliente.serializar(cliente, campos))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @clientes_bp.route('/api/<int:id>/vendas')
@@ -471,7 +490,7 @@ def api_vendas(id):
     
     cliente = Cliente.query.get_or_404(id)
     status = request.args.get('status', 'todas')
-    page = int(request.args.get('page', 1))
+    cursor = request.args.get('cursor')
     per_page = int(request.args.get('per_page', 10))
     
     # Filtrar vendas por status
@@ -483,31 +502,26 @@ def api_vendas(id):
     elif status == 'vencidas':
         query = cliente.vendas_vencidas
     
-    # Ordenar por data mais recente
-    query = query.order_by(Venda.data_venda.desc())
-    
-    # Paginar
-    pagination = query.paginate(
-        page=page,
+    # Paginar da venda mais recente para a mais antiga
+    pagination = paginar_por_cursor(
+        LinhaVenda.consulta(query), [(Venda.data_venda, True), (Venda.id, True)],
+        cursor=cursor,
         per_page=per_page,
-        error_out=False
+        contar_total=request.args.get('total', type=int) == 1,
+        tags_total=('vendas',),
+        montar=LinhaVenda.da_linha
     )
     
-    # Converter para JSON
-    vendas = []
-    for venda in pagination.items:
-        vendas.append(venda.to_dict(include_itens=False))
+    # Converter para JSON: campos pedidos em ?fields= (itens e notas de restante em lote)
+    try:
+        campos = campos_da_requisicao() or CAMPOS_VENDAS_CLIENTE
+        vendas = serializador_venda.serializar_lista(pagination.items, campos)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'vendas': vendas,
-        'pagination': {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_prev': pagination.has_prev,
-            'has_next': pagination.has_next
-        }
+        'pagination': pagination.to_dict()
     })
 
 
@@ -5,12 +5,14 @@ Blueprint Pagamentos - Gestão de pagamentos e pagamentos múltiplos
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from sqlalchemy import func, and_
 from app import db
-from app.models import Cliente, Venda, Pagamento, PagamentoMultiplo, PagamentoMultiploDetalhe, ItemVenda
+from app.models import Cliente, Venda, Pagamento
 from app.utils.helpers import (
     flash_success, flash_error, flash_warning, 
-    format_currency, parse_currency, paginate_query
+    format_currency, parse_currency, paginate_query, distribuir_proporcional
 )
 from app.utils.constants import ITEMS_PER_PAGE, STATUS_VENDA, FORMAS_PAGAMENTO
+from app.utils.paginacao import paginar_por_cursor
+from app.services import pagamento_service, export_service
 from app.views.auth import login_required
 from datetime import date, timedelta
 from decimal import Decimal
@@ -29,7 +31,7 @@ def index():
     data_fim = request.args.get('data_fim', '')
     forma_pagamento = request.args.get('forma_pagamento', 'todas')
     cliente_id = request.args.get('cliente_id', type=int)
-    page = int(request.args.get('page', 1))
+    cursor = request.args.get('cursor')
     per_page = int(request.args.get('per_page', ITEMS_PER_PAGE))
     
     # Query base com joins
@@ -56,14 +58,14 @@ def index():
         except ValueError:
             flash_error('Data de fim inválida.')
     
-    # Ordenação
-    query = query.order_by(Pagamento.data_pagamento.desc(), Pagamento.data_criacao.desc())
-    
-    # Paginação
-    pagination = query.paginate(
-        page=page,
+    # Paginação do mais recente para o mais antigo (o id fecha a chave do cursor)
+    pagination = paginar_por_cursor(
+        query,
+        [(Pagamento.data_pagamento, True), (Pagamento.data_criacao, True), (Pagamento.id, True)],
+        cursor=cursor,
         per_page=per_page,
-        error_out=False
+        contar_total=True,
+        tags_total=('pagamentos',)
     )
     
     pagamentos = pagination.items
@@ -99,6 +101,26 @@ def index():
     )
 
 
+
+@pagamentos_bp.route('/exportar')
+@login_required
+def exportar():
+    """Exportar pagamentos filtrados (CSV ou XLSX, sem limite de linhas)"""
+    
+    filtros = {
+        'data_inicio': request.args.get('data_inicio', ''),
+        'data_fim': request.args.get('data_fim', ''),
+        'forma_pagamento': request.args.get('forma_pagamento', 'todas'),
+        'cliente_id': request.args.get('cliente_id', type=int)
+    }
+    
+    try:
+        return export_service.resposta('pagamentos', request.args.get('formato', 'csv'), filtros)
+    except ValueError as e:
+        flash_error(str(e))
+        return redirect(url_for('pagamentos.index'))
+
+
 @pagamentos_bp.route('/novo', methods=['GET', 'POST'])
 @login_required
 def create():
@@ -247,140 +269,33 @@ def multiplo():
                 return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
             
             vendas_ids = [int(v) for v in vendas_selecionadas]
-            vendas = Venda.query.filter(
-                Venda.id.in_(vendas_ids),
-                Venda.cliente_id == cliente_id,
-                Venda.status == STATUS_VENDA['ABERTA']
-            ).all()
-            
-            if len(vendas) != len(vendas_ids):
-                flash_error('Uma ou mais vendas são inválidas.')
-                return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
-            
-            # Calcular valor total das vendas
-            valor_total_vendas = sum(v.valor_restante for v in vendas)
-            
-            # Validar valor pago
-            if valor_pago <= 0:
-                flash_error('Valor pago deve ser maior que zero.')
-                return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
-            
-            if valor_pago > valor_total_vendas:
-                flash_error(f'Valor pago maior que o total das vendas (R$ {valor_total_vendas:.2f}).')
-                return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
             
             # Processar valor recebido (apenas para dinheiro)
             valor_recebido = None
             if forma_pagamento == FORMAS_PAGAMENTO['DINHEIRO'] and valor_recebido_str:
                 valor_recebido = parse_currency(valor_recebido_str)
-                if valor_recebido < valor_pago:
-                    flash_error('Valor recebido não pode ser menor que o valor pago.')
-                    return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
             
-            # Criar pagamento múltiplo
-            pagamento_multiplo = PagamentoMultiplo(
+            # Distribuir e gravar tudo em uma única transação
+            sucesso, mensagem, pagamento_multiplo = pagamento_service.liquidar_vendas(
                 cliente_id=cliente_id,
-                valor_total_notas=valor_total_vendas,
+                vendas_ids=vendas_ids,
                 valor_pago=valor_pago,
                 forma_pagamento=forma_pagamento,
                 valor_recebido=valor_recebido,
-                data_pagamento=date.today(),
                 observacoes=observacoes if observacoes else None
             )
             
-            db.session.add(pagamento_multiplo)
-            db.session.flush()  # Para obter o ID
-            
-            # Distribuir pagamento proporcionalmente entre as vendas
-            valor_restante_distribuir = valor_pago
-            
-            for venda in vendas:
-                if valor_restante_distribuir <= 0:
-                    break
-                
-                # Calcular valor proporcional para esta venda
-                proporcao = venda.valor_restante / valor_total_vendas
-                valor_para_venda = min(
-                    valor_pago * proporcao,
-                    venda.valor_restante,
-                    valor_restante_distribuir
-                )
-                
-                # Arredondar para evitar problemas de centavos
-                valor_para_venda = round(valor_para_venda, 2)
-                
-                # Criar detalhe do pagamento múltiplo
-                detalhe = PagamentoMultiploDetalhe(
-                    pagamento_multiplo_id=pagamento_multiplo.id,
-                    venda_id=venda.id,
-                    valor_original=venda.valor_restante,
-                    valor_pago=valor_para_venda
-                )
-                
-                db.session.add(detalhe)
-                
-                # Criar pagamento individual para a venda
-                pagamento_individual = Pagamento(
-                    venda_id=venda.id,
-                    valor=valor_para_venda,
-                    forma_pagamento=forma_pagamento,
-                    data_pagamento=date.today(),
-                    observacoes=f'Pagamento múltiplo #{pagamento_multiplo.id}'
-                )
-                
-                db.session.add(pagamento_individual)
-                
-                # Atualizar status da venda
-                venda.atualizar_status()
-                
-                valor_restante_distribuir -= valor_para_venda
-            
-            # Se sobrou valor, criar venda de restante
-            venda_restante = None
-            if pagamento_multiplo.valor_restante > 0:
-                # Criar nova venda para o restante
-                venda_restante = Venda(
-                    cliente_id=cliente_id,
-                    data_venda=date.today(),
-                    eh_restante=True,
-                    pagamento_multiplo_id=pagamento_multiplo.id,
-                    observacoes=f'Restante do pagamento múltiplo #{pagamento_multiplo.id}'
-                )
-                
-                # Gerar data de vencimento
-                venda_restante.gerar_data_vencimento()
-                
-                db.session.add(venda_restante)
-                db.session.flush()
-                
-                # Criar item para o restante
-                item_restante = ItemVenda.criar_item_restante(
-                    valor_restante=pagamento_multiplo.valor_restante,
-                    notas_ids=vendas_ids,
-                    data_pagamento=date.today()
-                )
-                
-                item_restante.venda_id = venda_restante.id
-                db.session.add(item_restante)
-                
-                # Recalcular totais da venda de restante
-                venda_restante.calcular_totais()
-            
-            # Salvar tudo
-            db.session.commit()
+            if not sucesso:
+                flash_error(mensagem)
+                return render_template('pagamentos/multiplo.html', cliente_selecionado=cliente_selecionado)
             
             # Mensagens de sucesso
             flash_success(f'Pagamento múltiplo de R$ {valor_pago:.2f} registrado com sucesso!')
-            flash_success(f'{len(vendas)} venda(s) processada(s).')
+            flash_success(f'{len(vendas_ids)} venda(s) processada(s).')
             
-            if venda_restante:
+            for venda_restante in pagamento_multiplo.vendas_restante:
                 flash_warning(f'Saldo restante de R$ {venda_restante.total:.2f} gerou uma nova venda (#{venda_restante.id}).')
             
-            # Verificar se alguma venda foi quitada
-            vendas_quitadas = [v for v in vendas if v.status == STATUS_VENDA['PAGA']]
-            if vendas_quitadas:
-                flash_success(f'{len(vendas_quitadas)} venda(s) quitada(s)!')
-            
             return redirect(url_for('clientes.view', id=cliente_id))
             
         except Exception as e:
@@ -403,19 +318,21 @@ def api_vendas_abertas(cliente_id):
         cliente = Cliente.query.get_or_404(cliente_id)
         
         vendas = cliente.vendas_em_aberto.order_by(Venda.data_vencimento).all()
+        resumos = Venda.carregar_resumos(vendas, limite_itens=3)
         
         resultado = []
         for venda in vendas:
+            resumo = resumos[venda.id]
             resultado.append({
                 'id': venda.id,
                 'data_venda': venda.data_venda.strftime('%d/%m/%Y'),
                 'data_vencimento': venda.data_vencimento.strftime('%d/%m/%Y'),
                 'total': float(venda.total),
-                'valor_restante': float(venda.valor_restante),
+                'valor_restante': float(resumo['valor_restante']),
                 'dias_atraso': venda.dias_atraso,
                 'esta_vencida': venda.esta_vencida,
                 'eh_restante': venda.eh_restante,
-                'itens_resumo': ', '.join([item.descricao for item in venda.itens.limit(3)])
+                'itens_resumo': ', '.join(resumo['itens_descricoes'])
             })
         
         return jsonify({
@@ -452,27 +369,15 @@ def api_simular_distribuicao():
         vendas = Venda.query.filter(
             Venda.id.in_(vendas_ids),
             Venda.status == STATUS_VENDA['ABERTA']
-        ).all()
+        ).order_by(Venda.data_vencimento, Venda.id).all()
         
         valor_total_vendas = sum(v.valor_restante for v in vendas)
         
-        # Simular distribuição
+        # Simular distribuição (mesma regra usada ao liquidar)
         distribuicao = []
-        valor_restante_distribuir = valor_pago
+        valores = distribuir_proporcional(valor_pago, [v.valor_restante for v in vendas])
         
-        for venda in vendas:
-            if valor_restante_distribuir <= 0:
-                valor_para_venda = Decimal('0')
-            else:
-                proporcao = venda.valor_restante / valor_total_vendas
-                valor_para_venda = min(
-                    valor_pago * proporcao,
-                    venda.valor_restante,
-                    valor_restante_distribuir
-                )
-                valor_para_venda = valor_para_venda.quantize(Decimal('0.01'))
-                valor_restante_distribuir -= valor_para_venda
-            
+        for venda, valor_para_venda in zip(vendas, valores):
             distribuicao.append({
                 'venda_id': venda.id,
                 'valor_original': float(venda.valor_restante),
@@ -0,0 +1,133 @@
+"""
+Blueprint Relatórios - Contas a receber, inadimplência e atalhos de relatórios
+"""
+
+from datetime import date
+
+from flask import Blueprint, render_template, request, redirect, url_for, Response, stream_with_context
+
+from app.services import relatorio_service, inadimplencia_service
+from app.utils.helpers import flash_error, flash_success, get_per_page_from_request, parse_date
+from app.views.auth import login_required
+
+
+relatorios_bp = Blueprint('relatorios', __name__)
+
+
+@relatorios_bp.route('/')
+@login_required
+def index():
+    """Lista de relatórios disponíveis"""
+    return render_template('relatorios/index.html')
+
+
+@relatorios_bp.route('/painel')
+@login_required
+def dashboard():
+    """Painel de relatórios (atalho para a lista)"""
+    return redirect(url_for('relatorios.index'))
+
+
+@relatorios_bp.route('/vendas')
+@login_required
+def vendas():
+    """Relatório de vendas: listagem de vendas com os mesmos filtros"""
+    return redirect(url_for('vendas.index', **request.args.to_dict()))
+
+
+@relatorios_bp.route('/contas-a-receber')
+@login_required
+def contas_receber():
+    """Contas a receber por faixa de atraso (aging)"""
+    apenas_vencidos = request.args.get('vencidos') == '1'
+    return _contas_a_receber('relatorios/contas_receber.html', apenas_vencidos)
+
+
+@relatorios_bp.route('/inadimplentes')
+@login_required
+def inadimplentes():
+    """Clientes com vendas vencidas, pela tabela de inadimplência processada"""
+    ordenacao = request.args.get('ordem', 'atraso')
+    if ordenacao not in relatorio_service.ORDENACOES:
+        ordenacao = 'atraso'
+    apenas_inadimplentes = request.args.get('inadimplentes') == '1'
+
+    if request.args.get('formato') == 'csv':
+        nome_arquivo = f"inadimplentes_{date.today().strftime('%Y%m%d')}.csv"
+        resposta = Response(
+            stream_with_context(relatorio_service.inadimplentes_csv(ordenacao, apenas_inadimplentes)),
+            mimetype='text/csv; charset=utf-8'
+        )
+        resposta.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return resposta
+
+    try:
+        relatorio = relatorio_service.inadimplentes(
+            cursor=request.args.get('cursor'),
+            per_page=get_per_page_from_request(),
+            ordenacao=ordenacao,
+            apenas_inadimplentes=apenas_inadimplentes
+        )
+    except Exception as e:
+        flash_error(f'Erro ao gerar relatório: {str(e)}')
+        return redirect(url_for('relatorios.index'))
+
+    return render_template(
+        'relatorios/inadimplentes.html',
+        relatorio=relatorio,
+        clientes=relatorio['pagination'].items,
+        pagination=relatorio['pagination'],
+        situacao=relatorio['situacao'],
+        apenas_inadimplentes=apenas_inadimplentes,
+        ordenacao=ordenacao
+    )
+
+
+@relatorios_bp.route('/inadimplentes/atualizar', methods=['POST'])
+@login_required
+def atualizar_inadimplentes():
+    """Processar a inadimplência agora, sem esperar o processamento noturno"""
+    sucesso, mensagem, _ = inadimplencia_service.atualizar()
+    if sucesso:
+        flash_success(mensagem)
+    else:
+        flash_error(mensagem)
+    return redirect(url_for('relatorios.inadimplentes'))
+
+
+def _contas_a_receber(template: str, apenas_vencidos: bool):
+    """Tela ou CSV do relatório de contas a receber"""
+    data_base = parse_date(request.args.get('data', '')) or date.today()
+    ordenacao = request.args.get('ordem', 'atraso')
+    if ordenacao not in relatorio_service.ORDENACOES:
+        ordenacao = 'atraso'
+
+    if request.args.get('formato') == 'csv':
+        nome_arquivo = f"contas_receber_{data_base.strftime('%Y%m%d')}.csv"
+        resposta = Response(
+            stream_with_context(relatorio_service.contas_a_receber_csv(data_base, apenas_vencidos, ordenacao)),
+            mimetype='text/csv; charset=utf-8'
+        )
+        resposta.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return resposta
+
+    try:
+        relatorio = relatorio_service.contas_a_receber(
+            data_base=data_base,
+            cursor=request.args.get('cursor'),
+            per_page=get_per_page_from_request(),
+            apenas_vencidos=apenas_vencidos,
+            ordenacao=ordenacao
+        )
+    except Exception as e:
+        flash_error(f'Erro ao gerar relatório: {str(e)}')
+        return redirect(url_for('relatorios.index'))
+
+    return render_template(
+        template,
+        relatorio=relatorio,
+        clientes=relatorio['pagination'].items,
+        pagination=relatorio['pagination'],
+        apenas_vencidos=apenas_vencidos,
+        ordenacao=ordenacao
+    )
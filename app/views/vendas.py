@@ -11,10 +11,10 @@ from sqlalchemy.orm import joinedload
 
 from app import db
 from app.models import Cliente, Venda, ItemVenda, Pagamento
-from app.services import venda_service, pagamento_service
+from app.services import venda_service, pagamento_service, export_service
 from app.utils.helpers import (
     flash_success, flash_error, flash_warning, 
-    format_currency, parse_currency, get_page_from_request,
+    format_currency, parse_currency,
     get_per_page_from_request, build_filters_from_request
 )
 from app.utils.constants import ITEMS_PER_PAGE, STATUS_VENDA, FORMAS_PAGAMENTO
@@ -34,7 +34,7 @@ def index():
     
     # Parâmetros de busca e filtros
     termo_busca = request.args.get('q', '').strip()
-    page = get_page_from_request()
+    cursor = request.args.get('cursor')
     per_page = get_per_page_from_request()
     
     # Filtros permitidos
@@ -48,14 +48,14 @@ def index():
             # Busca por termo
             resultado = venda_service.buscar_vendas(
                 termo=termo_busca,
-                page=page,
+                cursor=cursor,
                 per_page=per_page
             )
         else:
             # Listagem com filtros
             resultado = venda_service.listar_vendas(
                 filtros=filtros,
-                page=page,
+                cursor=cursor,
                 per_page=per_page
             )
         
@@ -87,6 +87,41 @@ def index():
         )
 
 
+
+@vendas_bp.route('/exportar')
+@login_required
+def exportar():
+    """Exportar vendas filtradas (CSV ou XLSX, sem limite de linhas)"""
+    
+    filtros = build_filters_from_request([
+        'cliente_id', 'status', 'data_inicio', 'data_fim',
+        'valor_min', 'valor_max'
+    ])
+    
+    try:
+        return export_service.resposta('vendas', request.args.get('formato', 'csv'), filtros)
+    except ValueError as e:
+        flash_error(str(e))
+        return redirect(url_for('vendas.index'))
+
+
+@vendas_bp.route('/itens/exportar')
+@login_required
+def exportar_itens():
+    """Exportar itens das vendas filtradas (CSV ou XLSX)"""
+    
+    filtros = build_filters_from_request([
+        'cliente_id', 'status', 'data_inicio', 'data_fim',
+        'valor_min', 'valor_max'
+    ])
+    
+    try:
+        return export_service.resposta('itens', request.args.get('formato', 'csv'), filtros)
+    except ValueError as e:
+        flash_error(str(e))
+        return redirect(url_for('vendas.index'))
+
+
 @vendas_bp.route('/nova', methods=['GET', 'POST'])
 @login_required
 @log_action('create', 'Criação de nova venda')
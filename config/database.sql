@@ -18,8 +18,14 @@ CREATE TABLE IF NOT EXISTS clientes (
     nome VARCHAR(100) NOT NULL,
     cpf VARCHAR(14) UNIQUE DEFAULT NULL,
     telefone VARCHAR(15) DEFAULT NULL,
+    cpf_digitos VARCHAR(11) DEFAULT NULL,
+    telefone_digitos VARCHAR(15) DEFAULT NULL,
     endereco TEXT DEFAULT NULL,
     limite_credito DECIMAL(10,2) NOT NULL DEFAULT 500.00,
+    saldo_aberto DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    saldo_vencido DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    data_vencimento_mais_antiga DATE DEFAULT NULL,
+    data_calculo_saldo DATE DEFAULT NULL,
     ativo BOOLEAN NOT NULL DEFAULT TRUE,
     data_cadastro DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     data_atualizacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -28,8 +34,14 @@ CREATE TABLE IF NOT EXISTS clientes (
     -- Índices
     INDEX idx_clientes_nome (nome),
     INDEX idx_clientes_cpf (cpf),
+    INDEX idx_clientes_cpf_digitos (cpf_digitos),
+    INDEX idx_clientes_telefone_digitos (telefone_digitos),
     INDEX idx_clientes_ativo (ativo),
-    INDEX idx_clientes_data_cadastro (data_cadastro)
+    INDEX idx_clientes_vencimento_mais_antigo (data_vencimento_mais_antiga),
+    INDEX idx_clientes_data_cadastro (data_cadastro),
+    INDEX idx_clientes_data_atualizacao (data_atualizacao),
+    INDEX idx_clientes_limite_credito (limite_credito),
+    INDEX idx_clientes_saldo_aberto (saldo_aberto)
 ) ENGINE=InnoDB;
 
 -- ============================================
@@ -43,6 +55,8 @@ CREATE TABLE IF NOT EXISTS vendas (
     data_pagamento DATE DEFAULT NULL,
     subtotal DECIMAL(10,2) NOT NULL DEFAULT 0.00,
     total DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    valor_pago DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    valor_restante DECIMAL(10,2) NOT NULL DEFAULT 0.00,
     status VARCHAR(20) NOT NULL DEFAULT 'aberta',
     eh_restante BOOLEAN NOT NULL DEFAULT FALSE,
     pagamento_multiplo_id INT DEFAULT NULL,
@@ -61,7 +75,8 @@ CREATE TABLE IF NOT EXISTS vendas (
     INDEX idx_vendas_status (status),
     INDEX idx_vendas_total (total),
     INDEX idx_vendas_eh_restante (eh_restante),
-    INDEX idx_vendas_pagamento_multiplo (pagamento_multiplo_id)
+    INDEX idx_vendas_pagamento_multiplo (pagamento_multiplo_id),
+    INDEX idx_vendas_data_criacao (data_criacao)
 ) ENGINE=InnoDB;
 
 -- ============================================
@@ -148,9 +163,85 @@ CREATE TABLE IF NOT EXISTS pagamentos (
     -- Índices
     INDEX idx_pagamentos_venda (venda_id),
     INDEX idx_pagamentos_data (data_pagamento),
+    INDEX idx_pagamentos_data_criacao (data_pagamento, data_criacao),
     INDEX idx_pagamentos_forma (forma_pagamento)
 ) ENGINE=InnoDB;
 
+-- ============================================
+-- Tabela: resumo_diario
+-- Totais por dia mantidos pela aplicação a cada gravação de venda/pagamento
+-- (reconstruir com: python run.py rebuild-daily-summary)
+-- ============================================
+CREATE TABLE IF NOT EXISTS resumo_diario (
+    data DATE PRIMARY KEY,
+    vendas_qtd INT NOT NULL DEFAULT 0,
+    vendas_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    vendas_abertas_qtd INT NOT NULL DEFAULT 0,
+    vendas_abertas_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    vendas_pagas_qtd INT NOT NULL DEFAULT 0,
+    vendas_pagas_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    vendas_vencidas_qtd INT NOT NULL DEFAULT 0,
+    vendas_vencidas_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    pagamentos_qtd INT NOT NULL DEFAULT 0,
+    pagamentos_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    pagamentos_dinheiro_qtd INT NOT NULL DEFAULT 0,
+    pagamentos_dinheiro_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    pagamentos_cartao_qtd INT NOT NULL DEFAULT 0,
+    pagamentos_cartao_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    pagamentos_pix_qtd INT NOT NULL DEFAULT 0,
+    pagamentos_pix_valor DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    data_atualizacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- ============================================
+-- Tabela: inadimplencia_clientes
+-- Vendas vencidas de cada cliente na data de referência do último
+-- processamento; refeita toda noite e atualizada pelos pagamentos
+-- (processar com: python run.py refresh-delinquency)
+-- ============================================
+CREATE TABLE IF NOT EXISTS inadimplencia_clientes (
+    cliente_id INT PRIMARY KEY,
+    vendas_vencidas INT NOT NULL DEFAULT 0,
+    valor_vencido DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    vendas_inadimplentes INT NOT NULL DEFAULT 0,
+    valor_inadimplente DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    vencimento_mais_antigo DATE NOT NULL,
+    dias_atraso INT NOT NULL DEFAULT 0,
+    inadimplente BOOLEAN NOT NULL DEFAULT FALSE,
+    data_referencia DATE NOT NULL,
+    data_atualizacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    
+    INDEX idx_inadimplencia_clientes_inadimplente (inadimplente),
+    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- ============================================
+-- Tabela: inadimplencia_snapshot
+-- Um registro por processamento completo da inadimplência
+-- ============================================
+CREATE TABLE IF NOT EXISTS inadimplencia_snapshot (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    data_referencia DATE NOT NULL,
+    gerado_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    clientes_vencidos INT NOT NULL DEFAULT 0,
+    clientes_inadimplentes INT NOT NULL DEFAULT 0,
+    valor_vencido DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    valor_inadimplente DECIMAL(12,2) NOT NULL DEFAULT 0.00
+) ENGINE=InnoDB;
+
+-- ============================================
+-- Tabela: busca_vendas (índice textual das vendas)
+-- Nome do cliente, observações e descrições dos itens de cada venda,
+-- mantido pela aplicação a cada gravação
+-- ============================================
+CREATE TABLE IF NOT EXISTS busca_vendas (
+    venda_id INT PRIMARY KEY,
+    texto TEXT NOT NULL,
+    
+    FULLTEXT INDEX ft_busca_vendas_texto (texto),
+    FOREIGN KEY (venda_id) REFERENCES vendas(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
 -- ============================================
 -- Adicionar chave estrangeira para pagamento_multiplo_id em vendas
 -- (deve ser adicionada após criar a tabela pagamentos_multiplos)
@@ -177,17 +268,15 @@ SELECT
     c.nome as cliente_nome,
     c.cpf as cliente_cpf,
     c.telefone as cliente_telefone,
-    COALESCE(SUM(p.valor), 0) as valor_pago,
-    (v.total - COALESCE(SUM(p.valor), 0)) as valor_restante,
+    v.valor_pago,
+    v.valor_restante,
     CASE 
         WHEN v.status = 'paga' THEN 0
         WHEN v.data_vencimento < CURDATE() THEN DATEDIFF(CURDATE(), v.data_vencimento)
         ELSE 0 
     END as dias_atraso
 FROM vendas v
-INNER JOIN clientes c ON v.cliente_id = c.id
-LEFT JOIN pagamentos p ON v.id = p.venda_id
-GROUP BY v.id, c.id;
+INNER JOIN clientes c ON v.cliente_id = c.id;
 
 -- View: Clientes com resumo financeiro
 CREATE OR REPLACE VIEW vw_clientes_resumo AS
@@ -229,7 +318,8 @@ BEGIN
         SELECT COALESCE(SUM(subtotal), 0) 
         FROM itens_venda 
         WHERE venda_id = NEW.venda_id
-    )
+    ),
+    valor_restante = total - valor_pago
     WHERE id = NEW.venda_id;
 END$$
 
@@ -247,7 +337,8 @@ BEGIN
         SELECT COALESCE(SUM(subtotal), 0) 
         FROM itens_venda 
         WHERE venda_id = NEW.venda_id
-    )
+    ),
+    valor_restante = total - valor_pago
     WHERE id = NEW.venda_id;
 END$$
 
@@ -265,7 +356,8 @@ BEGIN
         SELECT COALESCE(SUM(subtotal), 0) 
         FROM itens_venda 
         WHERE venda_id = OLD.venda_id
-    )
+    ),
+    valor_restante = total - valor_pago
     WHERE id = OLD.venda_id;
 END$$
 
@@ -294,6 +386,47 @@ END$$
 
 DELIMITER ;
 
+-- ============================================
+-- Migrações para bancos existentes
+-- ============================================
+
+-- Valores pagos consolidados em vendas (preencher com: python run.py repair-balances)
+-- ALTER TABLE vendas
+--     ADD COLUMN valor_pago DECIMAL(10,2) NOT NULL DEFAULT 0.00 AFTER total,
+--     ADD COLUMN valor_restante DECIMAL(10,2) NOT NULL DEFAULT 0.00 AFTER valor_pago;
+
+-- Saldo consolidado dos clientes (preencher com: python run.py repair-balances)
+-- ALTER TABLE clientes
+--     ADD COLUMN saldo_aberto DECIMAL(10,2) NOT NULL DEFAULT 0.00 AFTER limite_credito,
+--     ADD COLUMN saldo_vencido DECIMAL(10,2) NOT NULL DEFAULT 0.00 AFTER saldo_aberto,
+--     ADD COLUMN data_vencimento_mais_antiga DATE DEFAULT NULL AFTER saldo_vencido,
+--     ADD COLUMN data_calculo_saldo DATE DEFAULT NULL AFTER data_vencimento_mais_antiga,
+--     ADD INDEX idx_clientes_vencimento_mais_antigo (data_vencimento_mais_antiga);
+
+-- CPF e telefone só com dígitos, para busca indexada (preencher com: python run.py normalize-documents)
+-- ALTER TABLE clientes
+--     ADD COLUMN cpf_digitos VARCHAR(11) DEFAULT NULL AFTER telefone,
+--     ADD COLUMN telefone_digitos VARCHAR(15) DEFAULT NULL AFTER cpf_digitos,
+--     ADD INDEX idx_clientes_cpf_digitos (cpf_digitos),
+--     ADD INDEX idx_clientes_telefone_digitos (telefone_digitos);
+
+-- Sincronização do índice de nomes entre workers
+-- ALTER TABLE clientes ADD INDEX idx_clientes_data_atualizacao (data_atualizacao);
+
+-- Paginação por cursor: índices das ordenações das listagens
+-- ALTER TABLE clientes
+--     ADD INDEX idx_clientes_limite_credito (limite_credito),
+--     ADD INDEX idx_clientes_saldo_aberto (saldo_aberto);
+-- ALTER TABLE vendas ADD INDEX idx_vendas_data_criacao (data_criacao);
+-- ALTER TABLE pagamentos ADD INDEX idx_pagamentos_data_criacao (data_pagamento, data_criacao);
+
+-- Busca textual de vendas: a aplicação cria a tabela busca_vendas se faltar; preencher com: python run.py rebuild-sales-search
+
+-- Resumo diário: criar a tabela acima e preencher com: python run.py rebuild-daily-summary
+
+-- Inadimplência: criar as tabelas inadimplencia_clientes e inadimplencia_snapshot acima,
+-- preencher com: python run.py refresh-delinquency e agendar o comando para toda noite
+
 -- ============================================
 -- Inserir dados iniciais de configuração
 -- ============================================
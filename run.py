@@ -6,6 +6,7 @@ Arquivo principal de execução da aplicação
 
 import os
 import sys
+import click
 from flask.cli import FlaskGroup
 from app import create_app, db
 
@@ -85,6 +86,126 @@ def test_printer():
         print(f"Erro no teste da impressora: {e}")
 
 
+@cli.command("repair-balances")
+def repair_balances():
+    """Recalcular valores pagos das vendas, saldos e inadimplência dos clientes"""
+    from app.models.venda import Venda
+    from app.models.cliente import Cliente
+    from app.models.inadimplencia import InadimplenciaCliente
+    
+    try:
+        print("Verificando saldos das vendas...")
+        corrigidas = Venda.recalcular_valores_pagos()
+        print("Recalculando saldos dos clientes...")
+        clientes = Cliente.recalcular_saldos()
+        InadimplenciaCliente.recalcular()
+        db.session.commit()
+        print(f"Saldos verificados. Vendas corrigidas: {corrigidas}. Clientes atualizados: {len(clientes)}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao recalcular saldos: {e}")
+
+
+@cli.command("rebuild-daily-summary")
+@click.option("--inicio", "data_inicio", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Primeiro dia a reconstruir (AAAA-MM-DD)")
+@click.option("--fim", "data_fim", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Último dia a reconstruir (AAAA-MM-DD)")
+def rebuild_daily_summary(data_inicio, data_fim):
+    """Reconstruir o resumo diário de vendas e recebimentos"""
+    from app.models.resumo_diario import ResumoDiario
+    
+    data_inicio = data_inicio.date() if data_inicio else None
+    data_fim = data_fim.date() if data_fim else None
+    
+    try:
+        print(f"Reconstruindo resumo diário ({data_inicio or 'início'} a {data_fim or 'hoje'})...")
+        dias = ResumoDiario.recalcular(data_inicio=data_inicio, data_fim=data_fim)
+        db.session.commit()
+        print(f"Resumo diário reconstruído. Dias com movimento: {dias}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao reconstruir resumo diário: {e}")
+
+
+@cli.command("refresh-delinquency")
+@click.option("--data", "data_referencia", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Data em que os atrasos são contados (AAAA-MM-DD; padrão: hoje)")
+def refresh_delinquency(data_referencia):
+    """Processar a inadimplência dos clientes (agendar para toda noite)"""
+    from app.services import inadimplencia_service
+    
+    data_referencia = data_referencia.date() if data_referencia else None
+    
+    print("Processando inadimplência dos clientes...")
+    sucesso, mensagem, _ = inadimplencia_service.atualizar(data_referencia)
+    print(mensagem if sucesso else f"Erro: {mensagem}")
+
+
+@cli.command("normalize-documents")
+def normalize_documents():
+    """Preencher as colunas de CPF e telefone só com dígitos (busca indexada)"""
+    from app.models.cliente import Cliente
+    
+    try:
+        print("Normalizando CPF e telefone dos clientes...")
+        atualizados = Cliente.normalizar_documentos_existentes()
+        db.session.commit()
+        print(f"Documentos normalizados. Clientes atualizados: {atualizados}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao normalizar documentos: {e}")
+
+
+@cli.command("rebuild-sales-search")
+def rebuild_sales_search():
+    """Reconstruir o índice de busca textual das vendas"""
+    from app.services import busca_vendas_service
+    
+    try:
+        print("Reconstruindo índice de busca das vendas...")
+        total = busca_vendas_service.reconstruir()
+        db.session.commit()
+        print(f"Índice reconstruído. Vendas indexadas: {total}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao reconstruir índice de busca: {e}")
+
+
+@cli.command("import-customers")
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--processos", type=int, default=1, show_default=True,
+              help="Processos de validação (1 valida no próprio processo; mais de 1 usa um pool)")
+def import_customers(arquivo, processos):
+    """Importar clientes de planilha CSV ou XLSX"""
+    from app.services import cliente_service
+
+    def progresso(resultado):
+        print(f"  {resultado.lidas} linhas lidas, {resultado.importadas} clientes importados...")
+
+    print(f"Importando clientes de {arquivo}...")
+    with open(arquivo, 'rb') as planilha:
+        sucesso, mensagem, resultado = cliente_service.importar_clientes(
+            planilha, arquivo, progresso=progresso, processos=processos
+        )
+
+    print(mensagem if sucesso else f"Erro: {mensagem}")
+    for linha, erro in resultado.erros:
+        print(f"  Linha {linha}: {erro}")
+    if resultado.total_erros > len(resultado.erros):
+        print(f"  ... e mais {resultado.total_erros - len(resultado.erros)} linha(s)")
+
+
+@cli.command("benchmark-currency")
+@click.option("--linhas", default=500, show_default=True, help="Valores por coluna")
+@click.option("--repeticoes", default=100, show_default=True, help="Execuções por medida")
+def benchmark_currency(linhas, repeticoes):
+    """Comparar o codec de moeda com a formatação anterior via locale"""
+    from scripts.benchmark_moeda import executar, imprimir
+
+    imprimir(executar(linhas, repeticoes), linhas)
+
+
 @cli.command("create-user")
 def create_user():
     """Criar usuário para acesso ao sistema"""
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark da formatação e leitura de valores em reais
+
+Compara o codec de app.utils.moeda com a implementação anterior de
+format_currency/parse_currency (locale.currency + str.replace e regex por
+chamada), mantida aqui só como referência.
+
+Uso:
+    python run.py benchmark-currency
+    python scripts/benchmark_moeda.py --linhas 500 --repeticoes 200
+"""
+
+import argparse
+import locale
+import os
+import random
+import re
+import sys
+import timeit
+from decimal import Decimal, InvalidOperation
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import moeda  # noqa: E402
+
+
+def format_currency_anterior(value, symbol='R$'):
+    """format_currency antes do codec (locale.currency por valor)"""
+    try:
+        if value is None:
+            return f"{symbol} 0,00"
+        if isinstance(value, str):
+            value = parse_currency_anterior(value)
+        decimal_value = Decimal(str(value))
+        try:
+            formatted = locale.currency(float(decimal_value), grouping=True, symbol=False)
+            return f"{symbol} {formatted}"
+        except Exception:
+            abs_value = abs(decimal_value)
+            formatted = f"{abs_value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            if decimal_value < 0:
+                formatted = f"-{formatted}"
+            return f"{symbol} {formatted}"
+    except (ValueError, TypeError, InvalidOperation):
+        return f"{symbol} 0,00"
+
+
+def parse_currency_anterior(value):
+    """parse_currency antes do codec"""
+    try:
+        if value is None:
+            return Decimal('0.00')
+        if isinstance(value, Decimal):
+            return value
+        if isinstance(value, (int, float)):
+            return Decimal(str(value))
+        clean_value = re.sub(r'[R$\s]', '', str(value).strip())
+        if not clean_value:
+            return Decimal('0.00')
+        if ',' in clean_value and '.' in clean_value:
+            clean_value = clean_value.replace('.', '').replace(',', '.')
+        elif ',' in clean_value and clean_value.count(',') == 1:
+            clean_value = clean_value.replace(',', '.')
+        return Decimal(clean_value)
+    except (ValueError, TypeError, InvalidOperation):
+        return Decimal('0.00')
+
+
+def gerar_valores(quantidade, semente=42):
+    """Valores típicos de uma listagem: totais de notas entre R$ 5 e R$ 5.000"""
+    aleatorio = random.Random(semente)
+    return [Decimal(aleatorio.randint(500, 500000)).scaleb(-2) for _ in range(quantidade)]
+
+
+def medir(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=3)) / repeticoes
+
+
+def executar(linhas=500, repeticoes=100):
+    """
+    Medir formatação e leitura de uma coluna de valores
+
+    Returns:
+        Lista de (operação, segundos anterior, segundos codec)
+    """
+    valores = gerar_valores(linhas)
+    textos = [format_currency_anterior(valor) for valor in valores]
+
+    # Os dois caminhos devem produzir o mesmo resultado
+    assert [moeda.formatar(valor) for valor in valores] == textos
+    assert [moeda.ler(texto) for texto in textos] == [parse_currency_anterior(texto) for texto in textos]
+    assert moeda.formatar_csv_coluna(valores) == [moeda.formatar_csv(valor) for valor in valores]
+
+    resultados = [
+        ('formatar (por valor)',
+         medir(lambda: [format_currency_anterior(v) for v in valores], repeticoes),
+         medir(lambda: [moeda.formatar(v) for v in valores], repeticoes)),
+        # Exportações: célula a célula (anterior) x coluna inteira
+        ('CSV (coluna)',
+         medir(lambda: [moeda.formatar_csv(v) for v in valores], repeticoes),
+         medir(lambda: moeda.formatar_csv_coluna(valores), repeticoes)),
+        ('ler',
+         medir(lambda: [parse_currency_anterior(t) for t in textos], repeticoes),
+         medir(lambda: [moeda.ler(t) for t in textos], repeticoes)),
+    ]
+    return resultados
+
+
+def imprimir(resultados, linhas):
+    print(f"{'Operação':<22}{'Anterior':>14}{'Codec':>14}{'Ganho':>9}   ({linhas} linhas)")
+    for operacao, anterior, codec in resultados:
+        print(f"{operacao:<22}{anterior * 1000:>11.3f} ms{codec * 1000:>11.3f} ms{anterior / codec:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=500)
+    parser.add_argument('--repeticoes', type=int, default=100)
+    argumentos = parser.parse_args()
+
+    for nome in ('pt_BR.UTF-8', 'Portuguese_Brazil.1252'):
+        try:
+            locale.setlocale(locale.LC_ALL, nome)
+            break
+        except locale.Error:
+            continue
+
+    imprimir(executar(argumentos.linhas, argumentos.repeticoes), argumentos.linhas)
+
+
+if __name__ == '__main__':
+    main()
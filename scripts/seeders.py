@@ -16,6 +16,7 @@ from app.models import (
     Cliente, Venda, ItemVenda, Pagamento, 
     PagamentoMultiplo, PagamentoMultiploDetalhe
 )
+from app.utils.helpers import distribuir_proporcional
 
 
 def create_clientes():
@@ -317,11 +318,9 @@ def create_pagamento_multiplo_exemplo(clientes):
     db.session.add(pagamento_multiplo)
     db.session.flush()
     
-    # Adicionar detalhes (distribuir proporcionalmente)
-    for venda in vendas:
-        proporcao = venda.total / total_vendas
-        valor_pago_venda = (valor_pago * proporcao).quantize(Decimal('0.01'))
-        
+    # Adicionar detalhes (distribuir proporcionalmente, sem perder centavos)
+    valores = distribuir_proporcional(valor_pago, [v.total for v in vendas])
+    for venda, valor_pago_venda in zip(vendas, valores):
         detalhe = PagamentoMultiploDetalhe(
             pagamento_multiplo_id=pagamento_multiplo.id,
             venda_id=venda.id,
@@ -329,20 +328,10 @@ def create_pagamento_multiplo_exemplo(clientes):
             valor_pago=valor_pago_venda
         )
         db.session.add(detalhe)
-        
-        # Criar pagamento individual para cada venda
-        pagamento = Pagamento(
-            venda_id=venda.id,
-            valor=valor_pago_venda,
-            forma_pagamento='dinheiro',
-            data_pagamento=pagamento_multiplo.data_pagamento,
-            observacoes=f"Pagamento múltiplo #{pagamento_multiplo.id}"
-        )
-        db.session.add(pagamento)
     
-    db.session.commit()
+    db.session.flush()
     
-    # Processar o pagamento múltiplo (criar nota de restante)
+    # Processar o pagamento múltiplo (pagamentos das notas e nota de restante)
     venda_restante = pagamento_multiplo.processar_pagamento()
     
     db.session.commit()
@@ -0,0 +1,107 @@
+"""
+Fixtures compartilhadas pelos testes
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import create_app, db as _db
+from app.models import Cliente, Venda
+from app.services import busca_vendas_service, indice_clientes_service
+
+
+@pytest.fixture
+def app():
+    """Aplicação de teste com banco em memória"""
+    app = create_app('testing')
+    # Cada teste tem um banco em memória novo, com a mesma URL
+    busca_vendas_service.esquecer_indices()
+    indice_clientes_service.limpar()
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def cliente(db):
+    cliente = Cliente(nome='Cliente Teste', telefone='31999990000', limite_credito=Decimal('5000.00'))
+    db.session.add(cliente)
+    db.session.commit()
+    return cliente
+
+
+@pytest.fixture
+def criar_venda(db, cliente):
+    """Criar uma venda em aberto do cliente com o total informado"""
+    def criar(total, dias_atras=10):
+        data_venda = date.today() - timedelta(days=dias_atras)
+        venda = Venda(
+            cliente_id=cliente.id,
+            data_venda=data_venda,
+            data_vencimento=data_venda + timedelta(days=30),
+            subtotal=Decimal(total),
+            total=Decimal(total)
+        )
+        db.session.add(venda)
+        db.session.commit()
+        return venda
+    return criar
+
+
+@pytest.fixture
+def movimentacao(db, cliente, criar_venda):
+    """
+    Inclusões, edições e exclusões de vendas, pagamentos e um pagamento
+    múltiplo, cada etapa confirmada (os valores consolidados são mantidos
+    pelos eventos de flush)
+    """
+    from app.services import pagamento_service
+
+    outro = Cliente(nome='Outro Cliente', telefone='31999990001', limite_credito=Decimal('5000.00'))
+    db.session.add(outro)
+    db.session.commit()
+
+    vendas = [
+        criar_venda(total, dias_atras=dias)
+        for total, dias in [('100.00', 100), ('80.00', 20), ('45.50', 10), ('30.00', 5), ('12.00', 2), ('60.00', 15)]
+    ]
+
+    # Pagamentos simples: um parcial e um que quita a venda
+    vendas[0].registrar_pagamento(Decimal('40.00'), 'dinheiro')
+    vendas[3].registrar_pagamento(Decimal('30.00'), 'pix')
+    db.session.commit()
+
+    # Edições: valor e forma de um pagamento; total, data e cliente de vendas
+    pagamento = vendas[0].pagamentos.first()
+    pagamento.valor = Decimal('25.00')
+    pagamento.forma_pagamento = 'cartao'
+    vendas[1].total = Decimal('95.00')
+    vendas[1].data_venda -= timedelta(days=3)
+    vendas[2].cliente_id = outro.id
+    db.session.commit()
+
+    # Pagamento múltiplo parcial (encerra as notas e gera a de restante)
+    sucesso, mensagem, _ = pagamento_service.liquidar_vendas(
+        cliente.id, [vendas[1].id, vendas[5].id], Decimal('50.00'), 'pix'
+    )
+    assert sucesso, mensagem
+
+    # Exclusões: um pagamento e uma venda com pagamento
+    parcial = vendas[4].registrar_pagamento(Decimal('5.00'), 'dinheiro')
+    vendas[2].registrar_pagamento(Decimal('10.00'), 'cartao')
+    db.session.commit()
+    db.session.delete(parcial)
+    db.session.commit()
+    db.session.delete(vendas[2])
+    db.session.commit()
+
+    return [cliente, outro]
@@ -0,0 +1,130 @@
+"""
+Testes dos modelos e tipos de valor
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.models import Cliente, Venda, ResumoDiario, InadimplenciaCliente
+from app.utils.constants import STATUS_VENDA
+from app.utils.moeda import formatar_csv, formatar_csv_coluna
+from app.utils.money import Money, somar
+
+
+class TestMoneyDistribuir:
+
+    @pytest.mark.parametrize('valor, pesos', [
+        ('10.00', [1, 1, 1]),
+        ('0.01', ['3.00', '5.00']),
+        ('99.99', ['12.34', '0.01', '45.67', '8.90']),
+        ('1234.56', ['1234.56']),
+    ])
+    def test_partes_somam_o_valor(self, valor, pesos):
+        partes = Money.de(valor).distribuir(pesos)
+
+        assert len(partes) == len(pesos)
+        assert somar(partes) == Money.de(valor)
+
+    def test_centavos_que_sobram_vao_para_as_maiores_fracoes(self):
+        # 1/3 e 2/3 de R$ 1,00: pisos 33 e 66, o centavo que sobra vai para 0,666...
+        assert Money.de('1.00').distribuir([1, 2]) == [Money(33), Money(67)]
+
+        # 0,25 / 0,35 / 0,40 de R$ 0,10: pisos 2, 3, 4; frações 0,5 / 0,5 / 0,0
+        # (empate desfeito pela ordem recebida)
+        assert Money.de('0.10').distribuir(['0.25', '0.35', '0.40']) == [Money(3), Money(3), Money(4)]
+
+    def test_empate_favorece_a_primeira_parte(self):
+        assert Money.de('10.00').distribuir([1, 1, 1]) == [Money.de('3.34'), Money.de('3.33'), Money.de('3.33')]
+
+    def test_nenhuma_parte_excede_o_peso(self):
+        gerador = random.Random(20)
+        for _ in range(200):
+            pesos = [Money(gerador.randint(1, 50000)) for _ in range(gerador.randint(1, 8))]
+            valor = Money(gerador.randint(1, somar(pesos).centavos))
+
+            partes = valor.distribuir(pesos)
+
+            assert somar(partes) == valor
+            assert all(parte <= peso for parte, peso in zip(partes, pesos))
+
+    @pytest.mark.parametrize('valor, pesos', [('0.00', [1, 2]), ('-5.00', [1, 2]), ('5.00', [0, 0])])
+    def test_sem_valor_ou_pesos_positivos_devolve_zeros(self, valor, pesos):
+        assert Money.de(valor).distribuir(pesos) == [Money(0), Money(0)]
+
+
+class TestMoneyComparacao:
+
+    def test_igualdade_exata_com_int_e_decimal(self):
+        assert Money.de('1.00') == 1
+        assert Money(5) == Decimal('0.05')
+        assert Money(5) != Decimal('0.054')
+
+    def test_hash_consistente_com_a_igualdade(self):
+        assert hash(Money.de('1.00')) == hash(1)
+        assert hash(Money(5)) == hash(Decimal('0.050'))
+        assert {Money(5), Decimal('0.05')} == {Money(5)}
+
+    def test_float_nao_e_comparavel(self):
+        assert Money(5) != 0.05
+        with pytest.raises(TypeError):
+            Money(5) < 0.1
+
+
+class TestMoedaCsv:
+
+    def test_coluna_igual_a_celula_por_celula(self):
+        valores = [Decimal('1234.50'), None, Decimal('-3'), Decimal('0.125'), Decimal('0E-2')]
+
+        assert formatar_csv_coluna(valores) == [formatar_csv(valor) for valor in valores]
+        assert formatar_csv_coluna(valores)[:3] == ['1234,50', '', '-3']
+        assert formatar_csv_coluna([]) == []
+
+
+class TestRegraInadimplencia:
+
+    def test_saldo_e_tabela_de_inadimplencia_usam_a_mesma_regra(self, db, cliente, criar_venda):
+        venda = criar_venda('100.00', dias_atras=100)
+        venda.registrar_pagamento(Decimal('40.00'), 'pix')
+        venda.atualizar_status()
+        db.session.commit()
+        assert venda.status == STATUS_VENDA['VENCIDA']
+
+        situacao = db.session.get(InadimplenciaCliente, cliente.id)
+        db.session.refresh(cliente)
+
+        assert cliente.saldo_aberto == Decimal('60.00')
+        assert cliente.saldo_vencido == situacao.valor_vencido == Decimal('60.00')
+        assert cliente.esta_inadimplente and situacao.inadimplente
+        assert not cliente.pode_comprar
+
+
+class TestValoresConsolidados:
+    """Os valores mantidos pelos eventos de flush batem com os de reparo"""
+
+    def test_valores_pagos_das_vendas(self, db, movimentacao):
+        assert Venda.recalcular_valores_pagos() == 0
+
+    def test_saldos_dos_clientes(self, db, movimentacao):
+        colunas = (Cliente.id, Cliente.saldo_aberto, Cliente.saldo_vencido, Cliente.data_vencimento_mais_antiga)
+        mantidos = db.session.execute(db.select(*colunas).order_by(Cliente.id)).all()
+
+        Cliente.recalcular_saldos()
+
+        assert db.session.execute(db.select(*colunas).order_by(Cliente.id)).all() == mantidos
+        assert [saldo for _, saldo, _, _ in mantidos] == [Decimal('192.00'), Decimal('0')]
+
+    def test_resumo_diario(self, db, movimentacao):
+        def resumos():
+            colunas = [c for c in ResumoDiario.__table__.columns if c.name != 'data_atualizacao']
+            linhas = db.session.execute(db.select(*colunas).order_by(ResumoDiario.data)).all()
+            # Dias cujo movimento foi todo desfeito ficam zerados; a reconstrução os remove
+            return [linha for linha in linhas if any(linha[1:])]
+
+        mantidos = resumos()
+
+        ResumoDiario.recalcular()
+
+        assert resumos() == mantidos
+        assert sum(linha.vendas_qtd for linha in mantidos) == Venda.query.count()
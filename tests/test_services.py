@@ -0,0 +1,121 @@
+"""
+Testes dos services
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.models import Cliente, Venda, Pagamento
+from app.services import pagamento_service, indice_clientes_service, export_service, venda_service
+from app.utils.constants import STATUS_VENDA
+
+
+class TestLiquidarVendas:
+
+    def test_pagamento_total_quita_todas_as_vendas(self, db, cliente, criar_venda):
+        vendas = [criar_venda('100.00'), criar_venda('50.00'), criar_venda('25.50')]
+
+        sucesso, mensagem, pagamento_multiplo = pagamento_service.liquidar_vendas(
+            cliente.id, [v.id for v in vendas], Decimal('175.50'), 'pix'
+        )
+
+        assert sucesso, mensagem
+        db.session.expire_all()
+        for venda in vendas:
+            venda = db.session.get(Venda, venda.id)
+            assert venda.status == STATUS_VENDA['PAGA']
+            assert venda.valor_pago == venda.total
+            assert venda.valor_restante == 0
+
+        assert Venda.query.filter_by(eh_restante=True).count() == 0
+        assert sum(p.valor for p in Pagamento.query) == Decimal('175.50')
+
+    def test_pagamento_parcial_distribui_e_gera_nota_de_restante(self, db, cliente, criar_venda):
+        vendas = [criar_venda('100.00'), criar_venda('50.00'), criar_venda('50.00')]
+
+        sucesso, mensagem, pagamento_multiplo = pagamento_service.liquidar_vendas(
+            cliente.id, [v.id for v in vendas], Decimal('100.01'), 'dinheiro'
+        )
+
+        assert sucesso, mensagem
+        db.session.expire_all()
+        liquidadas = [db.session.get(Venda, v.id) for v in vendas]
+
+        # Proporcional ao restante de cada venda, sem perder o centavo
+        assert [v.valor_pago for v in liquidadas] == [Decimal('50.01'), Decimal('25.00'), Decimal('25.00')]
+        for venda in liquidadas:
+            assert venda.status == STATUS_VENDA['PAGA']
+            assert venda.valor_pago <= venda.total
+            assert venda.valor_restante == 0
+
+        restante = Venda.query.filter_by(eh_restante=True).one()
+        assert restante.cliente_id == cliente.id
+        assert restante.pagamento_multiplo_id == pagamento_multiplo.id
+        assert restante.total == Decimal('99.99')
+        assert restante.valor_pago == 0
+        assert restante.valor_restante == restante.total
+        assert restante.status == STATUS_VENDA['ABERTA']
+
+        # Nada se perde: pago nas notas + restante = total original
+        assert sum(v.valor_pago for v in liquidadas) + restante.total == Decimal('200.00')
+        assert sum(p.valor for p in Pagamento.query) == Decimal('100.01')
+
+    def test_valor_maior_que_o_total_e_recusado(self, db, cliente, criar_venda):
+        venda = criar_venda('30.00')
+
+        sucesso, mensagem, _ = pagamento_service.liquidar_vendas(cliente.id, [venda.id], Decimal('30.01'), 'pix')
+
+        assert not sucesso
+        db.session.expire_all()
+        assert db.session.get(Venda, venda.id).status == STATUS_VENDA['ABERTA']
+        assert Pagamento.query.count() == 0
+
+
+class TestIndiceClientes:
+
+    def test_sincronizacao_remove_clientes_excluidos_em_outro_processo(self, db, monkeypatch):
+        clientes = [Cliente(nome=f'Maria Silva {i}') for i in range(3)]
+        db.session.add_all(clientes)
+        db.session.commit()
+        assert sorted(indice_clientes_service.buscar('silva')) == sorted(c.id for c in clientes)
+
+        # Exclusão direta na tabela, sem passar pelos eventos desta sessão
+        excluido = clientes[0].id
+        db.session.execute(Cliente.__table__.delete().where(Cliente.__table__.c.id == excluido))
+        db.session.commit()
+        monkeypatch.setattr(indice_clientes_service, 'INTERVALO_SINCRONIZACAO', 0)
+
+        assert sorted(indice_clientes_service.buscar('silva')) == sorted(c.id for c in clientes[1:])
+
+
+class TestExportacaoClientes:
+
+    def test_saldo_vencido_calculado_em_outro_dia_e_refeito(self, db, cliente, criar_venda):
+        criar_venda('100.00', dias_atras=100)
+        criar_venda('40.00', dias_atras=10)
+        # Saldo consolidado ontem: a data de corte já mudou
+        db.session.execute(db.update(Cliente).values(
+            data_calculo_saldo=date.today() - timedelta(days=1), saldo_vencido=Decimal('0')
+        ))
+        db.session.commit()
+
+        linhas = ''.join(export_service.gerar_csv('clientes')).splitlines()
+        coluna = linhas[0].split(';').index('Saldo Vencido')
+
+        assert linhas[1].split(';')[coluna] == '100,00'
+
+
+class TestObterVenda:
+
+    def test_carrega_cliente_e_consulta_itens_e_pagamentos(self, db, cliente, criar_venda):
+        venda = criar_venda('30.00')
+        venda.registrar_pagamento(Decimal('10.00'), 'pix')
+        db.session.commit()
+        venda_id, nome = venda.id, cliente.nome
+        db.session.expunge_all()
+
+        venda = venda_service.obter_venda(venda_id, incluir_relacionamentos=True)
+
+        assert venda.cliente.nome == nome
+        assert venda.itens.count() == 0
+        assert [p.valor for p in venda.pagamentos] == [Decimal('10.00')]